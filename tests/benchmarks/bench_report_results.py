@@ -0,0 +1,49 @@
+"""Benchmark of compiling test results into the report client data model
+
+Reconciles synthetic result sets with ReportClient._reconcile_results and
+reports the time per result, which stays flat as the number of results
+grows.
+
+Usage: python tests/benchmarks/bench_report_results.py [--sizes 1000 10000 100000]
+"""
+import argparse
+import time
+from vane import report_client
+
+SUITES = 10
+DUTS = 200
+
+
+def results(size):
+    """Return size test parameters spread over test suites, test cases and duts"""
+    for index in range(size):
+        test_case = index // DUTS
+        yield {
+            "test_suite": f"tests/test_suite_{test_case % SUITES}.py",
+            "name": f"test_case_{test_case}",
+            "dut": f"DSR{index % DUTS:03d}",
+            "test_result": index % 7 != 0,
+        }
+
+
+def main():
+    """Time compiling result sets of each size"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        client = report_client.ReportClient.__new__(report_client.ReportClient)
+        client._results_datamodel = None  # pylint: disable=protected-access
+        test_results = list(results(size))
+
+        start = time.perf_counter()
+        for test_parameters in test_results:
+            client._reconcile_results(test_parameters)  # pylint: disable=protected-access
+        seconds = time.perf_counter() - start
+
+        print(f"{size:>7} results {seconds:8.3f} s {seconds / size * 1e6:8.2f} us/result")
+
+
+if __name__ == "__main__":
+    main()
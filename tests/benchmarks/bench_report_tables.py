@@ -0,0 +1,59 @@
+"""Benchmark of writing report tables row by row
+
+Writes tables of synthetic rows with ReportClient._write_cell through a
+TableBuilder and reports the time per row, which stays flat as the table
+grows. With --baseline, also times writing the same rows through the
+python-docx table, which looks up each cell by walking the table.
+
+Usage: python tests/benchmarks/bench_report_tables.py [--sizes 1000 10000 50000] [--baseline]
+"""
+import argparse
+import time
+from vane import report_client
+
+COLUMNS = 6
+BASELINE_MAX_ROWS = 250
+
+
+def write_rows(client, table, size):
+    """Add size rows to table and write each of their cells"""
+    for row in range(size):
+        table.add_row()
+        for column in range(COLUMNS):
+            # pylint: disable-next=protected-access
+            client._write_cell(table, f"DSR{row:05d}-{column}", column, row, font_size=9)
+
+
+def main():
+    """Time writing tables of each size"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help=f"also time python-docx table indexing, for sizes up to {BASELINE_MAX_ROWS}",
+    )
+    args = parser.parse_args()
+
+    client = report_client.ReportClient.__new__(report_client.ReportClient)
+    for size in args.sizes:
+        document = report_client.docx.Document()
+        table = report_client.TableBuilder(document, rows=0, cols=COLUMNS)
+
+        start = time.perf_counter()
+        write_rows(client, table, size)
+        seconds = time.perf_counter() - start
+        print(f"{size:>7} rows {seconds:8.3f} s {seconds / size * 1e6:8.2f} us/row builder")
+
+        if args.baseline and size <= BASELINE_MAX_ROWS:
+            document = report_client.docx.Document()
+            table = document.add_table(rows=0, cols=COLUMNS, style=report_client.TABLE_GRID)
+
+            start = time.perf_counter()
+            write_rows(client, table, size)
+            seconds = time.perf_counter() - start
+            print(f"{size:>7} rows {seconds:8.3f} s {seconds / size * 1e6:8.2f} us/row python-docx")
+
+
+if __name__ == "__main__":
+    main()
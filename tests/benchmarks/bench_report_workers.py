@@ -0,0 +1,60 @@
+"""Benchmark of parsing result files for the report with report_workers
+
+Writes result files shaped like per-test result files to a temporary
+directory and times ReportClient._load_result_files for each number of
+report workers, one being the sequential path.
+
+Usage: python tests/benchmarks/bench_report_workers.py [--files 3000] [--workers 1 2 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+from vane import report_client, yaml_io
+
+
+def write_result_files(results_dir, files):
+    """Write result files and return their paths, in the order of their names"""
+    for index in range(files):
+        test_case = f"test_{index % 50}"
+        test_parameters = {
+            "test_suite": "tests/test_interface_counters.py",
+            "name": test_case,
+            "dut": f"DSR{index:04d}",
+            "test_result": True,
+            "actual_output": {f"Ethernet{port}": {"inErrors": 0} for port in range(1, 49)},
+        }
+        with open(
+            os.path.join(results_dir, f"result-{test_case}-DSR{index:04d}.yml"),
+            "w",
+            encoding="utf-8",
+        ) as result_file:
+            yaml_io.dump(test_parameters, result_file)
+
+    return sorted(os.path.join(results_dir, name) for name in os.listdir(results_dir))
+
+
+def main():
+    """Time parsing the result files with each number of workers"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as results_dir:
+        result_files = write_result_files(results_dir, args.files)
+
+        for workers in args.workers:
+            client = report_client.ReportClient.__new__(report_client.ReportClient)
+            client.data_model = {"parameters": {"report_workers": workers}}
+
+            start = time.perf_counter()
+            # pylint: disable-next=protected-access
+            parsed = sum(1 for _ in client._load_result_files(result_files))
+            seconds = time.perf_counter() - start
+
+            print(f"{workers:>3} workers {parsed} files {seconds:8.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Micro-benchmark of the YAML loader and dumper used by Vane
+
+Compares the pure python safe loader and dumper with the ones picked by
+vane.yaml_io on data shaped like a per-test result file.
+
+Usage: python tests/benchmarks/bench_yaml.py [--rounds 200] [--duts 4]
+"""
+import argparse
+import timeit
+import yaml
+from vane import yaml_io
+
+
+def result_data(duts):
+    """Return the test parameters of a result file for a number of duts"""
+    show_output = "\n".join(
+        f"Et{index}    {index * 7}    0    0    {index * 3}    0" for index in range(1, 49)
+    )
+    return {
+        "name": "test_if_intf_counters_has_input_errors_on_",
+        "description": "Verify the interface input error counters are zero",
+        "test_id": "TN1.1",
+        "test_suite": "test_interface_counters.py",
+        "test_result": True,
+        "skip": False,
+        "comment": "",
+        "fail_or_skip_reason": "",
+        "output_msg": "",
+        "dut": "DSR01",
+        "show_cmd": "show interfaces counters errors",
+        "show_cmds": {"DSR01": ["show version", "show interfaces counters errors"]},
+        "expected_output": {f"Ethernet{index}": {"inErrors": 0} for index in range(1, 49)},
+        "actual_output": {f"Ethernet{index}": {"inErrors": 0} for index in range(1, 49)},
+        "show_cmd_txts": {
+            f"DSR0{dut}": [f"show interfaces counters errors:\n\n{show_output}"]
+            for dut in range(duts)
+        },
+        "test_steps": [f"Step {step}: verify interface counters" for step in range(1, 11)],
+        "external_command_outputs": {},
+    }
+
+
+def main():
+    """Time loading and dumping with both implementations"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--duts", type=int, default=4)
+    args = parser.parse_args()
+
+    data = result_data(args.duts)
+    document = yaml.dump(data, default_flow_style=False)
+    print(f"result file of {len(document)} bytes, {args.rounds} rounds")
+    print(f"libyaml bindings available: {yaml.__with_libyaml__}")
+
+    timings = {
+        "dump pure python": lambda: yaml.dump(data, default_flow_style=False),
+        "dump yaml_io": lambda: yaml_io.dump(data, default_flow_style=False),
+        "load pure python": lambda: yaml.safe_load(document),
+        "load yaml_io": lambda: yaml_io.load(document),
+    }
+    for name, func in timings.items():
+        seconds = timeit.timeit(func, number=args.rounds) / args.rounds
+        print(f"{name:<20} {seconds * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -127,11 +127,11 @@ def rc_methods():
         "_format_tc_name",
         "_format_ts_name",
         "_major_section",
-        "_parse_testcases",
         "_reconcile_results",
         "_reports_dir",
         "_required_template_fields",
         "_results_datamodel",
+        "_results_summary",
         "_return_summary_headers",
         "_return_tbl_value",
         "_set_default_value",
@@ -176,6 +176,7 @@ def rc_variables():
         "data_model",
         "_summary_results",
         "_results_datamodel",
+        "_results_summary",
         "_document",
         "_major_section",
         "_test_no",
@@ -0,0 +1,103 @@
+"""Test class for connection_pool.py"""
+import pytest
+import pyeapi.eapilib
+from vane import connection_pool
+
+# Disable redefined-outer-name for using fixture functions
+# pylint: disable=redefined-outer-name
+
+DUT = {"name": "DSR01"}
+
+
+class FakeConn:
+    """Connection which counts its health checks"""
+
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+        self.closed = False
+        self.health_checks = 0
+
+    def run_commands(self, cmds, encoding="json"):
+        """Answer health checks"""
+        self.health_checks += 1
+        if not self.healthy:
+            raise pyeapi.eapilib.ConnectionError("eapi", "connection reset")
+        return [{"output": "clock"} for _ in cmds]
+
+    def close(self):
+        """Remember the connection was closed"""
+        self.closed = True
+
+
+@pytest.fixture
+def clock(mocker):
+    """Fixture to control the time seen by the pool"""
+    return mocker.patch("vane.connection_pool.time.monotonic", return_value=1000.0)
+
+
+@pytest.fixture
+def pool(mocker):
+    """Fixture returning a pool opening FakeConn connections"""
+    factory = mocker.Mock(side_effect=lambda dut, conn_type, timeout: FakeConn())
+    return connection_pool.ConnectionPool(factory, idle_timeout=300, health_check_interval=30)
+
+
+def test_connection_pool_reuse(pool, clock):
+    """Validates that connections are reused per dut, type and timeout"""
+    with pool.connection(DUT, "eapi", 60) as conn:
+        pass
+    with pool.connection(DUT, "eapi", 60) as reused_conn:
+        with pool.connection(DUT, "eapi", 60) as other_conn:
+            pass
+    with pool.connection(DUT, "eapi", 120) as timeout_conn:
+        pass
+
+    assert reused_conn is conn
+    assert other_conn is not conn
+    assert timeout_conn not in (conn, other_conn)
+    assert pool.factory.call_count == 3
+    assert conn.health_checks == 0
+
+
+def test_connection_pool_health_check(pool, clock):
+    """Validates that connections idle for a while are probed, and unhealthy
+    ones replaced"""
+    with pool.connection(DUT, "ssh", 60) as conn:
+        pass
+
+    clock.return_value += 60
+    assert pool.acquire(DUT, "ssh", 60) is conn
+    assert conn.health_checks == 1
+    pool.release(DUT, "ssh", 60, conn)
+
+    conn.healthy = False
+    clock.return_value += 60
+    new_conn = pool.acquire(DUT, "ssh", 60)
+    assert new_conn is not conn
+    assert conn.closed
+
+
+def test_connection_pool_eviction(pool, clock):
+    """Validates idle eviction and that connections which failed are not
+    reused"""
+    with pool.connection(DUT, "eapi", 60) as idle_conn:
+        pass
+    clock.return_value += 301
+    with pool.connection(DUT, "eapi", 30) as conn:
+        pass
+    assert idle_conn.closed
+
+    with pytest.raises(pyeapi.eapilib.CommandError):
+        with pool.connection(DUT, "eapi", 30) as reused_conn:
+            raise pyeapi.eapilib.CommandError(1002, "invalid command")
+    assert reused_conn is conn and not conn.closed
+
+    with pytest.raises(pyeapi.eapilib.ConnectionError):
+        with pool.connection(DUT, "eapi", 30) as reused_conn:
+            raise pyeapi.eapilib.ConnectionError("eapi", "connection reset")
+    assert conn.closed
+
+    with pool.connection(DUT, "eapi", 30) as last_conn:
+        pass
+    pool.close()
+    assert last_conn.closed
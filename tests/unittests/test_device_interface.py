@@ -0,0 +1,584 @@
+"""Test class for device_interface.py"""
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import netmiko
+import pyeapi.eapilib
+from vane import device_interface, tests_tools
+
+# Disable redefined-outer-name for using fixture functions
+# pylint: disable=redefined-outer-name
+
+UNSUPPORTED_CMD = "show unsupported"
+
+
+class CommandApiHandler(BaseHTTPRequestHandler):
+    """Emulates the eAPI /command-api endpoint of a device"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        """Keep the test output quiet"""
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        """Answer a runCmds request"""
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        request = json.loads(body)
+        self.server.requests.append(request)
+
+        if self.headers["Authorization"] != self.server.authorization:
+            self._reply(401, b"Unauthorized")
+            return
+
+        params = request["params"]
+        result = []
+        for cmd in params["cmds"]:
+            cmd = cmd["cmd"] if isinstance(cmd, dict) else cmd
+            if cmd == UNSUPPORTED_CMD:
+                error = {
+                    "code": 1002,
+                    "message": f"CLI command {len(result) + 1} of {len(params['cmds'])} "
+                    f"'{cmd}' failed: invalid command",
+                    "data": result + [{"errors": ["Invalid input"]}],
+                }
+                payload = {"jsonrpc": "2.0", "id": request["id"], "error": error}
+                self._reply(200, json.dumps(payload).encode())
+                return
+            if params["format"] == "text":
+                result.append({"output": f"{cmd} text\n"})
+            else:
+                result.append({"cmd": cmd})
+
+        payload = {"jsonrpc": "2.0", "id": request["id"], "result": result}
+        self._reply(200, json.dumps(payload).encode())
+
+    def _reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def eapi_server():
+    """Runs a local http eAPI stub and returns it"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CommandApiHandler)
+    server.connections = 0
+    server.requests = []
+    server.authorization = "Basic Y3ZwYWRtaW46Y3Zw"  # cvpadmin:cvp
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def async_conn(server, name="DSR01", password="cvp"):
+    """Returns an AsyncEapiConn to the eAPI stub"""
+    conn = device_interface.AsyncEapiConn()
+    conn.set_up_conn(
+        {
+            "name": name,
+            "mgmt_ip": "127.0.0.1",
+            "port": server.server_address[1],
+            "transport": "http",
+            "username": "cvpadmin",
+            "password": password,
+            "timeout": 5,
+        }
+    )
+    return conn
+
+
+def test_async_eapi_run_commands(eapi_server):
+    """Validates that run_commands sends a runCmds request with enable
+    prepended and strips the enable output"""
+    conn = async_conn(eapi_server)
+
+    output = conn.run_commands(["show version", "show clock"], encoding="text")
+
+    assert output == [{"output": "show version text\n"}, {"output": "show clock text\n"}]
+    assert eapi_server.requests[0]["method"] == "runCmds"
+    assert eapi_server.requests[0]["params"]["cmds"] == ["enable", "show version", "show clock"]
+
+
+def test_async_eapi_pool_keep_alive(eapi_server):
+    """Validates that requests sharing a pool reuse the same connection"""
+    conn = async_conn(eapi_server)
+
+    async def run():
+        pool = device_interface.AsyncEapiPool(max_connections=4)
+        try:
+            for _ in range(5):
+                await conn.async_run_commands(["show version"], pool=pool)
+        finally:
+            await pool.close()
+
+    device_interface.asyncio.run(run())
+
+    assert len(eapi_server.requests) == 5
+    assert eapi_server.connections == 1
+
+
+def test_async_eapi_errors(eapi_server):
+    """Validates that failed commands raise pyeapi CommandError with the
+    outputs of the commands which ran, and bad credentials ConnectionError"""
+    conn = async_conn(eapi_server)
+
+    with pytest.raises(pyeapi.eapilib.CommandError) as err:
+        conn.run_commands(["show version", UNSUPPORTED_CMD])
+
+    assert err.value.command_error == "Invalid input"
+    assert err.value.output == [
+        {"cmd": "enable"},
+        {"cmd": "show version"},
+        {"errors": ["Invalid input"]},
+    ]
+    assert UNSUPPORTED_CMD in str(err.value)
+
+    with pytest.raises(pyeapi.eapilib.ConnectionError):
+        async_conn(eapi_server, password="wrong").run_commands(["show version"])
+
+
+def test_async_eapi_timeout():
+    """Validates that a device which does not answer in time raises
+    ConnectionError and its connection is closed"""
+    asyncio = device_interface.asyncio
+    closed = []
+
+    async def run():
+        async def handle(reader, writer):
+            await reader.read()
+            closed.append(True)
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        pool = device_interface.AsyncEapiPool(max_connections=1)
+        try:
+            with pytest.raises(pyeapi.eapilib.ConnectionError):
+                await pool.request(
+                    "127.0.0.1", server.sockets[0].getsockname()[1], None, b"POST", 0.2
+                )
+            # the stub sees the end of the stream once the pool closed the connection
+            await asyncio.sleep(0.2)
+        finally:
+            await pool.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+    assert closed == [True]
+
+
+def raw_eapi_request(response):
+    """Returns the status, reason and body of a pool request to a stub which
+    answers the request with the raw bytes of response"""
+    asyncio = device_interface.asyncio
+
+    async def run():
+        async def handle(reader, writer):
+            await reader.read(4)
+            writer.write(response)
+            await writer.drain()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        pool = device_interface.AsyncEapiPool(max_connections=1)
+        try:
+            return await pool.request(
+                "127.0.0.1", server.sockets[0].getsockname()[1], None, b"POST", 2
+            )
+        finally:
+            await pool.close()
+            server.close()
+            await server.wait_closed()
+
+    return asyncio.run(run())
+
+
+def test_async_eapi_interim_response():
+    """Validates that informational 1xx responses before the response are skipped"""
+    response = (
+        b"HTTP/1.1 100 Continue\r\n\r\n"
+        b"HTTP/1.1 102 Processing\r\nX-Progress: 1\r\n\r\n"
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"4;ext=1\r\n{\"a\"\r\n2\r\n:1\r\n1\r\n}\r\n0\r\nX-Trailer: 1\r\n\r\n"
+    )
+
+    assert raw_eapi_request(response) == (200, "OK", b'{"a":1}')
+
+
+@pytest.mark.parametrize(
+    "response",
+    [
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n-1\r\n",
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n" + b"a" * 2**17,
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nabc\r\n",
+        b"HTTP/1.1 200 OK\r\nContent-Length: -5\r\n\r\n",
+        b"HTTP/1.1 200 OK\r\nX-Big: " + b"a" * 2**17 + b"\r\n\r\n",
+        b"HTTP/1.1 200 OK\r\n" + b"X-Header: 1\r\n" * 101 + b"\r\n",
+        b"HTTP/1.1 101 Switching Protocols\r\n\r\n",
+        b"garbage\r\n\r\n",
+    ],
+    ids=[
+        "bad chunk size",
+        "negative chunk size",
+        "oversized chunk size line",
+        "chunk longer than its size",
+        "negative content length",
+        "oversized header line",
+        "too many headers",
+        "switching protocols",
+        "bad status line",
+    ],
+)
+def test_async_eapi_malformed_response(response):
+    """Validates that a malformed response raises ConnectionError"""
+    with pytest.raises(pyeapi.eapilib.ConnectionError):
+        raw_eapi_request(response)
+
+
+def test_async_eapi_device_conn(eapi_server):
+    """Validates that AsyncEapiConn implements the DeviceConn methods"""
+    conn = async_conn(eapi_server)
+
+    assert isinstance(conn, device_interface.DeviceConn)
+    assert conn.enable("show version") == [
+        {"command": "show version", "result": {"cmd": "show version"}, "encoding": "json"}
+    ]
+    assert conn.get_config(as_string=True) == "show running-config text"
+    assert conn.config(["hostname DSR01"]) == [{"cmd": "hostname DSR01"}]
+    assert eapi_server.requests[-1]["params"]["cmds"] == [
+        "enable",
+        "configure",
+        "hostname DSR01",
+        "end",
+    ]
+    assert conn.set_timeout(1) == 5 and conn.timeout == 1
+    with pytest.raises(NotImplementedError):
+        conn.transfer_file("src", "dest", "flash:", "put")
+    conn.close()
+
+
+def test_run_dut_workers_async(eapi_server):
+    """Validates that run_dut_workers_async collects the show command output
+    of every dut over one event loop and pool"""
+    duts = [{"name": f"DSR0{index}"} for index in range(1, 5)]
+    duts.append({"name": "BAD01"})
+    for dut in duts:
+        password = "wrong" if dut["name"] == "BAD01" else "cvp"
+        dut["async_eapi_conn"] = async_conn(eapi_server, dut["name"], password)
+
+    show_cmds = ["show version", UNSUPPORTED_CMD]
+    failed_duts = tests_tools.run_dut_workers_async(duts, show_cmds, workers=2, timeout=5)
+
+    assert failed_duts == [duts[-1]]
+    for dut in duts[:-1]:
+        assert dut["output"]["show version"] == {
+            "json": {"cmd": "show version"},
+            "text": "show version text\n",
+        }
+        assert dut["output"][UNSUPPORTED_CMD] == {"json": "", "text": ""}
+    # the pool holds at most two connections at a time and reuses them
+    assert eapi_server.connections <= 3
+
+
+class FakeConn(device_interface.DeviceConn):
+    """Connection to a device which only supports show version and show clock"""
+
+    platform = "vEOS-lab"
+    eos_version = "4.30.1F"
+
+    def __init__(self):
+        self.session_log = None
+
+    def set_up_conn(self, device_data):
+        self.session_log = device_data.get("session_log")
+
+    def run_commands(self, cmds, encoding="json", send_enable=True, **kwargs):
+        outputs = [{"enable": True}]
+        for cmd in cmds:
+            if cmd not in ("show version", "show clock"):
+                outputs.append({"errors": ["Invalid input"]})
+                raise pyeapi.eapilib.CommandError(
+                    1002, "invalid command", command_error="Invalid input", output=outputs
+                )
+            outputs.append({"output": cmd} if encoding == "text" else {"cmd": cmd})
+        return outputs[1:]
+
+    def enable(self, commands, encoding="json", strict=False, send_enable=True, **kwargs):
+        return [
+            {"command": cmd, "result": output, "encoding": encoding}
+            for cmd, output in zip(commands, self.run_commands(commands, encoding))
+        ]
+
+    def transfer_file(self, src_file, dest_file, file_system, operation, sftp=False):
+        with open(self.session_log, "w", encoding="utf-8") as log_file:
+            log_file.write(f"copied {src_file}")
+        return {"file_exists": True, "file_transferred": True, "file_verified": True}
+
+
+@pytest.fixture
+def captures(mocker):
+    """Fixture to start with no open captures"""
+    mocker.patch("vane.device_interface.atexit.register")
+    return mocker.patch.dict(device_interface.Capture._captures, clear=True)
+
+
+def test_record_and_replay(captures, tmp_path):
+    """Validates that ReplayConn serves the calls recorded by RecordingConn"""
+    session_log = str(tmp_path / "logs" / "session.log")
+    device_data = {"name": "DSR01", "session_log": session_log}
+
+    recording_conn = device_interface.RecordingConn(FakeConn(), str(tmp_path / "capture"))
+    recording_conn.set_up_conn(device_data)
+    assert recording_conn.run_commands(["show version", "show clock"]) == [
+        {"cmd": "show version"},
+        {"cmd": "show clock"},
+    ]
+    assert recording_conn.enable(["show clock"], "text")[0]["result"] == {"output": "show clock"}
+    with pytest.raises(pyeapi.eapilib.CommandError):
+        recording_conn.run_commands(["show clock", "show bogus"])
+    (tmp_path / "logs").mkdir()
+    recording_conn.transfer_file("a.txt", "b.txt", "flash:", "put")
+    device_interface.Capture.save_all()
+
+    captures.clear()
+    (tmp_path / "logs" / "session.log").unlink()
+    replay_conn = device_interface.ReplayConn(str(tmp_path / "capture"))
+    replay_conn.set_up_conn(device_data)
+
+    assert replay_conn.platform == "vEOS-lab"
+    assert replay_conn.eos_version == "4.30.1F"
+    assert replay_conn.run_commands(["show version", "show clock"]) == [
+        {"cmd": "show version"},
+        {"cmd": "show clock"},
+    ]
+    # batches which were not recorded are built from the outputs of each command
+    assert replay_conn.run_commands(["show clock"]) == [{"cmd": "show clock"}]
+    assert replay_conn.enable(["show clock"], "text")[0]["result"] == {"output": "show clock"}
+
+    with pytest.raises(pyeapi.eapilib.CommandError) as err:
+        replay_conn.run_commands(["show clock", "show bogus"])
+    assert err.value.output[-1] == {"errors": ["Invalid input"]}
+
+    with pytest.raises(pyeapi.eapilib.CommandError) as err:
+        replay_conn.run_commands(["show version", "show unrecorded"])
+    assert err.value.output == [{}, {"cmd": "show version"}, {"errors": ["no recorded output"]}]
+
+    assert replay_conn.transfer_file("a.txt", "b.txt", "flash:", "put")["file_transferred"]
+    assert (tmp_path / "logs" / "session.log").read_text(encoding="utf-8") == "copied a.txt"
+
+
+def test_replay_without_capture(captures, tmp_path):
+    """Validates that a device without capture fails to connect"""
+    replay_conn = device_interface.ReplayConn(str(tmp_path))
+
+    with pytest.raises(pyeapi.eapilib.ConnectionError):
+        replay_conn.set_up_conn({"name": "DSR01"})
+
+
+class FakeSession:
+    """Netmiko session which times out after a number of commands"""
+
+    def __init__(self, timeout_after=None):
+        self.timeout_after = timeout_after
+        self.commands = []
+        self.enabled = False
+        self.disconnected = False
+        self.busy = threading.Lock()
+
+    def enable(self):
+        """Enter enable mode"""
+        self.enabled = True
+
+    def send_command(self, cmd):
+        """Answer commands until the session times out"""
+        if not self.busy.acquire(blocking=False):
+            raise AssertionError("session used by two threads at once")
+        try:
+            if self.timeout_after is not None and len(self.commands) >= self.timeout_after:
+                raise netmiko.exceptions.ReadTimeout("pattern not detected")
+            self.commands.append(cmd)
+            return f"{cmd} text"
+        finally:
+            self.busy.release()
+
+    def disconnect(self):
+        """Close the session"""
+        self.disconnected = True
+
+
+DEVICE_DATA = {
+    "name": "DSR01",
+    "mgmt_ip": "10.255.74.38",
+    "username": "cvpadmin",
+    "password": "cvp",
+    "session_log": "session.log",
+}
+
+
+def test_netmiko_reconnect(mocker):
+    """Validates that a command which times out is retried once on a new
+    session in enable mode, reconnecting with exponential backoff"""
+    sleep = mocker.patch("vane.device_interface.time.sleep")
+    first_session, second_session = FakeSession(timeout_after=1), FakeSession()
+    netmiko_class = mocker.patch(
+        "vane.device_interface.Netmiko",
+        side_effect=[
+            first_session,
+            netmiko.exceptions.NetmikoTimeoutException("timed out"),
+            OSError("no route to host"),
+            second_session,
+        ],
+    )
+    conn = device_interface.NetmikoConn()
+    conn.set_up_conn(DEVICE_DATA)
+
+    output = conn.run_commands(["show version", "show clock"], encoding="text")
+
+    assert output == [{"output": "show version text"}, {"output": "show clock text"}]
+    assert first_session.commands == ["show version"] and first_session.disconnected
+    assert second_session.commands == ["show clock"] and second_session.enabled
+    assert netmiko_class.call_args.kwargs["session_log_file_mode"] == "append"
+    assert netmiko_class.call_args.kwargs["host"] == "10.255.74.38"
+    assert [call.args[0] for call in sleep.call_args_list] == [1, 2]
+
+    mocker.patch(
+        "vane.device_interface.Netmiko",
+        side_effect=netmiko.exceptions.NetmikoTimeoutException("timed out"),
+    )
+    second_session.timeout_after = 1
+    with pytest.raises(netmiko.exceptions.NetmikoTimeoutException):
+        conn.run_commands("show clock", encoding="text")
+
+
+def test_netmiko_config_not_retried(mocker):
+    """Validates that config which times out is not sent again, and that the
+    next command reconnects"""
+    first_session, second_session = mocker.MagicMock(), FakeSession()
+    first_session.send_config_set.side_effect = netmiko.exceptions.ReadTimeout("timed out")
+    netmiko_class = mocker.patch(
+        "vane.device_interface.Netmiko", side_effect=[first_session, second_session]
+    )
+    conn = device_interface.NetmikoConn()
+    conn.set_up_conn(DEVICE_DATA)
+
+    with pytest.raises(netmiko.exceptions.ReadTimeout):
+        conn.config(["interface Ethernet1", "shutdown"])
+
+    first_session.send_config_set.assert_called_once_with(["interface Ethernet1", "shutdown"])
+    first_session.disconnect.assert_called_once()
+    assert conn.run_commands("show clock", encoding="text") == [{"output": "show clock text"}]
+    assert second_session.enabled and netmiko_class.call_count == 2
+
+
+def test_netmiko_reconnect_not_set_up():
+    """Validates that a connection which was never set up raises a
+    connection error instead of reconnecting"""
+    conn = device_interface.NetmikoConn()
+
+    with pytest.raises(netmiko.exceptions.ConnectionException):
+        conn.reconnect()
+    with pytest.raises(netmiko.exceptions.ConnectionException):
+        conn.run_commands("show clock", encoding="text")
+
+
+def test_netmiko_shared_between_threads(mocker):
+    """Validates that threads sharing a connection use its session one at a
+    time"""
+    session = FakeSession()
+    mocker.patch("vane.device_interface.Netmiko", return_value=session)
+    conn = device_interface.NetmikoConn()
+    conn.set_up_conn(DEVICE_DATA)
+
+    threads = [
+        threading.Thread(target=conn.run_commands, args=([f"show clock {index}"] * 50, "text"))
+        for index in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(session.commands) == 200
+
+
+class FakeEosSession:
+    """Netmiko session to an emulated EOS cli, which answers a command once
+    its prompt is given or looked up"""
+
+    def __init__(self):
+        self.base_prompt = "DSR01"
+        self.prompt = "DSR01>"
+        self.expect_strings = []
+        self.enables = 0
+
+    def enable(self):
+        """Enter enable mode"""
+        self.enables += 1
+        self.prompt = "DSR01#"
+
+    def send_command(self, cmd, expect_string=None, re_flags=0):
+        """Answer a command, failing if its prompt does not match"""
+        if expect_string is not None:
+            self.expect_strings.append((expect_string, re_flags))
+            if not re.search(expect_string, self.prompt, re_flags):
+                raise netmiko.exceptions.ReadTimeout("pattern not detected")
+        if cmd.startswith(UNSUPPORTED_CMD):
+            return "% Invalid input"
+        if cmd.startswith("disable"):
+            self.prompt = "DSR01>"
+            return ""
+        if cmd.endswith(" | json"):
+            return json.dumps({"cmd": cmd[: -len(" | json")]}, indent=2)
+        return f"{cmd} text\nsecond line"
+
+    def disconnect(self):
+        """Close the session"""
+
+
+def test_netmiko_cached_prompt_cmds(mocker):
+    """Validates that commands are read up to the prompt of the session when
+    it is cached, that output lines holding the hostname do not match it, and
+    that enable mode is entered once per session and after leaving it"""
+    session = FakeEosSession()
+    mocker.patch("vane.device_interface.Netmiko", return_value=session)
+    conn = device_interface.NetmikoConn(cached_prompt=True)
+    conn.set_up_conn(DEVICE_DATA)
+
+    assert conn.run_commands(["show version", "show clock"]) == [
+        {"cmd": "show version"},
+        {"cmd": "show clock"},
+    ]
+    assert conn.run_commands(["show version", "show clock"], encoding="text") == [
+        {"output": "show version text\nsecond line"},
+        {"output": "show clock text\nsecond line"},
+    ]
+    assert len(session.expect_strings) == 4
+    for pattern, re_flags in session.expect_strings:
+        assert re.search(pattern, "show run\nDSR01(config-if-Et1)#", re_flags)
+        assert not re.search(pattern, "description DSR01 uplink #1\nDSR01 to DSR02>\n", re_flags)
+    assert session.enables == 1
+
+    with pytest.raises(device_interface.CommandError):
+        conn.run_commands(["show version", UNSUPPORTED_CMD, "show clock"], encoding="text")
+
+    conn.run_commands(["show version", "disable"], encoding="text")
+    assert conn.run_commands(["show clock", "show version"], encoding="text")[1] == {
+        "output": "show version text\nsecond line"
+    }
+    assert session.enables == 2
+
+    conn.reconnect()
+    conn.run_commands(["show clock", "show version"], encoding="text")
+    assert session.enables == 3
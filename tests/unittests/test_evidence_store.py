@@ -0,0 +1,43 @@
+"""Test class for evidence_store.py"""
+from vane import evidence_store
+
+
+def test_evidence_store_put_and_get(tmp_path):
+    """Validates that evidence is stored once per unique text"""
+    store = evidence_store.EvidenceStore(str(tmp_path))
+
+    reference = store.put("show version output")
+
+    assert evidence_store.is_reference(reference)
+    assert not evidence_store.is_reference("show version output")
+    assert store.put("show version output") == reference
+    assert store.put("show clock output") != reference
+    assert store.get(reference) == "show version output"
+    assert len(list(tmp_path.glob("*/*.txt"))) == 2
+
+    # evidence stored by an earlier run is not written again
+    other_store = evidence_store.EvidenceStore(str(tmp_path))
+    assert other_store.put("show version output") == reference
+    assert len(list(tmp_path.glob("*/*"))) == 2
+
+
+def test_evidence_store_resolve(tmp_path, mocker):
+    """Validates that references in result data are resolved to the
+    evidence texts"""
+    logerr = mocker.patch("vane.evidence_store.logging.error")
+    store = evidence_store.EvidenceStore(str(tmp_path))
+    version = store.put("show version output")
+    missing = evidence_store.EVIDENCE_REF_PREFIX + "0" * 64
+    result = {
+        "show_cmd": f"show version:\n\n{version}",
+        "show_cmd_txts": {"DSR01": [version, "short output", missing]},
+        "test_result": True,
+    }
+
+    assert store.resolve(result) == {
+        "show_cmd": "show version:\n\nshow version output",
+        "show_cmd_txts": {"DSR01": ["show version output", "short output", missing]},
+        "test_result": True,
+    }
+    logerr.assert_called_once()
+    assert evidence_store.evidence_dir({"report_dir": "reports"}) == "reports/evidence"
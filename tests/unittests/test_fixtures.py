@@ -448,3 +448,42 @@ def test_perform_teardown_via_role(loginfo, logdebug, mocker):
     logdebug_calls = each_dut_teardown * 5
 
     logdebug.assert_has_calls(logdebug_calls)
+
+
+def test_pytest_collection_modifyitems(logdebug, mocker):
+    """Validates that test steps are parsed once per collected test function"""
+    steps_mock = mocker.patch("vane.tests_tools.return_test_steps")
+    steps_mock.side_effect = [["step"], OSError("could not get source code")]
+    items = [
+        mocker.Mock(function="test_a", nodeid="test_a[DSR01]"),
+        mocker.Mock(function="test_b", nodeid="test_b[DSR01]"),
+        mocker.Mock(spec=["nodeid"], nodeid="doctest"),
+    ]
+
+    vane.fixtures.pytest_collection_modifyitems(items)
+
+    steps_mock.assert_has_calls([call("test_a"), call("test_b")])
+    logdebug.assert_called_once_with(
+        "No test steps parsed for test_b[DSR01]: could not get source code"
+    )
+
+
+def test_add_evidence_links(mocker, tmp_path):
+    """Validates that evidence stored during a test is linked from the HTML
+    report, relative to the report file"""
+    mocker.patch(
+        "vane.tests_tools.pop_evidence_links",
+        return_value=[("DSR01 actual output", str(tmp_path / "evidence" / "ab" / "ab.txt"))],
+    )
+    html_plugin = mocker.Mock()
+    item = mocker.Mock()
+    item.config.pluginmanager.getplugin.return_value = html_plugin
+    item.config.option.htmlpath = str(tmp_path / "reports" / "report.html")
+    report = mocker.Mock(spec=[])
+
+    vane.fixtures.add_evidence_links(item, report)
+
+    html_plugin.extras.url.assert_called_once_with(
+        "../evidence/ab/ab.txt", name="DSR01 actual output"
+    )
+    assert report.extra == [html_plugin.extras.url.return_value]
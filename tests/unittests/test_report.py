@@ -5,6 +5,7 @@ report_client.py unit tests
 # Disable protected-access for testing hidden class functions
 # pylint: disable=protected-access
 
+import pytest
 from vane import report_client
 
 
@@ -90,3 +91,231 @@ def test_if_keys_in_dict(duts_dict):
         total = RC._totals(duts, question)
 
         assert total == answer
+
+
+def test_reconcile_results():
+    """Verify results are grouped by test suite, test case and dut in the
+    order they are read, keeping the first result of a dut"""
+
+    client = report_client.ReportClient.__new__(report_client.ReportClient)
+    client._results_datamodel = None
+    results = [
+        {"test_suite": "tests/test_a.py", "name": "test_1", "dut": "DSR01"},
+        {"test_suite": "tests/test_b.py", "name": "test_2", "dut": "DSR01"},
+        {"test_suite": "tests/test_a.py", "name": "test_1", "dut": "DSR02"},
+        {"test_suite": "tests/test_a.py", "name": "test_3", "dut": "DSR01"},
+        {"test_suite": "tests/test_a.py", "name": "test_1", "dut": "DSR01", "rerun": True},
+    ]
+
+    for result in results:
+        client._reconcile_results(result)
+
+    assert client._results_datamodel == {
+        "test_suites": [
+            {
+                "name": "test_a.py",
+                "test_cases": [
+                    {"name": "test_1", "duts": [results[0], results[2]]},
+                    {"name": "test_3", "duts": [results[3]]},
+                ],
+            },
+            {"name": "test_b.py", "test_cases": [{"name": "test_2", "duts": [results[1]]}]},
+        ]
+    }
+
+
+def test_compile_yaml_data_parallel(tmp_path):
+    """Verify result files parsed by a process pool are compiled in the
+    order of the directory entries, as when parsed sequentially"""
+
+    for index in range(report_client.MIN_PARALLEL_RESULT_FILES + 6):
+        test_case = f"test_{index % 9}"
+        dut = f"DSR{index:03d}"
+        (tmp_path / f"result-{test_case}-{dut}.yml").write_text(
+            f"test_suite: tests/test_a.py\nname: {test_case}\ndut: {dut}\n", encoding="utf-8"
+        )
+
+    datamodels = []
+    for workers in (1, 3):
+        client = report_client.ReportClient.__new__(report_client.ReportClient)
+        client.data_model = {"parameters": {"report_workers": workers}}
+        client._results_datamodel = None
+        client._evidence_store = report_client.evidence_store.EvidenceStore(str(tmp_path))
+        client._compile_yaml_data(str(tmp_path))
+        datamodels.append(client._results_datamodel)
+
+    assert datamodels[0] == datamodels[1]
+    names = [name.split("-")[2][: -len(".yml")] for name in report_client.os.listdir(tmp_path)]
+    for test_case in datamodels[1]["test_suites"][0]["test_cases"]:
+        duts = [dut["dut"] for dut in test_case["duts"]]
+        assert sorted(duts, key=names.index) == duts
+
+
+def test_load_result_files_default_workers(mocker):
+    """Verify result files are parsed by one worker per
+    MIN_PARALLEL_RESULT_FILES files, up to one per cpu, by default"""
+
+    mocker.patch("vane.report_client.os.cpu_count", return_value=4)
+    executor = mocker.patch("vane.report_client.concurrent.futures.ProcessPoolExecutor")
+    executor.return_value.__enter__.return_value.map.side_effect = lambda _, files, **__: files
+    read = mocker.patch("vane.report_client.yaml_read", side_effect=lambda name: name)
+    client = report_client.ReportClient.__new__(report_client.ReportClient)
+    client.data_model = {"parameters": {"report_workers": None}}
+
+    for files, workers in ((63, None), (130, 2), (1000, 4)):
+        result_files = [f"result-{index}.yml" for index in range(files)]
+        assert list(client._load_result_files(result_files)) == result_files
+        if workers:
+            assert executor.call_args.kwargs["max_workers"] == workers
+        else:
+            assert read.call_count == files and not executor.called
+
+
+def test_compile_yaml_data_parallel_error(tmp_path):
+    """Verify a result file which is not valid YAML ends the report when
+    parsed by a process pool, as when parsed sequentially"""
+
+    for index in range(report_client.MIN_PARALLEL_RESULT_FILES):
+        (tmp_path / f"result-test_1-DSR{index:03d}.yml").write_text(
+            f"test_suite: tests/test_a.py\nname: test_1\ndut: DSR{index:03d}\n", encoding="utf-8"
+        )
+    (tmp_path / "result-test_1-DSR999.yml").write_text("name: [test_1\n", encoding="utf-8")
+
+    client = report_client.ReportClient.__new__(report_client.ReportClient)
+    client.data_model = {"parameters": {"report_workers": 2}}
+    client._results_datamodel = None
+    client._evidence_store = report_client.evidence_store.EvidenceStore(str(tmp_path))
+
+    with pytest.raises(SystemExit):
+        client._compile_yaml_data(str(tmp_path))
+
+
+def test_write_detail_report_parts(tmp_path, mocker):
+    """Verify the detailed report written in parts to disk is streamed into
+    the body of the report, in order"""
+
+    mocker.patch("vane.report_client.DETAIL_PART_SECTIONS", 2)
+    client = report_client.ReportClient(DEFINITIONS)
+    for index in range(5):
+        client._reconcile_results(
+            {
+                "test_suite": f"tests/test_suite_{index // 3}.py",
+                "name": f"test_case_{index // 2}",
+                "dut": f"dsr0{index}",
+                "test_id": f"TN{index}",
+                "description": "Verify the dut",
+                "show_cmds": {f"dsr0{index}": ["show version"]},
+                "show_cmd_txts": {f"dsr0{index}": [f"version of dsr0{index}"]},
+                "expected_output": {"version": index},
+                "actual_output": {"version": index},
+                "test_result": True,
+                "skip": False,
+                "fail_or_skip_reason": "",
+            }
+        )
+
+    client._document.add_heading("Summary", 1)
+    client._write_detail_report()
+    assert [para.text for para in client._document.paragraphs] == ["Summary"]
+    client._document.add_paragraph("end of report")
+    client._save_document(str(tmp_path / "report.docx"))
+
+    document = report_client.docx.Document(str(tmp_path / "report.docx"))
+    headings = [
+        para.text for para in document.paragraphs if para.style.name.startswith("Heading")
+    ]
+    assert headings == [
+        "Summary",
+        "1. Detailed Test Suite Results: test suite 0",
+        "1.1 Test Case: Test case 0",
+        "1.1. 1 DUT: DSR00",
+        "1.1. 2 DUT: DSR01",
+        "1.2 Test Case: Test case 1",
+        "1.2. 1 DUT: DSR02",
+        "2. Detailed Test Suite Results: test suite 1",
+        "2.1 Test Case: Test case 1",
+        "2.1. 1 DUT: DSR03",
+        "2.2 Test Case: Test case 2",
+        "2.2. 1 DUT: DSR04",
+    ]
+    assert document.paragraphs[-1].text == "end of report"
+    assert [table.cell(0, 0).text for table in document.tables] == [
+        f"\ndsr0{index}# show version\n\nversion of dsr0{index}\n" for index in range(5)
+    ]
+    body = document.element.body
+    assert body[-1].tag == report_client.qn("w:sectPr") and len(body.xpath("w:sectPr")) == 1
+
+
+def test_table_builder():
+    """Verify the table builder adds rows in order and writes to its cells"""
+
+    document = report_client.docx.Document()
+    table = report_client.TableBuilder(document, rows=1, cols=3)
+    for row in range(1, 4):
+        table.add_row()
+    for row in range(4):
+        for column in range(3):
+            RC._write_cell(table, f"{row}.{column}", column, row, color="00FFFF" if row else None)
+
+    assert len(document.tables) == 1
+    assert document.tables[0].style.name == report_client.TABLE_GRID
+    assert [[cell.text for cell in row.cells] for row in document.tables[0].rows] == [
+        [f"{row}.{column}" for column in range(3)] for row in range(4)
+    ]
+
+
+def test_results_summary():
+    """Verify the results summary totals the results per dut, test suite and
+    test case in one pass"""
+
+    summary = report_client.ResultsSummary()
+    summary.add_json_report(
+        {
+            "summary": {"passed": 2, "failed": 1, "total": 4},
+            "tests": [
+                {"name": "test_version[dsr01]", "outcome": "passed"},
+                {"name": "test_version[dsr02]", "outcome": "failed"},
+                {"name": "test_memory[dsr01]", "outcome": "error"},
+                {"name": "test_memory", "outcome": "passed"},
+            ],
+        }
+    )
+    assert summary.totals == {"passed": 2, "failed": 1, "total": 4}
+    assert summary.duts == {
+        "dsr01": {"PASS": 1, "FAIL": 0, "SKIP": 0, "ERROR": 1, "TOTAL": 2, "name": "dsr01"},
+        "dsr02": {"PASS": 0, "FAIL": 1, "SKIP": 0, "ERROR": 0, "TOTAL": 1, "name": "dsr02"},
+    }
+
+    client = report_client.ReportClient(DEFINITIONS)
+    for index, (test_result, skip) in enumerate([(True, False), (False, False), (False, True)]):
+        client._reconcile_results(
+            {
+                "test_suite": f"tests/test_suite_{index // 2}.py",
+                "name": "test_case",
+                "dut": f"dsr0{index}",
+                "test_result": test_result,
+                "skip": skip,
+            }
+        )
+    summary.add_results(client._results_datamodel)
+
+    assert summary.outcomes == {
+        "name": "all",
+        "total_tests": 3,
+        "total_pass": 1,
+        "total_fail": 1,
+        "total_skip": 1,
+    }
+    assert [
+        (suite["name"], suite["total_tests"], suite["total_pass"])
+        for suite in summary.suites.values()
+    ] == [("test_suite_0.py", 2, 1), ("test_suite_1.py", 1, 0)]
+    assert summary.test_cases[("test_suite_1.py", "test_case")]["total_skip"] == 1
+    assert [
+        (suite_name, dut["dut"], test_result)
+        for suite_name, _, dut, test_result in summary.results
+    ] == [
+        ("test_suite_0.py", "dsr00", "PASS"),
+        ("test_suite_0.py", "dsr01", "FAIL"),
+        ("test_suite_1.py", "dsr02", "SKIP"),
+    ]
@@ -0,0 +1,136 @@
+"""Test class for result_writer.py"""
+import pytest
+from vane import result_writer, tests_tools, yaml_io
+
+
+def test_result_writer_files(tmp_path):
+    """Validates that result files and evidence are written like export_yaml
+    and export_text write them"""
+    writer = result_writer.ResultWriter(str(tmp_path))
+    result = {"name": "test_version", "dut": "DSR01", "test_result": True}
+    text_file = tmp_path / "TEST RESULTS" / "TN1 test_version" / "TN1 DSR01 Verification.txt"
+
+    writer.write_result(str(tmp_path / "result-test_version-DSR01.yml"), result)
+    writer.write_text(str(text_file), {"1. DSR01# show version": "\n\nversion"}, "DSR01")
+    writer.write_text(str(text_file), {"1. DSR02# show version": "\n\nversion"}, "DSR01")
+    writer.close()
+
+    result_file = tmp_path / "result-test_version-DSR01.yml"
+    assert yaml_io.load(result_file.read_text(encoding="utf-8")) == result
+    evidence = text_file.read_text(encoding="utf-8")
+    assert evidence == (
+        result_writer.format_evidence({"1. DSR01# show version": "\n\nversion"}, "DSR01")
+        + result_writer.format_evidence({"1. DSR02# show version": "\n\nversion"}, "DSR01")
+    )
+    assert not writer.errors
+
+
+def test_result_writer_jsonl(tmp_path):
+    """Validates that results are appended to one results store which can
+    be read back"""
+    writer = result_writer.ResultWriter(str(tmp_path), store="jsonl", queue_size=2)
+
+    for dut_name in ("DSR01", "DSR02", "DSR03"):
+        writer.write_result(str(tmp_path / f"result-a-{dut_name}.yml"), {"dut": dut_name})
+    writer.flush()
+    with open(writer.store_file, "a", encoding="utf-8") as store:
+        store.write('{"dut": "DSR0')
+    writer.close()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["results-main.jsonl"]
+    assert result_writer.is_results_store("results-main.jsonl")
+    assert result_writer.read_results_store(writer.store_file) == [
+        {"dut": "DSR01"},
+        {"dut": "DSR02"},
+        {"dut": "DSR03"},
+    ]
+
+
+def test_result_writer_jsonl_non_json_values(tmp_path, mocker):
+    """Validates that results with values JSON cannot hold are written to
+    their yaml result file instead of being changed in the results store"""
+    mocker.patch("vane.vane_logging.logging.warning")
+    writer = result_writer.ResultWriter(str(tmp_path), store="jsonl")
+    results = [
+        {"dut": "DSR01", "ports": ("Ethernet1", "Ethernet2")},
+        {"dut": "DSR02", "vlans": {10, 20}},
+        {"dut": "DSR03", "counters": {1: 0}},
+    ]
+
+    writer.write_result(str(tmp_path / "result-a-DSR00.yml"), {"dut": "DSR00", "speed": 1.5})
+    for result in results:
+        writer.write_result(str(tmp_path / f"result-a-{result['dut']}.yml"), result)
+    writer.close()
+
+    assert result_writer.read_results_store(writer.store_file) == [{"dut": "DSR00", "speed": 1.5}]
+    for result in results:
+        result_file = tmp_path / f"result-a-{result['dut']}.yml"
+        assert result_file.exists()
+    with pytest.raises(TypeError):
+        result_writer.json.dumps({"dut": ("DSR01",)}, cls=result_writer.ResultEncoder)
+
+
+def test_result_writer_errors(tmp_path):
+    """Validates that failed writes are counted and invalid stores rejected"""
+    (tmp_path / "file").write_text("", encoding="utf-8")
+    writer = result_writer.ResultWriter(str(tmp_path))
+
+    writer.write_result(str(tmp_path / "file" / "result-a-DSR01.yml"), {"dut": "DSR01"})
+    writer.close()
+
+    assert writer.errors == 1
+    with pytest.raises(ValueError):
+        result_writer.ResultWriter(str(tmp_path), store="sqlite")
+
+
+def test_result_writer_bad_text(tmp_path):
+    """Validates that a write which fails with an error other than OSError
+    is counted and does not stop the writer thread"""
+    writer = result_writer.ResultWriter(str(tmp_path), queue_size=1)
+    text_file = tmp_path / "evidence.txt"
+
+    writer.write_text(str(tmp_path / "bad.txt"), {"show version": "\ud800"}, "DSR01")
+    for _ in range(3):
+        writer.write_text(str(text_file), {"show version": "version"}, "DSR01")
+    writer.flush()
+
+    assert writer.errors == 1
+    assert text_file.read_text(encoding="utf-8").count("show versionversion") == 3
+    writer.close()
+
+
+def test_result_writer_stopped_thread(tmp_path):
+    """Validates that writes are written in the calling thread once the
+    writer thread is stopped, instead of waiting on the queue"""
+    writer = result_writer.ResultWriter(str(tmp_path), queue_size=1)
+    writer.close()
+
+    for index in range(3):
+        writer.write_result(str(tmp_path / f"result-a-DSR0{index}.yml"), {"dut": f"DSR0{index}"})
+    writer.flush()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        f"result-a-DSR0{index}.yml" for index in range(3)
+    ]
+
+
+def test_get_result_writer(mocker, tmp_path):
+    """Validates that the background writer is only started when enabled"""
+    mocker.patch("vane.tests_tools.atexit.register")
+    mocker.patch("vane.config.result_writer", None)
+    parameters = {"results_dir": str(tmp_path)}
+    mocker.patch("vane.config.test_parameters", {"parameters": parameters})
+
+    assert tests_tools.get_result_writer() is None
+
+    parameters["results_store"] = "jsonl"
+    writer = tests_tools.get_result_writer()
+    assert writer.store == "jsonl"
+    assert tests_tools.get_result_writer() is writer
+
+    tests_tools.close_result_writer()
+    assert tests_tools.config.result_writer is None
+
+    parameters["result_writer"] = "later"
+    with pytest.raises(ValueError):
+        tests_tools.get_result_writer()
@@ -0,0 +1,51 @@
+"""Test class for show_cache.py"""
+from vane import show_cache
+
+
+def test_show_cache_store_and_load(tmp_path):
+    """Validates that cached outputs are found by dut, command, encoding and
+    EOS version"""
+    cache = show_cache.ShowCache(str(tmp_path), ttl=60)
+
+    cache.store(
+        "DSR01",
+        "4.30.1F",
+        {
+            "json": ([{"modelName": "vEOS"}], ["show version"]),
+            "text": ([{"output": "clock"}], ["show clock"]),
+        },
+    )
+
+    cached = cache.load(
+        "DSR01", "4.30.1F", {"json": ["show version", "show clock"], "text": ["show clock"]}
+    )
+    assert cached == {
+        "json": ([{"modelName": "vEOS"}], ["show version"]),
+        "text": ([{"output": "clock"}], ["show clock"]),
+    }
+
+    # another EOS version or dut does not match
+    assert cache.load("DSR01", "4.31.0F", {"json": ["show version"]}) == {"json": ([], [])}
+    assert cache.load("DSR02", "4.30.1F", {"json": ["show version"]}) == {"json": ([], [])}
+    # unknown EOS version is never cached
+    assert cache.load("DSR01", None, {"json": ["show version"]}) == {"json": ([], [])}
+
+
+def test_show_cache_ttl_and_refresh(tmp_path, mocker):
+    """Validates that outputs expire after the ttl and refresh ignores the cache"""
+    mocker.patch("vane.show_cache.time.time", return_value=1000)
+    cache = show_cache.ShowCache(str(tmp_path), ttl=60)
+    cache.store("DSR01", "4.30.1F", {"json": ([{"modelName": "vEOS"}], ["show version"])})
+
+    mocker.patch("vane.show_cache.time.time", return_value=1059)
+    assert cache.load("DSR01", "4.30.1F", {"json": ["show version"]})["json"][1] == [
+        "show version"
+    ]
+
+    refresh_cache = show_cache.ShowCache(str(tmp_path), ttl=60, refresh=True)
+    assert refresh_cache.load("DSR01", "4.30.1F", {"json": ["show version"]}) == {
+        "json": ([], [])
+    }
+
+    mocker.patch("vane.show_cache.time.time", return_value=1060)
+    assert cache.load("DSR01", "4.30.1F", {"json": ["show version"]}) == {"json": ([], [])}
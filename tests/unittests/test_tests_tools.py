@@ -1,8 +1,10 @@
 """Test class for tests_tools.py"""
+import copy
 import os
 import shutil
 import sys
 import json
+import threading
 from unittest.mock import call, MagicMock
 from icmplib.exceptions import SocketPermissionError
 from pyeapi.eapilib import ConnectionError  # pylint: disable=W0622
@@ -11,6 +13,7 @@ import pytest
 import yaml
 import pyeapi.eapilib
 import vane
+import vane.show_cache
 from tests.unittests.fixtures.test_steps import test_steps
 from vane import tests_tools
 
@@ -264,7 +267,7 @@ def test_init_duts_reachable(loginfo, logdebug, mocker):
     logdebug_calls = [
         call(f"Duts login info: {reachable_duts} and create 1 workers"),
         call("Passing the following show commands to workers: ['show version', 'show clock']"),
-        call("Future object generated successfully"),
+        call("Duts which failed to execute show commands: []"),
         call(f"Return duts data structure: {reachable_duts}"),
         call(f"Return unreachable duts data structure: {unreachable_duts}"),
     ]
@@ -304,7 +307,7 @@ def test_init_duts_unreachable_and_not_continue(loginfo, logdebug, logerr, mocke
     logdebug_calls = [
         call(f"Duts login info: {reachable_duts} and create 1 workers"),
         call("Passing the following show commands to workers: ['show version', 'show clock']"),
-        call("Future object generated successfully"),
+        call("Duts which failed to execute show commands: []"),
         call(f"Return duts data structure: {reachable_duts}"),
         call(f"Return unreachable duts data structure: {unreachable_duts}"),
     ]
@@ -316,6 +319,150 @@ def test_init_duts_unreachable_and_not_continue(loginfo, logdebug, logerr, mocke
     )
 
 
+def test_init_duts_replay(mocker, tmp_path):
+    """Validates that init_duts serves the duts from the capture when replaying,
+    without pinging or connecting to them
+    FIXTURE NEEDED: fixture_definitions.yaml, fixture_duts.yaml"""
+    test_parameters = read_yaml("tests/unittests/fixtures/fixture_definitions.yaml")
+    test_parameters["parameters"]["continue_when_unreachable"] = True
+    test_parameters["parameters"]["network_configs"] = None
+    test_duts = read_yaml("tests/unittests/fixtures/fixture_duts.yaml")
+    dut_name = test_duts["duts"][0]["name"]
+    capture = {
+        "attributes": {"platform": "vEOS-lab", "eos_version": "4.30.1F"},
+        "calls": {},
+        "outputs": {
+            "json|show version": {"modelName": "vEOS-lab"},
+            "text|show version": {"output": "Arista vEOS-lab"},
+        },
+    }
+    (tmp_path / f"{dut_name}.json").write_text(json.dumps(capture), encoding="utf-8")
+
+    mocker.patch("vane.config.replay_dir", str(tmp_path))
+    mocker.patch("vane.config.test_parameters", test_parameters)
+    mocker.patch.dict(vane.device_interface.Capture._captures, clear=True)
+    ping = mocker.patch("vane.tests_tools.check_duts_reachability")
+    mocker.patch("vane.tests_tools.return_interfaces", return_value=[])
+
+    reachable_duts, unreachable_duts = tests_tools.init_duts(
+        ["show version"], test_parameters, test_duts
+    )
+
+    ping.assert_not_called()
+    assert [dut["name"] for dut in reachable_duts] == [dut_name]
+    assert isinstance(reachable_duts[0]["connection"], vane.device_interface.ReplayConn)
+    assert reachable_duts[0]["output"]["show version"] == {
+        "json": {"modelName": "vEOS-lab"},
+        "text": "Arista vEOS-lab",
+    }
+    # duts without a capture are unreachable
+    assert len(unreachable_duts) == len(test_duts["duts"]) - 1
+
+
+def test_init_duts_worker_failures(mocker, capsys):
+    """Validates that init_duts surfaces exceptions raised in dut_worker and moves
+    the failed duts to the unreachable duts"""
+    show_cmds = ["show version"]
+    test_parameters = read_yaml("tests/unittests/fixtures/fixture_definitions.yaml")
+    test_duts = read_yaml("tests/unittests/fixtures/fixture_duts.yaml")
+    duts = test_duts["duts"]
+
+    def worker(dut, show_cmds, reachable_duts, show_cmd_encodings=None):
+        if dut["name"] == "DCBBW1":
+            raise ValueError("device rejected the commands")
+
+    mocker.patch("vane.tests_tools.check_duts_reachability", return_value=(True, duts, []))
+    mocker.patch("vane.tests_tools.login_duts", return_value=(duts, []))
+    mocker.patch("vane.tests_tools.dut_worker", side_effect=worker)
+    logerr = mocker.patch("vane.vane_logging.logging.error")
+
+    reachable_duts, unreachable_duts = tests_tools.init_duts(show_cmds, test_parameters, test_duts)
+
+    assert [dut["name"] for dut in reachable_duts] == ["DSR01"]
+    assert [dut["name"] for dut in unreachable_duts] == ["DCBBW1"]
+    logerr.assert_called_with(
+        "Error executing show commands on DCBBW1: device rejected the commands"
+    )
+    assert "['DCBBW1']" in capsys.readouterr().out
+
+
+def test_run_dut_workers_bounded_and_timeout(mocker):
+    """Validates that run_dut_workers keeps at most workers duts in flight and
+    gives up on a dut which exceeds the timeout without holding back the others"""
+    duts = [{"name": f"DUT{index}"} for index in range(6)]
+    release = threading.Event()
+    lock = threading.Lock()
+    active = {"now": 0, "max": 0}
+    finished = []
+
+    def worker(dut, show_cmds, reachable_duts, show_cmd_encodings=None):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        if dut["name"] == "DUT0":
+            release.wait(10)
+        with lock:
+            active["now"] -= 1
+            finished.append(dut["name"])
+
+    mocker.patch("vane.tests_tools.dut_worker", side_effect=worker)
+    mocker.patch("vane.vane_logging.logging.error")
+
+    failed_duts = tests_tools.run_dut_workers(duts, [], workers=2, timeout=0.5)
+    release.set()
+
+    assert failed_duts == [duts[0]]
+    assert active["max"] <= 2
+    assert sorted(finished) == ["DUT1", "DUT2", "DUT3", "DUT4", "DUT5"]
+
+
+def test_run_dut_workers_merge_completed(mocker):
+    """Validates that run_dut_workers merges the output of completed workers into
+    their dut, leaves the dut of a timed out worker untouched and bounds the reads
+    of the dut connection by the timeout while the worker runs"""
+    conns = [mocker.MagicMock() for _ in range(2)]
+    for conn in conns:
+        conn.set_timeout.return_value = 60
+    duts = [{"name": f"DUT{index}", "connection": conns[index]} for index in range(2)]
+    release = threading.Event()
+
+    def worker(dut, show_cmds, reachable_duts, show_cmd_encodings=None):
+        if dut["name"] == "DUT0":
+            release.wait(10)
+        dut["output"] = {"show version": {"json": {}, "text": dut["name"]}}
+
+    mocker.patch("vane.tests_tools.dut_worker", side_effect=worker)
+    mocker.patch("vane.vane_logging.logging.error")
+
+    failed_duts = tests_tools.run_dut_workers(duts, [], workers=2, timeout=0.5)
+    release.set()
+
+    assert failed_duts == [duts[0]]
+    assert "output" not in duts[0]
+    assert duts[1]["output"] == {"show version": {"json": {}, "text": "DUT1"}}
+    assert conns[1].set_timeout.call_args_list == [mocker.call(0.5), mocker.call(60)]
+
+
+def test_get_cache_transport(mocker):
+    """Validates that get_cache_transport defaults to threads, rejects unknown
+    transports and falls back to threads for ssh connections"""
+    mocker.patch("vane.vane_logging.logging.warning")
+
+    assert tests_tools.get_cache_transport({"parameters": {}}) == "threads"
+    assert (
+        tests_tools.get_cache_transport({"parameters": {"cache_transport": "async_eapi"}})
+        == "async_eapi"
+    )
+    assert (
+        tests_tools.get_cache_transport(
+            {"parameters": {"cache_transport": "async_eapi", "eos_conn": "ssh"}}
+        )
+        == "threads"
+    )
+    with pytest.raises(ValueError):
+        tests_tools.get_cache_transport({"parameters": {"cache_transport": "bogus"}})
+
+
 def test_login_duts_eapi(loginfo, logdebug, mocker):
     """Validates the functionality of login_duts
     FIXTURE NEEDED: fixture_definitions.yaml, fixture_duts.yaml"""
@@ -356,21 +503,25 @@ def test_login_duts_eapi(loginfo, logdebug, mocker):
 
     # assert logs
 
+    assert loginfo.call_args_list[0] == call(
+        "Using eapi/ssh to connect to Arista switches for testing"
+    )
+    assert loginfo.call_args_list[-1] == call(f"Returning reachable_duts: {reachable_duts}")
+
+    # duts are logged in to by parallel workers, in any order
     loginfo_calls = [
-        call("Using eapi/ssh to connect to Arista switches for testing"),
         call("Connecting to switch: DSR01"),
         call("Connecting to switch: DCBBW1"),
-        call(f"Returning reachable_duts: {reachable_duts}"),
     ]
 
-    loginfo.assert_has_calls(loginfo_calls, any_order=False)
+    loginfo.assert_has_calls(loginfo_calls, any_order=True)
 
     logdebug_calls = [
         call(f"Connecting to switch: DSR01 using parameters: {duts[0]}"),
         call(f"Connecting to switch: DCBBW1 using parameters: {duts[1]}"),
     ]
 
-    logdebug.assert_has_calls(logdebug_calls, any_order=False)
+    logdebug.assert_has_calls(logdebug_calls, any_order=True)
 
     # assert values when neither pyeapi nor ssh connection
 
@@ -427,8 +578,10 @@ def test_login_duts_ssh(loginfo, logdebug, mocker):
     mocker_object = mocker.patch("vane.device_interface.NetmikoConn")
     netmiko_instance = mocker_object.return_value
 
+    # duts log in concurrently, so authenticate based on the dut instead of
+    # the order of the calls
     mocker_authentication_object = mocker.patch("vane.tests_tools.authenticate_and_setup_conn")
-    mocker_authentication_object.side_effect = [True, False]
+    mocker_authentication_object.side_effect = lambda dut, conn: dut["name"] == "DSR01"
 
     reachable_duts, unreachable_duts = tests_tools.login_duts(test_parameters, duts)
 
@@ -450,21 +603,64 @@ def test_login_duts_ssh(loginfo, logdebug, mocker):
     assert unreachable_duts[0] == duts[1]
     # assert logs
 
+    assert loginfo.call_args_list[0] == call(
+        "Using eapi/ssh to connect to Arista switches for testing"
+    )
+    assert loginfo.call_args_list[-1] == call(f"Returning reachable_duts: {reachable_duts}")
+
+    # duts are logged in to by parallel workers, in any order
     loginfo_calls = [
-        call("Using eapi/ssh to connect to Arista switches for testing"),
         call("Connecting to switch: DSR01"),
         call("Connecting to switch: DCBBW1"),
-        call(f"Returning reachable_duts: {reachable_duts}"),
     ]
 
-    loginfo.assert_has_calls(loginfo_calls, any_order=False)
+    loginfo.assert_has_calls(loginfo_calls, any_order=True)
 
     logdebug_calls = [
         call(f"Connecting to switch: DSR01 using parameters: {duts[0]}"),
         call(f"Connecting to switch: DCBBW1 using parameters: {duts[1]}"),
     ]
 
-    logdebug.assert_has_calls(logdebug_calls, any_order=False)
+    logdebug.assert_has_calls(logdebug_calls, any_order=True)
+
+
+def test_login_duts_parallel_keeps_order(mocker):
+    """Validates that login_duts bounds its workers with login_workers and
+    returns reachable and unreachable duts in the order of the duts file"""
+
+    test_parameters = read_yaml("tests/unittests/fixtures/fixture_definitions.yaml")
+    test_parameters["parameters"]["login_workers"] = 3
+    test_parameters["parameters"]["network_configs"] = None
+    duts = [
+        {
+            "name": f"DUT{index}",
+            "mgmt_ip": f"10.0.0.{index}",
+            "username": "admin",
+            "password": "admin",
+            "transport": "https",
+        }
+        for index in range(1, 9)
+    ]
+
+    mocker.patch("vane.device_interface.PyeapiConn")
+    mocker.patch(
+        "vane.tests_tools.authenticate_and_setup_conn",
+        side_effect=lambda dut, conn: dut["name"] not in ("DUT3", "DUT6"),
+    )
+    executor = mocker.spy(tests_tools.concurrent.futures, "ThreadPoolExecutor")
+
+    reachable_duts, unreachable_duts = tests_tools.login_duts(test_parameters, duts)
+
+    executor.assert_called_once_with(max_workers=3)
+    assert [dut["name"] for dut in reachable_duts] == [
+        "DUT1",
+        "DUT2",
+        "DUT4",
+        "DUT5",
+        "DUT7",
+        "DUT8",
+    ]
+    assert unreachable_duts == [duts[2], duts[5]]
 
 
 def test_authenticate_and_setup_conn_netmiko_valid(mocker, loginfo):
@@ -595,8 +791,11 @@ def test_check_duts_reachability_when_unreachable(mocker, loginfo):
     mocker_object1 = MagicMock()
     mocker_object2 = MagicMock()
 
+    # duts are pinged concurrently, so return the host based on its address
+    # instead of the order of the calls
+    hosts = {"10.255.70.132": mocker_object1, "10.255.70.133": mocker_object2}
     mocker_object = mocker.patch("vane.tests_tools.ping")
-    mocker_object.side_effect = [mocker_object1, mocker_object2]
+    mocker_object.side_effect = lambda address, **kwargs: hosts[address]
 
     mocker_object1.is_alive = True
     mocker_object2.is_alive = False
@@ -702,6 +901,38 @@ def test_check_duts_reachability_when_exception(mocker, loginfo, logerr):
     )
 
 
+def test_check_duts_reachability_ping_stats_and_workers(mocker):
+    """Validates that check_duts_reachability records ping stats on each dut,
+    bounds the worker pool and keeps the order of the duts"""
+
+    def fake_ping(address, **kwargs):
+        host = MagicMock()
+        host.is_alive = not address.endswith(".2")
+        host.avg_rtt = 1.5
+        host.packet_loss = 0.0 if host.is_alive else 1.0
+        return host
+
+    mocker.patch("vane.tests_tools.ping", side_effect=fake_ping)
+    executor = mocker.spy(tests_tools.concurrent.futures, "ThreadPoolExecutor")
+
+    test_duts = {
+        "duts": [{"mgmt_ip": f"10.0.0.{index}", "name": f"DUT{index}"} for index in range(1, 11)]
+    }
+
+    reachability, reachable_duts, unreachable_duts = tests_tools.check_duts_reachability(
+        test_duts, workers=4
+    )
+
+    executor.assert_called_once_with(max_workers=4)
+    assert not reachability
+    assert [dut["name"] for dut in unreachable_duts] == ["DUT2"]
+    assert [dut["name"] for dut in reachable_duts] == [
+        f"DUT{index}" for index in range(1, 11) if index != 2
+    ]
+    assert reachable_duts[0]["ping_stats"] == {"avg_rtt": 1.5, "packet_loss": 0.0}
+    assert unreachable_duts[0]["ping_stats"] == {"avg_rtt": 1.5, "packet_loss": 1.0}
+
+
 def test_send_cmds_json(loginfo, logdebug, mocker):
     """Validates the functionality of send_cmds method"""
 
@@ -768,9 +999,10 @@ def test_send_cmds_exception(logdebug, logerr, mocker):
         show_cmds, vane.device_interface.PyeapiConn, "text"
     )
 
-    # asserting when run_commands raises an exception
-    assert show_cmds_output == ""
+    # asserting when run_commands raises an exception, no command is left to send
+    assert show_cmds_output == []
     assert show_cmd_list_output == []
+    assert mocker_object.call_count == 1
     logdebug_calls = [
         call("New show_cmds: []"),
     ]
@@ -779,6 +1011,129 @@ def test_send_cmds_exception(logdebug, logerr, mocker):
     logerr.assert_called_with("Error running all cmds: show version is erring")
 
 
+class FakeEapiConn:
+    """eAPI connection which fails on the commands in unsupported like EOS does"""
+
+    def __init__(self, unsupported, with_output=True, platform=None):
+        self.unsupported = unsupported
+        self.with_output = with_output
+        self.platform = platform
+        self.batches = []
+
+    def run_commands(self, cmds, encoding="json"):
+        """Run the commands, stopping at the first unsupported one"""
+        self.batches.append(list(cmds))
+        output = [{"enable": True}]
+        for cmd in cmds:
+            if cmd in self.unsupported:
+                output.append({"errors": ["Invalid input"]})
+                raise pyeapi.eapilib.CommandError(
+                    1002,
+                    "CLI command failed",
+                    command_error="Invalid input",
+                    output=output if self.with_output else None,
+                )
+            if encoding == "text":
+                output.append({"output": f"{cmd} text"})
+            else:
+                output.append({"cmd": cmd, "encoding": encoding})
+            if cmd == "show version" and encoding == "json":
+                output[-1]["modelName"] = "vEOS-lab"
+                output[-1]["version"] = "4.30.1F"
+        return output[1:]
+
+
+@pytest.fixture
+def unsupported_cmds(mocker):
+    """Fixture to start with no remembered unsupported commands"""
+    return mocker.patch.dict(tests_tools.unsupported_cmds, clear=True)
+
+
+def test_send_cmds_isolates_failures_from_error_output(unsupported_cmds):
+    """Validates that send_cmds keeps the outputs before a failed command and
+    only sends the commands after it again"""
+    show_cmds = [f"show cmd{index}" for index in range(6)]
+    conn = FakeEapiConn({"show cmd1", "show cmd4"})
+
+    show_cmd_list, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "json")
+
+    assert succeeded_cmds == ["show cmd0", "show cmd2", "show cmd3", "show cmd5"]
+    assert show_cmd_list == [{"cmd": cmd, "encoding": "json"} for cmd in succeeded_cmds]
+    assert conn.batches == [
+        show_cmds,
+        ["show cmd2", "show cmd3", "show cmd4", "show cmd5"],
+        ["show cmd5"],
+    ]
+    # no platform, nothing is remembered
+    assert not unsupported_cmds
+
+
+def test_send_cmds_bisects_unknown_failures(unsupported_cmds):
+    """Validates that send_cmds bisects the batch when the error tells neither
+    the index nor the name of the failed command"""
+    show_cmds = [f"show cmd{index}" for index in range(8)]
+    conn = FakeEapiConn({"show cmd5"}, with_output=False)
+
+    show_cmd_list, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "text")
+
+    assert succeeded_cmds == [cmd for cmd in show_cmds if cmd != "show cmd5"]
+    assert show_cmd_list == [{"output": f"{cmd} text"} for cmd in succeeded_cmds]
+    assert len(conn.batches) == 7
+
+
+def test_send_cmds_round_trip_cap_and_errors(mocker, unsupported_cmds):
+    """Validates that send_cmds stops after MAX_SEND_CMDS_ROUND_TRIPS and raises
+    errors which are not command failures"""
+    mocker.patch("vane.tests_tools.MAX_SEND_CMDS_ROUND_TRIPS", 2)
+    show_cmds = [f"show cmd{index}" for index in range(4)]
+    conn = FakeEapiConn({"show cmd0", "show cmd1", "show cmd2"})
+
+    show_cmd_list, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "json")
+
+    assert show_cmd_list == []
+    assert succeeded_cmds == []
+    assert len(conn.batches) == 2
+
+    conn = MagicMock()
+    conn.run_commands.side_effect = ConnectionError("DSR01", "connection refused")
+    with pytest.raises(ConnectionError):
+        tests_tools.send_cmds(show_cmds, conn, "json")
+
+
+def test_send_cmds_remembers_unsupported_cmds(unsupported_cmds, mocker):
+    """Validates that commands unsupported on a platform and EOS version are
+    skipped on other duts of the same platform and EOS version only"""
+    show_cmds = ["show version", "show cmd1", "show cmd2"]
+    logdebug = mocker.patch("vane.vane_logging.logging.debug")
+
+    conn = FakeEapiConn({"show cmd1"})
+    show_cmd_list, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "json")
+
+    assert succeeded_cmds == ["show version", "show cmd2"]
+    assert show_cmd_list[0]["modelName"] == "vEOS-lab"
+    assert unsupported_cmds == {("vEOS-lab", "4.30.1F", "json"): {"show cmd1"}}
+
+    conn = FakeEapiConn({"show cmd1"}, platform="vEOS-lab")
+    _, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "json", conn.platform, "4.30.1F")
+
+    assert succeeded_cmds == ["show version", "show cmd2"]
+    assert conn.batches == [["show version", "show cmd2"]]
+    logdebug.assert_any_call(
+        "Skipping show cmd1, it failed as unsupported on another vEOS-lab dut running "
+        "EOS 4.30.1F with json encoding, so its output is not collected"
+    )
+
+    _, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "text", conn.platform, "4.30.1F")
+    assert succeeded_cmds == ["show version", "show cmd2"]
+    # unsupported json commands are still tried with text encoding
+    assert conn.batches[-2:] == [show_cmds, ["show cmd2"]]
+
+    # a dut of the same platform running another EOS version may support the command
+    conn = FakeEapiConn(set(), platform="vEOS-lab")
+    _, succeeded_cmds = tests_tools.send_cmds(show_cmds, conn, "json", conn.platform, "4.31.0F")
+    assert succeeded_cmds == show_cmds
+
+
 error = ["show lldp neighbors has an error in it", "show lldp neighbors status has an error in it"]
 show_cmds = [
     ["show version", "show clock", "show lldp neighbors", "show lldp neighbors status"],
@@ -1072,6 +1427,111 @@ def test_verify_veos_fail(loginfo, logdebug):
     assert not actual_output
 
 
+def test_dut_worker_show_cmd_encodings(mocker):
+    """Validates that dut_worker only fetches the encodings of each show command's
+    policy and fetches lazy text output once, on first read"""
+    conn = MagicMock()
+
+    def run_commands(cmds, encoding="json"):
+        if encoding == "json":
+            return [{"cmd": cmd} for cmd in cmds]
+        return [{"output": f"{cmd} text"} for cmd in cmds]
+
+    conn.run_commands.side_effect = run_commands
+    dut = {"name": "DSR01", "connection": conn}
+    show_cmds = ["show version", "show clock", "show lldp neighbors"]
+    show_cmd_encodings = {"show version": "lazy", "show clock": "text"}
+    mocker.patch("vane.tests_tools.return_interfaces", return_value=[])
+
+    tests_tools.dut_worker(dut, show_cmds, [], show_cmd_encodings)
+
+    assert conn.run_commands.call_args_list == [
+        call(["show version", "show lldp neighbors"]),
+        call(["show clock", "show lldp neighbors"], encoding="text"),
+    ]
+    assert dut["output"]["show clock"] == {"json": "", "text": "show clock text"}
+    assert dut["output"]["show lldp neighbors"]["text"] == "show lldp neighbors text"
+
+    lazy_output = dut["output"]["show version"]
+    assert lazy_output["json"] == {"cmd": "show version"}
+    assert "text" in lazy_output
+    assert list(lazy_output.keys()) == ["json", "text"]
+    assert conn.run_commands.call_count == 2
+
+    threads = [threading.Thread(target=lambda: lazy_output["text"]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert lazy_output.get("text") == "show version text"
+    assert conn.run_commands.call_count == 3
+    assert conn.run_commands.call_args == call(["show version"], encoding="text")
+    assert conn.lock.__enter__.call_count == 1
+    assert dict(lazy_output.items()) == {
+        "json": {"cmd": "show version"},
+        "text": "show version text",
+    }
+    output_copy = copy.deepcopy(lazy_output)
+    assert output_copy == {"json": {"cmd": "show version"}, "text": "show version text"}
+    assert not isinstance(output_copy, tests_tools.LazyShowOutput)
+
+
+def test_lazy_show_text_batched(mocker):
+    """Validates that deferred text outputs held as evidence are not fetched
+    until resolved, and that the deferred outputs of a dut are fetched in one
+    request"""
+    conn = MagicMock()
+    conn.run_commands.side_effect = lambda cmds, encoding="json": (
+        [{"cmd": cmd} for cmd in cmds]
+        if encoding == "json"
+        else [{"output": f"{cmd} text"} for cmd in cmds]
+    )
+    dut = {"name": "DSR01", "connection": conn}
+    show_cmds = ["show version", "show clock", "show lldp neighbors"]
+    show_cmd_encodings = {"show version": "lazy", "show clock": "lazy"}
+    mocker.patch("vane.tests_tools.return_interfaces", return_value=[])
+
+    tests_tools.dut_worker(dut, show_cmds, [], show_cmd_encodings)
+    texts = [tests_tools.show_text(dut["output"][show_cmd]) for show_cmd in show_cmds]
+
+    assert isinstance(texts[0], tests_tools.DeferredShowText)
+    assert texts[2] == "show lldp neighbors text"
+    assert conn.run_commands.call_count == 2
+
+    assert [tests_tools.resolve_show_text(text) for text in texts] == [
+        f"{show_cmd} text" for show_cmd in show_cmds
+    ]
+    assert conn.run_commands.call_count == 3
+    assert conn.run_commands.call_args == call(["show version", "show clock"], encoding="text")
+
+
+def test_dut_worker_show_cache(mocker, tmp_path):
+    """Validates that dut_worker only collects the show commands which are not
+    in the on-disk show output cache and caches the ones it collects"""
+    conn = FakeEapiConn(set())
+    conn.eos_version = "4.30.1F"
+    dut = {"name": "DSR01", "connection": conn}
+    show_cmds = ["show version", "show clock"]
+    mocker.patch("vane.tests_tools.return_interfaces", return_value=[])
+    mocker.patch("vane.config.show_cache", vane.show_cache.ShowCache(str(tmp_path), ttl=60))
+    vane.config.show_cache.store(
+        "DSR01", "4.30.1F", {"text": ([{"output": "cached clock"}], ["show clock"])}
+    )
+
+    tests_tools.dut_worker(dut, show_cmds, [])
+
+    assert conn.batches == [show_cmds, ["show version"]]
+    assert dut["output"]["show clock"]["text"] == "cached clock"
+    assert dut["output"]["show version"]["text"] == "show version text"
+
+    conn.batches = []
+    tests_tools.dut_worker(dut, show_cmds, [])
+
+    assert not conn.batches
+    assert dut["output"]["show version"]["json"]["modelName"] == "vEOS-lab"
+
+
 def test_return_show_cmds(loginfo, logdebug):
     """Validates if correct show commands get returned given test suites
     FIXTURES NEEDED: fixture_test_parameters.yaml"""
@@ -1130,6 +1590,37 @@ def test_return_show_cmds(loginfo, logdebug):
     logdebug.assert_has_calls(logdebug_calls, any_order=False)
 
 
+def test_return_show_cmd_encodings():
+    """Validates that the show_cmd_encoding of test cases is merged per show command
+    FIXTURES NEEDED: fixture_test_parameters.yaml"""
+    test_parameters = read_yaml("tests/unittests/fixtures/fixture_test_parameters.yaml")
+    test_cases = test_parameters["test_suites"][0]["testcases"]
+    test_cases[0]["show_cmd_encoding"] = "json"
+    test_cases[1]["show_cmd_encoding"] = "text"
+    test_cases[2]["show_cmd_encoding"] = "lazy"
+    test_cases[3]["show_cmd_encoding"] = "json"
+
+    show_cmd_encodings = tests_tools.return_show_cmd_encodings(test_parameters, "lazy")
+
+    assert show_cmd_encodings == {
+        "show version": "lazy",
+        "show clock": "lazy",
+        "show lldp neighbors": "json",
+        "show aaa counters": "json",
+        "show users detail": "text",
+        "show aaa methods all": "lazy",
+    }
+
+    test_cases[3]["show_cmd_encoding"] = "text"
+    show_cmd_encodings = tests_tools.return_show_cmd_encodings(test_parameters)
+    assert show_cmd_encodings["show aaa methods all"] == "both"
+    assert show_cmd_encodings["show version"] == "both"
+
+    test_cases[3]["show_cmd_encoding"] = "xml"
+    with pytest.raises(ValueError):
+        tests_tools.return_show_cmd_encodings(test_parameters)
+
+
 def test_return_test_defs(logdebug):
     """Validates if test definitions are being generated correctly
     Creates a temporary reports/test_definition and deletes it before exiting
@@ -1171,6 +1662,47 @@ def test_return_test_defs(logdebug):
     shutil.rmtree("reports", ignore_errors=True)
 
 
+def test_return_test_defs_discovery_index(mocker, tmp_path):
+    """Validates that unchanged test definition files are served from the
+    discovery index and changed ones are parsed again"""
+    test_dir = tmp_path / "tests"
+    test_dir.mkdir()
+    definition = test_dir / "test_definition.yaml"
+    definition.write_text("- name: test_a.py\n  testcases:\n  - name: test_a\n")
+    test_parameters = {
+        "parameters": {
+            "report_dir": str(tmp_path / "reports"),
+            "test_dirs": [str(test_dir)],
+            "test_definitions": "test_definition.yaml",
+        }
+    }
+    import_yaml = mocker.spy(tests_tools, "import_yaml")
+
+    first = tests_tools.return_test_defs(test_parameters)
+    second = tests_tools.return_test_defs(test_parameters)
+
+    assert first == second
+    assert second["test_suites"][0]["dir_path"] == str(test_dir)
+    assert import_yaml.call_count == 1
+
+    definition.write_text("- name: test_b.py\n  testcases:\n  - name: test_b\n")
+    os.utime(definition, ns=(0, 0))
+    third = tests_tools.return_test_defs(test_parameters)
+
+    assert third["test_suites"][0]["name"] == "test_b.py"
+    assert import_yaml.call_count == 2
+
+    index_file = tmp_path / "reports" / ".test_definitions_index.yaml"
+    index = yaml.safe_load(index_file.read_text())
+    assert index["files"][str(definition)]["size"] == definition.stat().st_size
+
+    # the index is data only, objects in it are not constructed
+    marker = tmp_path / "constructed"
+    index_file.write_text(f"!!python/object/apply:os.system ['touch {marker}']\n")
+    assert not tests_tools.load_discovery_index(str(index_file))
+    assert not marker.exists()
+
+
 def test_export_yaml():
     """Validates exporting of data into a yaml file"""
     yaml_file = "export_file.yaml"
@@ -1278,8 +1810,10 @@ OUTPUT = (
 def create_test_ops_instance(mocker):
     """Utility function to create tops object needed for testing TestOps methods"""
 
-    # creating test ops object and mocking inspect_stack call
-    mocker.patch("inspect.stack", return_value=["", ["", "", "", "test_memory_utilization_on_"]])
+    # creating test ops object and mocking the test case name lookup
+    mocker.patch(
+        "vane.tests_tools.return_caller_name", return_value="test_memory_utilization_on_"
+    )
 
     tops = tests_tools.TestOps(TEST_DEFINITION, TEST_SUITE, DUT)
 
@@ -1493,15 +2027,6 @@ def test_test_ops_get_parameters(loginfo, logdebug, mocker):
 
     logdebug_calls = [
         call("Return testcases for Test Suite: test_memory.py"),
-        call(
-            "Suite_parameters: [{'name': 'test_memory.py', 'testcases': "
-            "[{'name': 'test_memory_utilization_on_', "
-            "'description': 'Verify memory is not exceeding high utilization', "
-            "'show_cmd': 'show version', 'expected_output': 80, 'report_style': 'modern', "
-            "'test_criteria': 'Verify memory is not exceeding high utilization', "
-            "'criteria': 'names', 'filter': ['DSR01', 'DCBBW1'], 'comment': None, "
-            "'result': True}]}]"
-        ),
         call(
             "Case_parameters: {'name': 'test_memory_utilization_on_', "
             "'description': 'Verify memory is not exceeding high utilization', "
@@ -1514,6 +2039,35 @@ def test_test_ops_get_parameters(loginfo, logdebug, mocker):
     logdebug.assert_has_calls(logdebug_calls, any_order=False)
 
 
+def test_return_test_case_index():
+    """Validates that test cases are indexed once per test definitions and
+    that TestOps parameters are copies of the indexed test case"""
+    test_defs = tests_tools.TestDefinitions(TEST_DEFINITION)
+    index = tests_tools.return_test_case_index(test_defs)
+
+    assert tests_tools.return_test_case_index(test_defs) is index
+    assert test_defs.test_case_index is index
+    test_case = index[(TEST_SUITE, "test_memory_utilization_on_")]
+    assert test_case is TEST_DEFINITION["test_suites"][0]["testcases"][0]
+    # plain dicts are indexed on each call, nothing is kept for them
+    assert tests_tools.return_test_case_index(TEST_DEFINITION) == index
+
+    tops = tests_tools.TestOps.__new__(tests_tools.TestOps)
+    parameters = tops._get_parameters(test_defs, TEST_SUITE, "test_memory_utilization_on_")
+    parameters["filter"].append("DSR02")
+    assert test_case["filter"] == ["DSR01", "DCBBW1"]
+    assert "test_suite" not in test_case
+
+
+def test_return_caller_name():
+    """Validates the name of the function calling the caller"""
+
+    def helper():
+        return tests_tools.return_caller_name()
+
+    assert helper() == "test_return_caller_name"
+
+
 def test_test_ops_generate_report(logdebug, mocker):
     """Validates functionality of generate_report method"""
     mocker.patch(
@@ -1597,6 +2151,78 @@ def test_test_ops_html_report(mocker, capsys):
     assert show_output in captured_output.out
 
 
+def test_test_ops_html_report_evidence_reference(mocker, capsys, tmp_path):
+    """Validates that long evidence is stored once and printed by reference"""
+    mocker.patch(
+        "vane.tests_tools.TestOps._get_parameters",
+        return_value=read_yaml("tests/unittests/fixtures/fixture_testops_test_parameters.yaml"),
+    )
+    mocker.patch("vane.tests_tools.TestOps._verify_show_cmd", return_value=True)
+    tops = create_test_ops_instance(mocker)
+    mocker.patch("vane.config.evidence_store", None)
+    mocker.patch(
+        "vane.config.test_parameters",
+        {"parameters": {"evidence_output": "reference", "report_dir": str(tmp_path)}},
+    )
+    show_text = "Arista vEOS\n" * 100
+    tops._show_cmd_txts = {tops.dut_name: [show_text, show_text]}
+
+    tops._html_report()
+
+    captured_output = capsys.readouterr()
+    store = tests_tools.config.evidence_store
+    reference = store.put(show_text)
+    assert store.store_dir == str(tmp_path / "evidence")
+    assert store.get(reference) == show_text
+    assert show_text not in captured_output.out
+    assert f"1.2. DCBBW1# show version\n\n{reference} in {store.path(reference)}" in (
+        captured_output.out
+    )
+    assert "\nEXPECTED OUTPUT:\n================\n80\n" in captured_output.out
+    assert tests_tools.pop_evidence_links() == [
+        ("DCBBW1 1.1. DCBBW1# show version", store.path(reference)),
+        ("DCBBW1 1.2. DCBBW1# show version", store.path(reference)),
+    ]
+    assert not tests_tools.pop_evidence_links()
+
+
+def test_test_ops_generate_report_evidence_reference(mocker, tmp_path):
+    """Validates that result and evidence files hold references to the
+    evidence store instead of copies of long evidence"""
+    mocker.patch(
+        "vane.tests_tools.TestOps._get_parameters",
+        return_value=read_yaml("tests/unittests/fixtures/fixture_testops_test_parameters.yaml"),
+    )
+    mocker.patch("vane.tests_tools.TestOps._verify_show_cmd", return_value=True)
+    tops = create_test_ops_instance(mocker)
+    mocker.patch("vane.config.evidence_store", None)
+    mocker.patch(
+        "vane.config.test_parameters",
+        {"parameters": {"evidence_output": "reference", "report_dir": str(tmp_path)}},
+    )
+    mocker.patch("vane.tests_tools.TestOps._html_report")
+    export_yaml = mocker.patch("vane.tests_tools.export_yaml")
+    export_text = mocker.patch("vane.tests_tools.export_text")
+    show_text = "Arista vEOS\n" * 100
+    tops._show_cmd_txts = {tops.dut_name: [show_text, "short"]}
+    tops.show_cmd_txt = show_text
+
+    tops.generate_report(tops.dut_name)
+
+    store = tests_tools.config.evidence_store
+    reference = store.put(show_text)
+    result = export_yaml.call_args[0][1]
+    assert result["show_cmd_txts"] == {tops.dut_name: [reference, "short"]}
+    assert result["show_cmd"] == f"show version:\n\n{reference}"
+    assert tops._show_cmd_txts == {tops.dut_name: [show_text, "short"]}
+    assert store.resolve(result)["show_cmd_txts"] == tops._show_cmd_txts
+    text_data = export_text.call_args[0][1]
+    assert list(text_data.values()) == [
+        f"\n\n{reference} in {store.path(reference)}",
+        "\n\nshort",
+    ]
+
+
 def test_test_ops_parse_test_steps(loginfo, mocker):
     """Validates verification of the parse_test_steps method
     FIXTURE NEEDED: tests/unittests/fixtures/test_steps/test_steps.py"""
@@ -1620,6 +2246,63 @@ def test_test_ops_parse_test_steps(loginfo, mocker):
     )
 
 
+def test_return_test_steps(mocker):
+    """Validates that the test steps of a function are parsed once and shared
+    by its bound methods
+    FIXTURE NEEDED: tests/unittests/fixtures/test_steps/test_steps.py"""
+    mocker.patch.dict(tests_tools.test_steps_cache, clear=True)
+    source_mock = mocker.patch(
+        "vane.tests_tools.inspect.getsourcelines", wraps=tests_tools.inspect.getsourcelines
+    )
+    test_class = test_steps.TestSyslogFunctionality
+
+    steps = tests_tools.return_test_steps(test_class.test_syslog_functionality_on_server)
+
+    assert len(steps) == 3
+    assert steps[0] == " Creating Testops class object and initializing the variable "
+    assert tests_tools.return_test_steps(test_class().test_syslog_functionality_on_server) is steps
+    assert source_mock.call_count == 1
+
+
+def test_show_clock_output(mocker):
+    """Validates that show clock runs on every call unless derived, and then
+    runs once per dut and later outputs are derived from the clock offset of
+    the dut and labelled as derived"""
+    monotonic = mocker.patch("vane.tests_tools.time.monotonic", return_value=100.0)
+    conn = mocker.Mock()
+    conn.enable.return_value = [
+        {
+            "command": "show clock",
+            "result": {"output": "Thu Jun  1 14:03:59 2023\nTimezone: UTC\nClock source: local\n"},
+            "encoding": "text",
+        }
+    ]
+    dut = {"name": "DSR01"}
+
+    for _ in range(2):
+        output = tests_tools.show_clock_output(conn, dut)
+        assert output == "Thu Jun  1 14:03:59 2023\nTimezone: UTC\nClock source: local\n"
+    assert conn.enable.call_count == 2 and "clock_sample" not in dut
+
+    output = tests_tools.show_clock_output(conn, dut, derive=True)
+    assert output == "Thu Jun  1 14:03:59 2023\nTimezone: UTC\nClock source: local\n"
+
+    monotonic.return_value = 100.0 + 3600 * 24 * 30 + 61.5
+    output = tests_tools.show_clock_output(conn, dut, derive=True)
+    assert output == (
+        "! Derived locally from show clock run on DSR01 at Thu Jun  1 14:03:59 2023\n"
+        "Sat Jul  1 14:05:00 2023\nTimezone: UTC\nClock source: local\n"
+    )
+    assert conn.enable.call_count == 3
+
+    # the clock of a dut is sampled again when its output cannot be parsed
+    conn.enable.return_value = [{"result": {"output": "2023-06-01 14:03:59\n"}}]
+    dut = {"name": "DSR02"}
+    for _ in range(2):
+        assert tests_tools.show_clock_output(conn, dut, derive=True) == "2023-06-01 14:03:59\n"
+    assert conn.enable.call_count == 5
+
+
 def test_test_ops_run_show_cmds_json(mocker):
     """Validates the functionality of run_show_cmds method"""
     mocker.patch(
@@ -1687,6 +2370,54 @@ def test_test_ops_run_show_cmds_json(mocker):
     }
 
 
+def test_test_ops_run_show_cmds_evidence_policy(mocker):
+    """Validates that json-as-evidence and lazy evidence policies run show cmds
+    in json encoding only, and that lazy fetches the text evidence once the
+    test failed"""
+    mocker.patch(
+        "vane.tests_tools.TestOps._get_parameters",
+        return_value=read_yaml("tests/unittests/fixtures/fixture_testops_test_parameters.yaml"),
+    )
+    mocker.patch("vane.tests_tools.TestOps._verify_show_cmd", return_value=True)
+    mocker.patch("vane.tests_tools.TestOps._html_report")
+    mocker.patch("vane.tests_tools.TestOps._write_results")
+    mocker.patch("vane.tests_tools.TestOps._write_text_results")
+    json_result = {
+        "command": "show interfaces status",
+        "result": {"interfaceStatuses": {"Management1": {}}},
+        "encoding": "json",
+    }
+    text_result = {
+        "command": "show interfaces status",
+        "result": {"output": "TEXT_INTERFACE_STATUS_result"},
+        "encoding": "text",
+    }
+    mocker_object = mocker.patch("vane.device_interface.PyeapiConn.enable")
+    mocker_object.side_effect = [[json_result], [json_result], [text_result]]
+
+    with pytest.raises(ValueError):
+        tests_tools.get_evidence_policy({"parameters": {"evidence_policy": "html"}})
+
+    tops = create_test_ops_instance(mocker)
+    dut = {"connection": vane.device_interface.PyeapiConn, "name": "neighbor"}
+    dut["eapi_conn"] = dut["connection"]
+    json_evidence = '{\n  "interfaceStatuses": {\n    "Management1": {}\n  }\n}'
+
+    tops.evidence_policy = "json-as-evidence"
+    assert tops.run_show_cmds(["show interfaces status"], dut, "json") == [json_result]
+    assert tops._show_cmd_txts["neighbor"] == [json_evidence]
+
+    tops.evidence_policy = "lazy"
+    assert tops.run_show_cmds(["show interfaces status"], dut, "json") == [json_result]
+    assert tops._show_cmd_txts["neighbor"] == [json_evidence, json_evidence]
+    assert mocker_object.call_count == 2
+
+    tops.test_result = False
+    tops.generate_report("neighbor")
+    assert tops._show_cmd_txts["neighbor"] == [json_evidence, "TEXT_INTERFACE_STATUS_result"]
+    mocker_object.assert_called_with(["show interfaces status"], strict=True, encoding="text")
+
+
 def test_test_ops_run_show_cmds_text(mocker):
     """Validates the functionality of run_show_cmds method"""
     mocker.patch(
@@ -1904,6 +2635,32 @@ def test_test_ops_run_cfg_cmds_ssh(mocker):
     }
 
 
+def test_test_ops_run_cmds_new_conn(mocker):
+    """Validates that new_conn runs the cmds on a new connection which is
+    closed afterwards, and that only a positive timeout uses the pool"""
+    mocker.patch("vane.tests_tools.TestOps._verify_show_cmd", return_value=True)
+    tops = create_test_ops_instance(mocker)
+    tops.show_clock_flag = False
+    conn = mocker.MagicMock()
+    conn.enable.return_value = [{"result": {"output": ""}}]
+    get_new_conn = mocker.patch("vane.tests_tools.TestOps.get_new_conn", return_value=conn)
+    get_pool = mocker.patch("vane.tests_tools.get_connection_pool")
+    dut = {"name": "neighbor"}
+
+    tops.run_show_cmds(["show version"], dut, timeout=-1, new_conn=True)
+    get_new_conn.assert_called_once_with(dut, "eapi", -1)
+    conn.close.assert_called_once()
+    get_pool.assert_not_called()
+
+    with pytest.raises(ValueError):
+        tops.run_show_cmds(["show version"], dut, timeout=-1)
+
+    get_pool.return_value.connection.return_value.__enter__.return_value = conn
+    tops.run_show_cmds(["show version"], dut, timeout=30)
+    get_pool.return_value.connection.assert_called_once_with(dut, "eapi", 30)
+    assert get_new_conn.call_count == 1
+
+
 def test_test_ops_transfer_file(mocker):
     """Validates the functionality of transfer_file method"""
     mocker.patch("vane.tests_tools.TestOps._verify_show_cmd", return_value=True)
@@ -36,16 +36,28 @@ def test_setup_vane(loginfo, mocker):
     # mocking these methods since they have been tested in tests_tools tests
 
     mocker_object = mocker.patch("vane.tests_tools.import_yaml")
-    mocker_object.side_effect = ["Duts_file", "Test_parameters"]
+    test_parameters = {"parameters": {"show_cmd_encoding": "lazy"}}
+    mocker_object.side_effect = ["Duts_file", test_parameters]
     mocker.patch("vane.tests_tools.return_test_defs", return_value="Test definitions")
     mocker.patch("vane.tests_tools.return_show_cmds", return_value="show_commands")
-    mocker.patch("vane.tests_tools.init_duts", return_value=([], []))
+    encodings_mock = mocker.patch(
+        "vane.tests_tools.return_show_cmd_encodings", return_value="show_cmd_encodings"
+    )
+    index_mock = mocker.patch("vane.tests_tools.return_test_case_index")
+    init_duts_mock = mocker.patch("vane.tests_tools.init_duts", return_value=([], []))
 
     vane_cli.setup_vane()
 
+    index_mock.assert_called_once_with("Test definitions")
+    encodings_mock.assert_called_once_with("Test definitions", "lazy")
+    assert vane.config.show_cache is None
+    init_duts_mock.assert_called_once_with(
+        "show_commands", test_parameters, "Duts_file", "show_cmd_encodings"
+    )
+
     # assert the vane.configs got set correctly
     assert vane.config.test_duts == "Duts_file"
-    assert vane.config.test_parameters == "Test_parameters"
+    assert vane.config.test_parameters == test_parameters
     assert vane.config.test_defs == "Test definitions"
     assert not vane.config.dut_objs
     assert not vane.config.unreachable_duts
@@ -195,6 +207,23 @@ def test_remove_unexecuted_testcase_logs(loginfo):
         loginfo.assert_has_calls(loginfo_calls, any_order=False)
 
 
+def test_setup_vane_show_cache(mocker, tmp_path):
+    """Validates that setup_vane creates the show output cache for --refresh-cache"""
+    test_parameters = {"parameters": {"cache_dir": str(tmp_path / "cache"), "cache_ttl": 60}}
+    mocker.patch("vane.tests_tools.import_yaml", side_effect=["Duts_file", test_parameters])
+    mocker.patch("vane.tests_tools.return_test_defs", return_value={"test_suites": []})
+    mocker.patch("vane.tests_tools.return_show_cmds", return_value=[])
+    mocker.patch("vane.tests_tools.init_duts", return_value=([], []))
+    mocker.patch("vane.config.show_cache_mode", "refresh")
+    mocker.patch("vane.config.show_cache", None)
+
+    vane_cli.setup_vane()
+
+    assert vane.config.show_cache.cache_dir == str(tmp_path / "cache")
+    assert vane.config.show_cache.ttl == 60
+    assert vane.config.show_cache.refresh
+
+
 def test_main_definitions_and_duts(loginfo, logwarning, mocker):
     """Tests the --definitions-file and --duts-file flag"""
 
@@ -216,16 +245,25 @@ def test_main_definitions_and_duts(loginfo, logwarning, mocker):
             cvp=False,
             nrfu=False,
             version=False,
+            use_cache=True,
+            refresh_cache=False,
+            record=None,
+            replay="captures",
         ),
     )
+    mocker.patch("vane.config.replay_dir", None)
+    mocker.patch("vane.config.show_cache_mode", None)
     vane_cli.main()
 
     assert vane.config.DEFINITIONS_FILE == "definitions_sample.yaml"
+    assert vane.config.show_cache_mode == "use"
+    assert vane.config.replay_dir == "captures"
     assert vane.config.DUTS_FILE == "duts_sample.yaml"
 
     # assert info logs to ensure all the above methods executed without errors
     loginfo_calls = [
         call("Reading in input from command-line"),
+        call("Replaying DUT connections from captures"),
         call("\n\n!VANE has completed without errors!\n\n"),
     ]
     loginfo.assert_has_calls(loginfo_calls, any_order=False)
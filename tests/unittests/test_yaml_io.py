@@ -0,0 +1,35 @@
+"""Test class for yaml_io.py"""
+import io
+import yaml
+from vane import yaml_io
+
+
+def test_dump_matches_yaml_dump():
+    """Validates that dump writes the same document as yaml.dump and load
+    reads it back"""
+    data = {
+        "name": "test_if_intf_counters_has_input_errors_on_",
+        "test_result": True,
+        "show_cmd_txts": {"DSR01": ["show interfaces counters errors:\n\nPort  FCS\n"]},
+        "expected_output": None,
+        "test_steps": ["Step 1", "Step 2"],
+    }
+    stream = io.StringIO()
+
+    yaml_io.dump(data, stream, default_flow_style=False)
+
+    assert stream.getvalue() == yaml.dump(data, default_flow_style=False)
+    assert yaml_io.load(stream.getvalue()) == data
+
+
+def test_dump_unsafe_data():
+    """Validates that data without a safe representation is dumped with
+    the full dumper"""
+
+    class Output:
+        """Test case object without a safe representation"""
+
+        def __init__(self):
+            self.value = 1
+
+    assert yaml_io.dump({"actual_output": Output()}) == yaml.dump({"actual_output": Output()})
@@ -8,3 +8,10 @@ test_duts = {}
 test_parameters = {}
 dut_objs = []
 unreachable_duts = []
+show_cache_mode = None
+show_cache = None
+replay_dir = None
+record_dir = None
+result_writer = None
+evidence_store = None
+connection_pool = None
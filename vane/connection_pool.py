@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2024, Arista Networks EOS+
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the Arista nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Pool of device connections used by test cases. Connections are keyed by
+dut, connection type and read timeout and are kept open between test cases,
+so a test asking for a connection with a timeout reuses one opened by an
+earlier test. Idle connections are probed before reuse when they have not
+been used for a while, and closed once idle for too long.
+"""
+
+import contextlib
+import threading
+import time
+from pyeapi import eapilib
+from vane import device_interface
+from vane.vane_logging import logging
+
+DEFAULT_IDLE_TIMEOUT = 300
+DEFAULT_HEALTH_CHECK_INTERVAL = 30
+HEALTH_CHECK_CMDS = ["show clock"]
+
+
+class ConnectionPool:
+    """ConnectionPool keeps idle device connections for reuse. It is safe
+    to use from several threads; each pytest-xdist worker has its own."""
+
+    def __init__(
+        self,
+        factory,
+        idle_timeout=DEFAULT_IDLE_TIMEOUT,
+        health_check_interval=DEFAULT_HEALTH_CHECK_INTERVAL,
+    ):
+        """Initializes the pool
+
+        Args:
+            factory (func): called with (dut, conn_type, timeout) to open a
+                new connection
+            idle_timeout (int): seconds an idle connection is kept open
+            health_check_interval (int): seconds a connection can stay idle
+                before it is probed on reuse
+        """
+        self.factory = factory
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(dut, conn_type, timeout):
+        """Returns the key of the connections to a dut"""
+        return (dut["name"], conn_type, timeout)
+
+    def acquire(self, dut, conn_type, timeout=0):
+        """Returns an idle healthy connection to the dut, or a new one
+
+        Args:
+            dut (dict): the device to get the connection to
+            conn_type (str): eapi or ssh
+            timeout (int): read timeout of the connection
+
+        Returns:
+            conn (DeviceConn): connection for the exclusive use of the caller
+        """
+        self.evict_idle()
+        key = self._key(dut, conn_type, timeout)
+
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                if not idle:
+                    break
+                conn, last_used = idle.pop()
+
+            if time.monotonic() - last_used < self.health_check_interval or self._healthy(conn):
+                logging.debug(f"Reusing {conn_type} connection to {dut['name']}")
+                return conn
+
+            logging.info(f"Closing unhealthy {conn_type} connection to {dut['name']}")
+            self.discard(conn)
+
+        logging.info(f"Opening pooled {conn_type} connection to {dut['name']}")
+        return self.factory(dut, conn_type, timeout)
+
+    def release(self, dut, conn_type, timeout, conn):
+        """Returns a connection acquired from the pool for reuse
+
+        Args:
+            dut (dict): the device of the connection
+            conn_type (str): eapi or ssh
+            timeout (int): read timeout of the connection
+            conn (DeviceConn): connection to keep
+        """
+        with self._lock:
+            idle = self._idle.setdefault(self._key(dut, conn_type, timeout), [])
+            idle.append((conn, time.monotonic()))
+
+    @staticmethod
+    def discard(conn):
+        """Closes a connection which must not be reused"""
+        try:
+            conn.close()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            logging.debug(f"Error closing connection: {err}")
+
+    @contextlib.contextmanager
+    def connection(self, dut, conn_type, timeout=0):
+        """Context manager lending a pooled connection. The connection goes
+        back to the pool unless it failed with an error other than a
+        command error.
+
+        Args:
+            dut (dict): the device to get the connection to
+            conn_type (str): eapi or ssh
+            timeout (int): read timeout of the connection
+
+        Yields:
+            conn (DeviceConn): connection to the dut
+        """
+        conn = self.acquire(dut, conn_type, timeout)
+        try:
+            yield conn
+        except (eapilib.CommandError, device_interface.CommandError):
+            self.release(dut, conn_type, timeout, conn)
+            raise
+        except BaseException:
+            self.discard(conn)
+            raise
+        self.release(dut, conn_type, timeout, conn)
+
+    def evict_idle(self):
+        """Closes the connections idle for longer than the idle timeout"""
+        now = time.monotonic()
+        expired = []
+
+        with self._lock:
+            for idle in self._idle.values():
+                fresh = []
+                for conn, last_used in idle:
+                    if now - last_used > self.idle_timeout:
+                        expired.append(conn)
+                    else:
+                        fresh.append((conn, last_used))
+                idle[:] = fresh
+
+        for conn in expired:
+            self.discard(conn)
+
+    def close(self):
+        """Closes every idle connection"""
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+
+        for conn in idle:
+            self.discard(conn)
+
+    @staticmethod
+    def _healthy(conn):
+        """Returns True if the connection still runs commands"""
+        try:
+            conn.run_commands(HEALTH_CHECK_CMDS, "text")
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            logging.debug(f"Connection health check failed: {err}")
+            return False
+
+        return True
@@ -29,15 +29,25 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 #
 
-"""Device connection drivers - two types of drivers
+"""Device connection drivers - three types of drivers
    1. EAPI driver - uses pyeapi package
    2. ssh driver - uses Netmiko package
+   3. async EAPI driver - sends eAPI JSON-RPC requests from an asyncio event loop
+Connections can also be recorded to a capture and replayed from it offline.
 """
 
+import asyncio
+import atexit
+import base64
+import http.client
 import os
 import json
+import re
 import ssl
+import threading
+import time
 import pyeapi
+from pyeapi import eapilib
 import netmiko
 import paramiko
 from netmiko.ssh_autodetect import SSHDetect
@@ -45,6 +55,27 @@ from netmiko import Netmiko, file_transfer
 from vane.utils import make_iterable
 
 
+EAPI_CIPHERS = "AES256-SHA:DHE-RSA-AES256-SHA:AES128-SHA:DHE-RSA-AES128-SHA"
+EAPI_PATH = "/command-api"
+DEFAULT_ASYNC_POOL_SIZE = 100
+# longest status, header or chunk size line of an eAPI response
+MAX_HTTP_LINE = 2**16
+# most header lines of an eAPI response
+MAX_HTTP_HEADERS = 100
+DEFAULT_RECONNECT_ATTEMPTS = 3
+DEFAULT_RECONNECT_BACKOFF = 1
+
+# commands after which an ssh session is no longer in enable mode
+LEAVE_ENABLE_CMDS = ("disable", "exit", "logout")
+
+# errors after which an ssh session is no longer usable
+SSH_SESSION_ERRORS = (
+    netmiko.exceptions.NetmikoTimeoutException,
+    netmiko.exceptions.ReadTimeout,
+    OSError,
+    EOFError,
+)
+
 error_responses = [
     '% This is an unconverted command\n{\n    "errors": '
     '[\n        "This is an unconverted command"\n    ]\n}',
@@ -124,10 +155,23 @@ class DeviceConn:
         """Transfer the file to/from the dut"""
         pass
 
+    def set_timeout(self, timeout):
+        """Set the seconds a read from the device may take, return the previous value"""
+        pass
+
+    def close(self):
+        """Close the connection to the device"""
+        pass
+
 
 class PyeapiConn(DeviceConn):
     """PyeapiConn connects to Arista devices using PyEAPI"""
 
+    def __init__(self):
+        # the http connection of pyeapi is not thread safe, callers sharing
+        # the connection between threads hold this lock around their calls
+        self.lock = threading.RLock()
+
     def connection(self):
         """returns the connection object"""
         # pylint: disable=attribute-defined-outside-init
@@ -139,7 +183,7 @@ class PyeapiConn(DeviceConn):
         # Create SSL Context
         ctx = ssl.create_default_context()
         # Using the EOS default ciphers
-        ctx.set_ciphers("AES256-SHA:DHE-RSA-AES256-SHA:AES128-SHA:DHE-RSA-AES128-SHA")
+        ctx.set_ciphers(EAPI_CIPHERS)
         ctx.check_hostname = False
         ctx.verify_mode = ssl.CERT_NONE
 
@@ -157,8 +201,11 @@ class PyeapiConn(DeviceConn):
         if device_data.get("enable_pwd", ""):
             self._connection.enable_authentication(device_data["enable_pwd"])
 
-        # Add logic to authenticate connection
-        self.run_commands(["echo authenticating connection"])
+        # Authenticate the connection, show version also tells the platform and EOS version
+        show_version = self.run_commands(["show version"])[0]
+        # pylint: disable=attribute-defined-outside-init
+        self.platform = show_version.get("modelName")
+        self.eos_version = show_version.get("version")
 
     def run_commands(self, cmds, encoding="json", send_enable=True, **kwargs):
         """wrapper around pyeapi run_commands func"""
@@ -184,14 +231,60 @@ class PyeapiConn(DeviceConn):
         """Transfer the file to/from the dut"""
         raise NotImplementedError("PyeapiConn does not implement transfer_file()")
 
+    def set_timeout(self, timeout):
+        """sets the timeout of the socket of the http connection pyeapi keeps to the device"""
+        transport = self._connection.connection.transport
+        previous, transport.timeout = transport.timeout, timeout
+        if transport.sock:
+            transport.sock.settimeout(timeout)
+
+        return previous
+
+    def close(self):
+        """closes the http connection pyeapi keeps to the device"""
+        node = getattr(self, "_connection", None)
+        transport = getattr(getattr(node, "connection", None), "transport", None)
+        if transport:
+            transport.close()
+
 
 class NetmikoConn(DeviceConn):
-    """NetmikoConn connects to Arista devices using ssh conn"""
+    """NetmikoConn connects to Arista devices using ssh conn
+
+    The ssh session is reused by every call made on the connection and is
+    guarded by a re-entrant lock, so a connection can be shared between
+    threads. A call which times out or finds the session closed reconnects,
+    with exponential backoff, and is retried once on the new session.
+
+    Enable mode is entered once per session, and again after a command
+    leaving it. When cached_prompt is set, the commands of a list are sent
+    one at a time with the prompt of the session, instead of netmiko looking
+    the prompt up again before each command.
+    """
+
+    def __init__(
+        self,
+        reconnect_attempts=DEFAULT_RECONNECT_ATTEMPTS,
+        reconnect_backoff=DEFAULT_RECONNECT_BACKOFF,
+        cached_prompt=False,
+    ):
+        self.reconnect_attempts = reconnect_attempts
+        self.reconnect_backoff = reconnect_backoff
+        self.cached_prompt = cached_prompt
+        self._lock = threading.RLock()
+        self._remote_device = None
+        self._connection = None
+        self._enabled = False
 
     def connection(self):
         """returns the connection object"""
         return self._connection
 
+    @property
+    def lock(self):
+        """re-entrant lock guarding the ssh session"""
+        return self._lock
+
     def set_up_conn(self, device_data):
         """sets up conn to device using _config params"""
 
@@ -217,8 +310,90 @@ class NetmikoConn(DeviceConn):
         if remote_device["device_type"] == "autodetect":
             guesser = SSHDetect(**remote_device)
             remote_device["device_type"] = guesser.autodetect()
-        # pylint: disable=attribute-defined-outside-init
-        self._connection = Netmiko(**remote_device)
+
+        with self._lock:
+            self.close()
+            self._connection = Netmiko(**remote_device)
+            self._remote_device = remote_device
+            self._enabled = False
+
+    def reconnect(self):
+        """Replace the ssh session with a new one to the same device.
+
+        Connecting is retried reconnect_attempts times, waiting
+        reconnect_backoff seconds after the first failure and twice as long
+        after each next one. The session log of the new session is appended
+        to the one of the previous session.
+
+        Raises:
+            netmiko.exceptions.ConnectionException: if the connection was
+                never set up
+        """
+        with self._lock:
+            if self._remote_device is None:
+                raise netmiko.exceptions.ConnectionException(
+                    "ssh connection is not set up, set_up_conn must be called first"
+                )
+            self.close()
+            self._enabled = False
+            remote_device = dict(self._remote_device, session_log_file_mode="append")
+            delay = self.reconnect_backoff
+
+            for attempt in range(1, self.reconnect_attempts + 1):
+                try:
+                    self._connection = Netmiko(**remote_device)
+                    self._enabled = False
+                    return
+                except (netmiko.exceptions.NetmikoTimeoutException, OSError):
+                    if attempt == self.reconnect_attempts:
+                        raise
+                    time.sleep(delay)
+                    delay *= 2
+
+    def _call(self, method, *args, send_enable=False, retry=True):
+        """Call a method of the ssh session, reconnecting and retrying once
+        if the session timed out or was closed.
+
+        Args:
+            method (str|callable): name of the netmiko connection method, or
+                function called with the session as first argument
+            *args: arguments of the method
+            send_enable (bool): enter enable mode on the new session before
+                retrying
+            retry (bool): retry the method on a new session. Methods which
+                change the device are not retried, as the device may already
+                have applied them; the session is closed and the error raised.
+
+        Returns:
+            output of the method
+        """
+
+        def call():
+            if callable(method):
+                return method(self._connection, *args)
+            return getattr(self._connection, method)(*args)
+
+        with self._lock:
+            if self._connection is None:
+                self.reconnect()
+            try:
+                return call()
+            except SSH_SESSION_ERRORS:
+                if not retry:
+                    # the next call reconnects
+                    self.close()
+                    raise
+                self.reconnect()
+                if send_enable:
+                    self._enable()
+                return call()
+
+    def _enable(self):
+        """Enter enable mode, unless the session already is in enable mode"""
+        with self._lock:
+            if not self._enabled:
+                self._call("enable")
+                self._enabled = True
 
     def get_cmds(self, cmds):
         """get_cmds: converts cmds to json cmds
@@ -235,19 +410,24 @@ class NetmikoConn(DeviceConn):
 
         return cmds, local_cmds
 
-    def send_list_cmds(self, cmds, encoding="json"):
+    def _sent(self, cmd):
+        """Note that cmd was sent to the ssh session, so enable mode is
+        entered again after a command leaving it"""
+        words = cmd.split()
+        if words and words[0] in LEAVE_ENABLE_CMDS:
+            self._enabled = False
+
+    def send_list_cmds(self, cmds, encoding="json", send_enable=True, cached_prompt=False):
         """send_list_cmds: sends the list of commands to device conn
-        and collects the output as list"""
+        and collects the output as list. With cached_prompt, the output of
+        each command is read up to the prompt of the session."""
 
         cmds_op = []
+        method = self._send_cached_prompt if cached_prompt else "send_command"
 
         for i, cmd in enumerate(cmds):
-            try:
-                output = self._connection.send_command(cmd)
-            except netmiko.exceptions.NetmikoTimeoutException:
-                # try resetting connection and see if it works
-                self.set_up_conn(self.name)
-                output = self._connection.send_command(cmd)
+            output = self._call(method, cmd, send_enable=send_enable)
+            self._sent(cmd)
 
             if output not in error_responses:
                 if encoding == "json":
@@ -264,16 +444,33 @@ class NetmikoConn(DeviceConn):
 
         return cmds_op
 
-    def send_str_cmds(self, cmds, encoding="json"):
+    @staticmethod
+    def _send_cached_prompt(session, cmd):
+        """Send a command and read its output up to the prompt of the session,
+        so netmiko does not look the prompt up before sending it. The prompt
+        must be a whole line, in any cli mode, so output lines holding the
+        hostname do not end the read. Without a known prompt, netmiko looks
+        it up as usual.
+
+        Args:
+            session (netmiko.BaseConnection): ssh session
+            cmd (str): command to run
+
+        Returns:
+            output (str): output of the command
+        """
+        if not session.base_prompt:
+            return session.send_command(cmd)
+
+        prompt_pattern = rf"^{re.escape(session.base_prompt)}(\([^\s()]+\))?[>#]\s*$"
+        return session.send_command(cmd, expect_string=prompt_pattern, re_flags=re.M)
+
+    def send_str_cmds(self, cmds, encoding="json", send_enable=True):
         """send_str_cmds: sends one command to device conn"""
 
         cmds_op = []
-        try:
-            output = self._connection.send_command(cmds)
-        except netmiko.exceptions.NetmikoTimeoutException:
-            # try resetting connection and see if it works
-            self.set_up_conn(self.name)
-            output = self._connection.send_command(cmds)
+        output = self._call("send_command", cmds, send_enable=send_enable)
+        self._sent(cmds)
 
         if output not in error_responses:
             if encoding == "json":
@@ -296,9 +493,6 @@ class NetmikoConn(DeviceConn):
         """
         local_cmds = []
 
-        if send_enable:
-            self._connection.enable()
-
         if encoding == "json":
             # for json encoding, lets try to run cmds using | json
             cmds, local_cmds = self.get_cmds(cmds=cmds)
@@ -308,10 +502,16 @@ class NetmikoConn(DeviceConn):
             # when cmds is a string and encoding is text
             local_cmds = cmds
 
-        if isinstance(cmds, list):
-            cmds_op = self.send_list_cmds(cmds=local_cmds, encoding=encoding)
-        elif isinstance(cmds, str):
-            cmds_op = self.send_str_cmds(cmds=local_cmds, encoding=encoding)
+        with self._lock:
+            if send_enable:
+                self._enable()
+
+            if isinstance(cmds, list):
+                cmds_op = self.send_list_cmds(
+                    local_cmds, encoding, send_enable, cached_prompt=self.cached_prompt
+                )
+            elif isinstance(cmds, str):
+                cmds_op = self.send_str_cmds(local_cmds, encoding, send_enable)
 
         return cmds_op
 
@@ -381,26 +581,742 @@ class NetmikoConn(DeviceConn):
         commands = make_iterable(commands)
         commands = list(commands)
 
-        self._connection.enable()
-        response = self._connection.send_config_set(commands)
+        with self._lock:
+            self._enable()
+            response = self._call("send_config_set", commands, retry=False)
 
         return response
 
     def transfer_file(self, src_file, dest_file, file_system, operation, sftp=False):
         """Transfer the file to/from the dut"""
 
-        if sftp:
-            transport = self._connection.remote_conn.get_transport()
-            self._connection.remote_conn = paramiko.SFTPClient.from_transport(transport)
-
-        self._connection.enable()
-        transfer = file_transfer(
-            self._connection,
-            source_file=src_file,
-            dest_file=dest_file,
-            file_system=file_system,
-            direction=operation,
-            overwrite_file=True,
-        )
+        with self._lock:
+            self._enable()
+
+            if sftp:
+                transport = self._connection.remote_conn.get_transport()
+                self._connection.remote_conn = paramiko.SFTPClient.from_transport(transport)
+
+            transfer = file_transfer(
+                self._connection,
+                source_file=src_file,
+                dest_file=dest_file,
+                file_system=file_system,
+                direction=operation,
+                overwrite_file=True,
+            )
 
         return transfer
+
+    def set_timeout(self, timeout):
+        """sets the read timeout of the ssh session. It is set without taking
+        the lock, so it also bounds a read in progress in another thread."""
+        remote_device = self._remote_device or {}
+        previous = remote_device.get("read_timeout_override")
+        remote_device["read_timeout_override"] = timeout
+        connection = self._connection
+        if connection:
+            connection.read_timeout_override = timeout
+
+        return previous
+
+    def close(self):
+        """closes the ssh session and its session log"""
+        with self._lock:
+            connection, self._connection = self._connection, None
+            self._enabled = False
+            if connection:
+                connection.disconnect()
+
+
+class AsyncEapiPool:
+    """Pool of keep-alive HTTP connections to eAPI endpoints.
+
+    Connections are kept open after a request and reused by the next request
+    to the same endpoint, so a device is only connected to once per pool.
+    The number of requests in flight, and so the number of connections in
+    use, is bounded by max_connections. A pool belongs to the event loop it
+    is used from and must be closed before the loop ends.
+    """
+
+    def __init__(self, max_connections=DEFAULT_ASYNC_POOL_SIZE):
+        self.max_connections = max_connections
+        self._semaphore = asyncio.Semaphore(max_connections)
+        self._idle = {}
+
+    async def request(self, host, port, ssl_ctx, request, timeout):
+        """Send a HTTP request and return the response.
+
+        A request sent on a reused connection which the device has closed
+        in the meantime is retried once on a new connection.
+
+        Args:
+            host (str): ip address or hostname of the device
+            port (int): eAPI port of the device
+            ssl_ctx (ssl.SSLContext): ssl context, None for http
+            request (bytes): complete HTTP request
+            timeout (int): seconds to wait for the response
+
+        Returns:
+            status (int): HTTP status code
+            reason (str): HTTP reason phrase
+            body (bytes): response body
+        """
+        key = (host, port, ssl_ctx is not None)
+
+        async with self._semaphore:
+            for attempt in range(2):
+                reader, writer, reused = await self._acquire(key, ssl_ctx, timeout)
+                keep_alive = False
+                try:
+                    status, reason, body, keep_alive = await asyncio.wait_for(
+                        self._exchange(reader, writer, request), timeout
+                    )
+                except (
+                    OSError,
+                    asyncio.TimeoutError,
+                    asyncio.IncompleteReadError,
+                    http.client.HTTPException,
+                ) as err:
+                    # asyncio.TimeoutError is not an OSError before python 3.11,
+                    # and a malformed response is not retried
+                    if reused and attempt == 0 and isinstance(err, OSError):
+                        continue
+                    raise eapilib.ConnectionError(
+                        host, f"Socket error during eAPI connection: {err!r}"
+                    ) from err
+                finally:
+                    # the connection is only kept by a complete keep-alive response
+                    if keep_alive:
+                        self._idle.setdefault(key, []).append((reader, writer))
+                    else:
+                        writer.close()
+
+                return status, reason, body
+
+    async def close(self):
+        """Close all idle connections of the pool"""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for _, writer in connections:
+                writer.close()
+        for connections in idle.values():
+            for _, writer in connections:
+                try:
+                    await writer.wait_closed()
+                except OSError:
+                    pass
+
+    async def _acquire(self, key, ssl_ctx, timeout):
+        """Return an idle connection to the endpoint or open a new one"""
+        connections = self._idle.get(key, [])
+        while connections:
+            reader, writer = connections.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+
+        host, port, _ = key
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port, ssl=ssl_ctx, limit=MAX_HTTP_LINE), timeout
+            )
+        except (OSError, asyncio.TimeoutError) as err:
+            raise eapilib.ConnectionError(
+                host, f"Socket error during eAPI connection: {err!r}"
+            ) from err
+
+        return reader, writer, False
+
+    @staticmethod
+    async def _read_line(reader):
+        """Read a line of the response, of at most MAX_HTTP_LINE bytes"""
+        try:
+            return await reader.readline()
+        except ValueError as err:
+            # the line is longer than the limit of the stream
+            raise http.client.LineTooLong("response line") from err
+
+    @classmethod
+    async def _read_head(cls, reader):
+        """Read the status line and the headers of a response, skipping
+        informational 1xx responses which precede the final response"""
+        while True:
+            status_line = await cls._read_line(reader)
+            if not status_line:
+                raise ConnectionResetError("connection closed by the device")
+            version, status, reason = (
+                status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + ["", ""]
+            )[:3]
+            if not version.startswith("HTTP/") or len(status) != 3 or not status.isdigit():
+                raise http.client.BadStatusLine(status_line.decode("latin-1"))
+
+            headers = {}
+            for _ in range(MAX_HTTP_HEADERS + 1):
+                line = await cls._read_line(reader)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            else:
+                raise http.client.HTTPException(f"got more than {MAX_HTTP_HEADERS} headers")
+
+            if status == "101":
+                raise http.client.HTTPException("unexpected 101 switching protocols response")
+            if not status.startswith("1"):
+                return version, int(status), reason, headers
+
+    @classmethod
+    async def _read_chunked(cls, reader):
+        """Read a chunked response body"""
+        chunks = []
+        while True:
+            line = await cls._read_line(reader)
+            size = line.split(b";")[0].strip()
+            if not size or size.strip(b"0123456789abcdefABCDEF"):
+                raise http.client.HTTPException(f"invalid chunk size {line[:64]!r}")
+            size = int(size, 16)
+            if not size:
+                # skip the trailer
+                while (await cls._read_line(reader)) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            if await cls._read_line(reader) not in (b"\r\n", b"\n"):
+                raise http.client.HTTPException("chunk is not followed by a line break")
+
+    @classmethod
+    async def _exchange(cls, reader, writer, request):
+        """Write the request and read a HTTP/1.1 response"""
+        writer.write(request)
+        await writer.drain()
+
+        version, status, reason, headers = await cls._read_head(reader)
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = await cls._read_chunked(reader)
+        elif "content-length" in headers:
+            length = headers["content-length"]
+            if not length.isdigit():
+                raise http.client.HTTPException(f"invalid content length {length[:64]!r}")
+            body = await reader.readexactly(int(length))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        return status, reason, body, keep_alive
+
+
+class AsyncEapiConn(DeviceConn):
+    """AsyncEapiConn connects to Arista devices using eAPI JSON-RPC requests
+    sent from an asyncio event loop. Requests share the keep-alive
+    connections of an AsyncEapiPool, so many devices can be served from a
+    single event loop.
+
+    The async_* methods are awaited from a running event loop, the
+    DeviceConn methods run them to completion in an event loop of their
+    own, each request on a connection of its own.
+    """
+
+    def set_up_conn(self, device_data):
+        """Stores the eAPI endpoint and credentials of the device.
+        No request is sent, the credentials are checked by the first request.
+        """
+        # pylint: disable=attribute-defined-outside-init
+        self.name = device_data.get("name", device_data["mgmt_ip"])
+        self.host = device_data["mgmt_ip"]
+        self.transport = device_data.get("transport", "https")
+        self.port = device_data.get("port", 443 if self.transport == "https" else 80)
+        self.timeout = device_data.get("timeout", 60)
+        self._enable_pwd = device_data.get("enable_pwd", "")
+
+        credentials = f'{device_data["username"]}:{device_data["password"]}'
+        self._auth = base64.b64encode(credentials.encode()).decode()
+
+        self._ssl_ctx = None
+        if self.transport == "https":
+            self._ssl_ctx = ssl.create_default_context()
+            # Using the EOS default ciphers
+            self._ssl_ctx.set_ciphers(EAPI_CIPHERS)
+            self._ssl_ctx.check_hostname = False
+            self._ssl_ctx.verify_mode = ssl.CERT_NONE
+
+    def _build_request(self, cmds, encoding):
+        """Returns the HTTP request of a runCmds JSON-RPC call"""
+        payload = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "method": "runCmds",
+                "params": {"version": 1, "cmds": cmds, "format": encoding},
+                "id": str(id(self)),
+            }
+        ).encode()
+        header = (
+            f"POST {EAPI_PATH} HTTP/1.1\r\n"
+            f"Host: {self.host}\r\n"
+            "Content-Type: application/json-rpc\r\n"
+            f"Authorization: Basic {self._auth}\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        )
+        return header.encode("latin-1") + payload
+
+    async def async_run_commands(self, cmds, encoding="json", send_enable=True, pool=None):
+        """Sends the commands to the device and returns their outputs.
+
+        Args:
+            cmds (list): command or list of commands
+            encoding (str): json or text
+            send_enable (bool): prepend the enable command
+            pool (AsyncEapiPool): pool to send the request with, a pool is
+                created for this request if not given
+
+        Returns:
+            output (list): output of each command, in the eapi format
+
+        Raises:
+            eapilib.ConnectionError: device could not be reached or the
+                authentication failed
+            eapilib.CommandError: a command failed on the device
+        """
+        commands = list(make_iterable(cmds))
+        request_cmds = list(commands)
+        if send_enable:
+            if self._enable_pwd:
+                request_cmds.insert(0, {"cmd": "enable", "input": self._enable_pwd})
+            else:
+                request_cmds.insert(0, "enable")
+
+        own_pool = pool is None
+        if own_pool:
+            pool = AsyncEapiPool(max_connections=1)
+
+        try:
+            status, reason, body = await pool.request(
+                self.host,
+                self.port,
+                self._ssl_ctx,
+                self._build_request(request_cmds, encoding),
+                self.timeout,
+            )
+        finally:
+            if own_pool:
+                await pool.close()
+
+        if status == 401:
+            raise eapilib.ConnectionError(self.host, f"{reason}. {body.decode(errors='replace')}")
+
+        try:
+            response = json.loads(body)
+        except ValueError as err:
+            raise eapilib.ConnectionError(self.host, "unable to connect to eAPI") from err
+
+        if "error" in response:
+            error = response["error"]
+            data = error.get("data", [])
+            command_error = None
+            for item in data:
+                if isinstance(item, dict) and "errors" in item:
+                    command_error = item["errors"][0]
+            raise eapilib.CommandError(
+                error.get("code"),
+                error.get("message"),
+                command_error=command_error,
+                output=data,
+                commands=request_cmds,
+            )
+
+        result = response["result"]
+        if send_enable:
+            result.pop(0)
+
+        return result
+
+    async def async_get_config(
+        self, config="running-config", params=None, as_string=False, pool=None
+    ):
+        """Retrieves the config from device"""
+        command = f"show {config}"
+        if params:
+            command += f" {params}"
+
+        result = await self.async_run_commands(command, "text", pool=pool)
+        if as_string:
+            return str(result[0]["output"]).strip()
+
+        return str(result[0]["output"]).split("\n")
+
+    async def async_enable(
+        self, commands, encoding="json", strict=False, send_enable=True, pool=None
+    ):
+        """Sends the array of commands to the node in enable mode"""
+        commands = list(make_iterable(commands))
+        responses = await self.async_run_commands(commands, encoding, send_enable, pool)
+        return [
+            {"command": command, "result": response, "encoding": encoding}
+            for command, response in zip(commands, responses)
+        ]
+
+    async def async_config(self, commands, pool=None):
+        """Configures the node with the specified commands"""
+        commands = ["configure"] + list(make_iterable(commands)) + ["end"]
+        result = await self.async_run_commands(commands, "json", True, pool)
+        return result[1:-1]
+
+    def run_commands(self, cmds, encoding="json", send_enable=True, **kwargs):
+        """Blocking version of async_run_commands"""
+        return asyncio.run(self.async_run_commands(cmds, encoding, send_enable))
+
+    def get_config(self, config="running-config", params=None, as_string=False):
+        """Blocking version of async_get_config"""
+        return asyncio.run(self.async_get_config(config, params, as_string))
+
+    def enable(self, commands, encoding="json", strict=False, send_enable=True, **kwargs):
+        """Blocking version of async_enable"""
+        return asyncio.run(self.async_enable(commands, encoding, strict, send_enable))
+
+    def config(self, commands, **kwargs):
+        """Blocking version of async_config"""
+        return asyncio.run(self.async_config(commands))
+
+    def transfer_file(self, src_file, dest_file, file_system, operation, sftp=False):
+        """Transfer the file to/from the dut"""
+        raise NotImplementedError("AsyncEapiConn does not implement transfer_file()")
+
+    def set_timeout(self, timeout):
+        """sets the seconds to wait for the response of the next requests"""
+        previous, self.timeout = self.timeout, timeout
+        return previous
+
+    def close(self):
+        """the connections to the device belong to the AsyncEapiPool of the
+        requests, which is closed by its owner"""
+
+
+class Capture:
+    """Capture of the calls made on the connections to a device and their
+    responses, stored as a json file per device in the capture directory.
+
+    Responses are kept in call order per call, replaying a call returns its
+    responses in the same order and repeats the last one. The output of each
+    show command is also kept on its own, so batches of commands which were
+    not recorded as such can be replayed.
+    """
+
+    _captures = {}
+    _lock = threading.Lock()
+
+    def __init__(self, capture_file, data=None):
+        self.capture_file = capture_file
+        self.data = data or {"attributes": {}, "calls": {}, "outputs": {}}
+        self._cursors = {}
+        self._lock = threading.RLock()
+
+    @classmethod
+    def open(cls, capture_dir, name, record=False):
+        """Returns the capture of a device, shared by all its connections.
+
+        Args:
+            capture_dir (str): directory of the capture files
+            name (str): name of the device
+            record (bool): start a new capture instead of loading one
+
+        Raises:
+            FileNotFoundError: there is no capture to replay for the device
+        """
+        capture_file = os.path.join(capture_dir, f"{name}.json")
+
+        with cls._lock:
+            if capture_file not in cls._captures:
+                data = None
+                if not record:
+                    with open(capture_file, "r", encoding="utf-8") as input_file:
+                        data = json.load(input_file)
+                elif not cls._captures:
+                    atexit.register(cls.save_all)
+                cls._captures[capture_file] = cls(capture_file, data)
+
+            return cls._captures[capture_file]
+
+    @classmethod
+    def save_all(cls):
+        """Writes the captures which were recorded"""
+        with cls._lock:
+            for capture in cls._captures.values():
+                if capture.data["calls"]:
+                    capture.save()
+
+    @staticmethod
+    def key(method, *args):
+        """Returns the key of a call"""
+        return json.dumps([method, *args], default=str)
+
+    def save(self):
+        """Writes the capture file"""
+        with self._lock:
+            os.makedirs(os.path.dirname(self.capture_file) or ".", exist_ok=True)
+            with open(self.capture_file, "w", encoding="utf-8") as output_file:
+                json.dump(self.data, output_file, default=str)
+
+    def record(self, key, response):
+        """Records the response of a call"""
+        with self._lock:
+            self.data["calls"].setdefault(key, []).append(response)
+
+    def record_output(self, cmd, encoding, output):
+        """Records the output of one show command"""
+        if isinstance(cmd, str):
+            with self._lock:
+                self.data["outputs"][f"{encoding}|{cmd}"] = output
+
+    def replay(self, key):
+        """Returns the next response of a call, None if it was not recorded"""
+        with self._lock:
+            responses = self.data["calls"].get(key)
+            if not responses:
+                return None
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+    def replay_output(self, cmd, encoding):
+        """Returns the output of one show command, None if it was not recorded"""
+        return self.data["outputs"].get(f"{encoding}|{cmd}")
+
+
+def error_to_response(err):
+    """Returns the recorded response of a call which raised err"""
+    error = {"type": type(err).__name__, "message": str(err)}
+    if isinstance(err, eapilib.CommandError):
+        error.update(
+            {
+                "message": err.error_text,
+                "code": err.error_code,
+                "command_error": err.command_error,
+                "output": err.output,
+                "commands": err.commands,
+            }
+        )
+    elif isinstance(err, CommandError):
+        error.update({"message": err.error_text, "commands": err.commands})
+    elif isinstance(err, eapilib.EapiError):
+        error["message"] = err.message
+    return {"error": error}
+
+
+def response_to_error(name, error):
+    """Returns the exception to raise when replaying a recorded error"""
+    if error["type"] == "CommandError" and "code" in error:
+        return eapilib.CommandError(
+            error["code"],
+            error["message"],
+            command_error=error.get("command_error"),
+            output=error.get("output"),
+            commands=error.get("commands"),
+        )
+    if error["type"] == "CommandError":
+        return CommandError(error["message"], error.get("commands"))
+    if error["type"] == "ConnectionError":
+        return eapilib.ConnectionError(name, error["message"])
+    return eapilib.EapiError(error["message"])
+
+
+class RecordingConn(DeviceConn):
+    """RecordingConn wraps a PyeapiConn or NetmikoConn and records the calls
+    made on it, and their responses, to a capture which ReplayConn serves
+    offline"""
+
+    def __init__(self, conn, capture_dir):
+        self._conn = conn
+        self.capture_dir = capture_dir
+        self.capture = None
+        self.session_log = None
+
+    def __getattr__(self, name):
+        # attributes which are not recorded, like platform, come from the wrapped conn
+        if name == "_conn":
+            raise AttributeError(name)
+        return getattr(self._conn, name)
+
+    def set_up_conn(self, device_data):
+        """Sets up the wrapped connection and opens the capture of the device"""
+        self._conn.set_up_conn(device_data)
+
+        self.session_log = device_data.get("session_log")
+        self.capture = Capture.open(self.capture_dir, device_data["name"], record=True)
+        for attribute in ("platform", "eos_version"):
+            if getattr(self._conn, attribute, None):
+                self.capture.data["attributes"][attribute] = getattr(self._conn, attribute)
+
+    def _record(self, key, call):
+        """Runs call on the wrapped connection and records its response"""
+        try:
+            response = call()
+        # pylint: disable-next=broad-exception-caught
+        except Exception as err:
+            self.capture.record(key, error_to_response(err))
+            raise
+        self.capture.record(key, {"result": response})
+        return response
+
+    def run_commands(self, cmds, encoding="json", send_enable=True, **kwargs):
+        """Runs the commands on the wrapped connection and records the outputs"""
+        commands = list(make_iterable(cmds))
+        output = self._record(
+            Capture.key("run_commands", commands, encoding),
+            lambda: self._conn.run_commands(cmds, encoding, send_enable, **kwargs),
+        )
+        for cmd, cmd_output in zip(commands, output):
+            self.capture.record_output(cmd, encoding, cmd_output)
+        return output
+
+    def get_config(self, config="running-config", params=None, as_string=False):
+        """Retrieves the config from the wrapped connection and records it"""
+        return self._record(
+            Capture.key("get_config", config, params, as_string),
+            lambda: self._conn.get_config(config, params, as_string),
+        )
+
+    def enable(self, commands, encoding="json", strict=False, send_enable=True, **kwargs):
+        """Runs the commands on the wrapped connection and records the results"""
+        results = self._record(
+            Capture.key("enable", list(make_iterable(commands)), encoding),
+            lambda: self._conn.enable(commands, encoding, strict, send_enable, **kwargs),
+        )
+        for result in results:
+            self.capture.record_output(result["command"], result["encoding"], result["result"])
+        return results
+
+    def config(self, commands, **kwargs):
+        """Configures the wrapped connection and records the response"""
+        return self._record(
+            Capture.key("config", list(make_iterable(commands))),
+            lambda: self._conn.config(commands, **kwargs),
+        )
+
+    def set_timeout(self, timeout):
+        """Sets the read timeout of the wrapped connection"""
+        return self._conn.set_timeout(timeout)
+
+    def transfer_file(self, src_file, dest_file, file_system, operation, sftp=False):
+        """Transfers the file over the wrapped connection and records the
+        result with the session log"""
+        key = Capture.key("transfer_file", src_file, dest_file, file_system, operation, sftp)
+        try:
+            result = self._conn.transfer_file(src_file, dest_file, file_system, operation, sftp)
+        # pylint: disable-next=broad-exception-caught
+        except Exception as err:
+            self.capture.record(key, error_to_response(err))
+            raise
+
+        session_log = ""
+        if self.session_log and os.path.exists(self.session_log):
+            with open(self.session_log, "r", encoding="utf-8") as log_file:
+                session_log = log_file.read()
+        self.capture.record(key, {"result": result, "session_log": session_log})
+        return result
+
+    def close(self):
+        """Closes the wrapped connection"""
+        self._conn.close()
+
+
+class ReplayConn(DeviceConn):
+    """ReplayConn serves the calls made on a connection from a capture
+    recorded by RecordingConn, without connecting to the device"""
+
+    def __init__(self, capture_dir):
+        self.capture_dir = capture_dir
+        self.capture = None
+        self.name = None
+        self.session_log = None
+
+    def set_up_conn(self, device_data):
+        """Opens the capture of the device"""
+        # pylint: disable=attribute-defined-outside-init
+        self.name = device_data["name"]
+        self.session_log = device_data.get("session_log")
+
+        try:
+            self.capture = Capture.open(self.capture_dir, self.name)
+        except (OSError, ValueError) as err:
+            raise eapilib.ConnectionError(
+                self.name, f"No capture of {self.name} to replay in {self.capture_dir}: {err}"
+            ) from err
+
+        self.platform = self.capture.data["attributes"].get("platform")
+        self.eos_version = self.capture.data["attributes"].get("eos_version")
+
+    def _replay(self, key):
+        """Returns the recorded response of a call, or raises the recorded error"""
+        response = self.capture.replay(key)
+        if response is not None and "error" in response:
+            raise response_to_error(self.name, response["error"])
+        return response
+
+    def _replay_outputs(self, commands, encoding):
+        """Returns the recorded outputs of the commands. Like eAPI, a command
+        without output fails with the outputs of the commands before it"""
+        outputs = []
+        for cmd in commands:
+            output = self.capture.replay_output(cmd, encoding)
+            if output is None:
+                raise eapilib.CommandError(
+                    1002,
+                    f"CLI command {len(outputs) + 1} of {len(commands)} '{cmd}' failed: "
+                    "no recorded output",
+                    command_error="no recorded output",
+                    output=[{}] + outputs + [{"errors": ["no recorded output"]}],
+                    commands=commands,
+                )
+            outputs.append(output)
+        return outputs
+
+    def run_commands(self, cmds, encoding="json", send_enable=True, **kwargs):
+        """Returns the recorded outputs of the commands"""
+        commands = list(make_iterable(cmds))
+        response = self._replay(Capture.key("run_commands", commands, encoding))
+        if response is not None:
+            return response["result"]
+        return self._replay_outputs(commands, encoding)
+
+    def get_config(self, config="running-config", params=None, as_string=False):
+        """Returns the recorded config"""
+        response = self._replay(Capture.key("get_config", config, params, as_string))
+        if response is None:
+            raise eapilib.EapiError(f"No recorded {config} of {self.name}")
+        return response["result"]
+
+    def enable(self, commands, encoding="json", strict=False, send_enable=True, **kwargs):
+        """Returns the recorded results of the commands"""
+        commands = list(make_iterable(commands))
+        response = self._replay(Capture.key("enable", commands, encoding))
+        if response is not None:
+            return response["result"]
+        return [
+            {"command": cmd, "result": output, "encoding": encoding}
+            for cmd, output in zip(commands, self._replay_outputs(commands, encoding))
+        ]
+
+    def config(self, commands, **kwargs):
+        """Returns the recorded response of the configuration"""
+        response = self._replay(Capture.key("config", list(make_iterable(commands))))
+        if response is None:
+            raise eapilib.EapiError(f"No recorded configuration {commands} of {self.name}")
+        return response["result"]
+
+    def transfer_file(self, src_file, dest_file, file_system, operation, sftp=False):
+        """Returns the recorded result of the transfer and writes the recorded
+        session log"""
+        response = self._replay(
+            Capture.key("transfer_file", src_file, dest_file, file_system, operation, sftp)
+        )
+        if response is None:
+            raise eapilib.EapiError(f"No recorded transfer of {src_file} on {self.name}")
+
+        if self.session_log:
+            os.makedirs(os.path.dirname(self.session_log) or ".", exist_ok=True)
+            with open(self.session_log, "w", encoding="utf-8") as log_file:
+                log_file.write(response.get("session_log", ""))
+        return response["result"]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2024, Arista Networks EOS+
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the Arista nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Content-addressed store of test evidence. Each evidence text is written
+once, to a file named after the sha256 digest of the text, and referenced
+by that digest from reports and result files instead of being copied into
+them. Report writers resolve the references back to the texts.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from vane.vane_logging import logging
+
+DEFAULT_EVIDENCE_DIR = "evidence"
+EVIDENCE_REF_PREFIX = "evidence:sha256:"
+EVIDENCE_REF_PATTERN = re.compile(f"{EVIDENCE_REF_PREFIX}[0-9a-f]{{64}}")
+
+
+def evidence_dir(parameters):
+    """Returns the directory of the evidence store
+
+    Args:
+        parameters (dict): parameters of the test definitions
+
+    Returns:
+        evidence_dir (str): directory of the evidence files
+    """
+    return parameters.get("evidence_dir", f"{parameters['report_dir']}/{DEFAULT_EVIDENCE_DIR}")
+
+
+class EvidenceStore:
+    """EvidenceStore keeps evidence texts in files named after their
+    sha256 digest, below a store directory"""
+
+    def __init__(self, store_dir):
+        """Initializes the store
+
+        Args:
+            store_dir (str): directory of the evidence files
+        """
+        self.store_dir = store_dir
+        self._digests = set()
+        self._texts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(text):
+        """Returns the sha256 digest of an evidence text"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def path(self, reference):
+        """Returns the file of an evidence reference"""
+        digest = reference[len(EVIDENCE_REF_PREFIX) :]
+        return os.path.join(self.store_dir, digest[:2], f"{digest}.txt")
+
+    def put(self, text):
+        """Stores an evidence text unless the same text is already stored
+
+        Args:
+            text (str): evidence text
+
+        Returns:
+            reference (str): reference of the evidence
+        """
+        digest = self.digest(text)
+        reference = f"{EVIDENCE_REF_PREFIX}{digest}"
+        evidence_file = self.path(reference)
+
+        with self._lock:
+            if digest not in self._digests and not os.path.exists(evidence_file):
+                os.makedirs(os.path.dirname(evidence_file), exist_ok=True)
+                # write a temporary file first, so readers never see a partial file
+                tmp_file = f"{evidence_file}.{os.getpid()}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as out_file:
+                    out_file.write(text)
+                os.replace(tmp_file, evidence_file)
+            self._digests.add(digest)
+
+        return reference
+
+    def get(self, reference):
+        """Returns the evidence text of a reference
+
+        Args:
+            reference (str): reference returned by put
+
+        Returns:
+            text (str): evidence text
+
+        Raises:
+            OSError: if the evidence is not in the store
+        """
+        if reference not in self._texts:
+            with open(self.path(reference), "r", encoding="utf-8") as evidence_file:
+                self._texts[reference] = evidence_file.read()
+
+        return self._texts[reference]
+
+    def resolve(self, data):
+        """Returns data with the evidence references in its strings replaced
+        by the evidence texts. Evidence which is missing from the store is
+        left as a reference.
+
+        Args:
+            data (any): dicts, lists and scalars of a test result
+
+        Returns:
+            data (any): data with the evidence texts
+        """
+        if isinstance(data, dict):
+            return {key: self.resolve(value) for key, value in data.items()}
+        if isinstance(data, list):
+            return [self.resolve(value) for value in data]
+        if isinstance(data, str) and EVIDENCE_REF_PREFIX in data:
+            return EVIDENCE_REF_PATTERN.sub(self._resolve_match, data)
+
+        return data
+
+    def _resolve_match(self, match):
+        """Returns the evidence text of a matched reference"""
+        try:
+            return self.get(match.group(0))
+        except OSError as err:
+            logging.error(f"Evidence {match.group(0)} not found in {self.store_dir}: {err}")
+            return match.group(0)
+
+
+def is_reference(value):
+    """Returns True if the value is an evidence reference"""
+    return isinstance(value, str) and value.startswith(EVIDENCE_REF_PREFIX)
@@ -38,6 +38,7 @@ Fixture setup and teardown functions
 """
 
 import datetime
+import os
 import re
 import pytest
 
@@ -362,6 +363,38 @@ def read_test_id(report):
     return ""
 
 
+def pytest_collection_modifyitems(items):
+    """Parse the test steps of the collected test functions once, before
+    the test cases run on every dut
+
+    Args:
+        items: collected pytest items
+    """
+
+    for item in items:
+        func = getattr(item, "function", None)
+        if func is None:
+            continue
+        try:
+            tests_tools.return_test_steps(func)
+        except (OSError, TypeError) as err:
+            logging.debug(f"No test steps parsed for {item.nodeid}: {err}")
+
+
+def pytest_sessionfinish(session):
+    """Write the results still queued on the background result writer, so
+    they are complete before reports are generated, and close the pooled
+    connections
+
+    Args:
+        session: pytest session
+    """
+
+    logging.debug(f"Test session finished with exit status {session.exitstatus}")
+    tests_tools.close_result_writer()
+    tests_tools.close_connection_pool()
+
+
 def pytest_html_results_table_header(cells):
     """Create custom PyTest-HTML Header Row
 
@@ -407,3 +440,28 @@ def pytest_runtest_makereport(item):
         report.description = str(item.function.__doc__)
     else:
         report.description = "No Description"
+
+    add_evidence_links(item, report)
+
+
+def add_evidence_links(item, report):
+    """Link the evidence stored by reference during a test to its HTML
+    report row
+
+    Args:
+        item: pytest item of the test
+        report: pytest report of the test phase
+    """
+
+    links = tests_tools.pop_evidence_links()
+    html_plugin = item.config.pluginmanager.getplugin("html")
+    html_path = getattr(item.config.option, "htmlpath", None)
+    if not links or not html_plugin or not html_path:
+        return
+
+    html_dir = os.path.dirname(os.path.abspath(html_path))
+    extra = getattr(report, "extra", [])
+    for name, evidence_file in links:
+        evidence_url = os.path.relpath(os.path.abspath(evidence_file), html_dir)
+        extra.append(html_plugin.extras.url(evidence_url, name=name))
+    report.extra = extra
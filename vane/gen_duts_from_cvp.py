@@ -40,7 +40,6 @@ Run: python3 gen_duts_from_cvp.py
 
 import argparse
 import sys
-import yaml
 import urllib3
 import pyeapi
 from cvprac.cvp_client import CvpClient
@@ -51,6 +50,7 @@ from cvprac.cvp_client_errors import (
     CvpSessionLogOutError,
 )
 from requests.exceptions import HTTPError, ReadTimeout, Timeout, TooManyRedirects
+from vane import yaml_io
 from vane.vane_logging import logging
 
 
@@ -135,7 +135,7 @@ def create_duts_file_from_cvp(cvp_ip, cvp_username, cvp_password, duts_file_name
     if dut_properties:
         dut_file.update({"duts": dut_properties})
         with open(duts_file_name, "w", encoding="utf-8") as yamlfile:
-            yaml.dump(dut_file, yamlfile, sort_keys=False)
+            yaml_io.dump(dut_file, yamlfile, sort_keys=False)
             logging.info(f"Yaml file {duts_file_name} created")
             print(f"Yaml file {duts_file_name} created")
 
@@ -32,16 +32,25 @@
 
 """Utilities for using PyTest in network testing"""
 
+import concurrent.futures
+import io
 import json
+import multiprocessing
 import os
 import re
-import yaml
+import shutil
+import sys
+import tempfile
+import zipfile
 import docx
+import yaml
+from lxml import etree
 from tqdm import tqdm
 from docx.oxml.ns import qn, nsdecls
 from docx.oxml import OxmlElement, parse_xml
+from docx.table import _Row
 from docx.shared import Inches, Pt, RGBColor
-from docx.table import Table
+from vane import evidence_store, result_writer, yaml_io
 from vane.report_templates import REPORT_TEMPLATES
 from vane.tests_tools import yaml_read
 from vane.vane_logging import logging
@@ -57,44 +66,204 @@ TOTAL_SKIPPED = "Total Skipped"
 YELLOW = "\x1b[33m"
 GREEN = "\x1b[32m"
 DEFAULT = "\033[0m"
+PROGRESS_FORMAT = (
+    f"{YELLOW}{{desc}}: {{percentage:.0f}}%| {GREEN}{{bar}}{YELLOW} |"
+    f"elapsed time: {{elapsed}} | remaining time: {{remaining}}{DEFAULT}"
+)
+# result files are parsed by a process pool from this number of files on,
+# with one worker per MIN_PARALLEL_RESULT_FILES files up to one per cpu
+MIN_PARALLEL_RESULT_FILES = 64
+# dut sections of the detailed report held in memory before being written out
+DETAIL_PART_SECTIONS = 200
+# comment in the body of the report where the detailed report is streamed in
+DETAIL_REPORT_MARKER = "vane detailed report"
+# dut name between the brackets of a pytest test name
+DUT_NAME_PATTERN = re.compile(r"\[(.*)\]")
+# pytest outcome -> key of the dut totals
+DUT_OUTCOMES = {"passed": "PASS", "failed": "FAIL", "skipped": "SKIP", "error": "ERROR"}
+# test result -> key of the test suite and test case totals
+RESULT_TOTALS = {"PASS": "total_pass", "FAIL": "total_fail", "SKIP": "total_skip"}
+
+
+class TableBuilder:
+    """Builds a Word doc table row by row
+
+    python-docx finds the rows and cells of a table by walking its xml, so
+    table.rows[row], table.cell(row, column) and even table.add_row() get
+    slower as the table grows. The builder keeps the column widths of the
+    table and the cells of the rows it adds, so adding a row and looking up
+    one of its cells take constant time.
+    """
 
+    def __init__(self, document, rows, cols, style=TABLE_GRID):
+        """Add a table to the Word doc
 
-class CachedTable(Table):
-    """Caches Docx table in memory
-    Args:
-        Table(obj): Fully defined table
-    """
+        Args:
+            document (obj): Word doc to add the table to
+            rows (int): Number of rows to start with
+            cols (int): Number of columns
+            style (str, optional): Table style. Defaults to TABLE_GRID.
+        """
+
+        self.table = document.add_table(rows=0, cols=cols, style=style)
+        # pylint: disable-next=protected-access
+        self._widths = [grid_col.w for grid_col in self.table._tbl.tblGrid.gridCol_lst]
+        self._rows = []
+        for _ in range(rows):
+            self.add_row()
+
+    def add_row(self):
+        """Add a row at the bottom of the table
+
+        Returns:
+            tuple: Cells of the row
+        """
+
+        # pylint: disable-next=protected-access
+        row = self.table._tbl.add_tr()
+        for width in self._widths:
+            cell = row.add_tc()
+            if width is not None:
+                cell.width = width
+        cells = _Row(row, self.table).cells
+        self._rows.append(cells)
+
+        return cells
+
+    def cell(self, row, column):
+        """Return the cell of the table at row, column
 
-    def __init__(self, tbl, parent):
-        """Initialize CachedTable instance
         Args:
-            tbl(obj), Cached table
-            parent(obj), Parent object
+            row (int): Row number in table
+            column (int): Column number in table
+
+        Returns:
+            obj: Word doc obj representing a table cell
         """
 
-        super(Table, self).__init__(parent)
-        self._element = self._tbl = tbl
-        self._cached_cells = None
+        return self._rows[row][column]
+
+
+class ResultsSummary:
+    """Rollups of the test results shared by the report writers
 
-    @property
-    def _cells(self):
-        """Cache table cells"""
+    The pytest json report and the results data model are each walked once,
+    when they are added, into totals per outcome, dut, test suite and test
+    case. The report writers read these instead of walking the results again.
+
+    The html and json reports are not written from it. They are written by
+    the pytest-html and pytest-json plugins while the tests run, before the
+    results are compiled, and vane computes no totals for them.
+    """
 
-        if self._cached_cells is None:
-            # pylint: disable-next=super-with-arguments
-            self._cached_cells = super(CachedTable, self)._cells
-        return self._cached_cells
+    def __init__(self):
+        """Initialize an empty summary"""
+
+        # summary of the pytest json report
+        self.totals = {}
+        # dut name -> totals of its test cases in the pytest json report
+        self.duts = {}
+        # totals of all the results
+        self.outcomes = self._new_totals("all")
+        # test suite name -> totals of its results
+        self.suites = {}
+        # (test suite name, test case name) -> totals of its results
+        self.test_cases = {}
+        # (test suite name, test case name, test parameters, test result) of
+        # each result, in report order
+        self.results = []
 
     @staticmethod
-    def transform(table):
-        """Create cached table
+    def _new_totals(name):
+        """Return zeroed totals of test results
+
         Args:
-            Table(obj): Fully defined table
+            name (str): Name of what is totalled
+
+        Returns:
+            dict: Totals of tests, passes, failures and skips
         """
 
-        # pylint: disable-next=protected-access
-        cached_table = CachedTable(table._tbl, table._parent)
-        return cached_table
+        return {"name": name, "total_tests": 0, "total_pass": 0, "total_fail": 0, "total_skip": 0}
+
+    @staticmethod
+    def test_result(test_parameters):
+        """Return the test result of a dut: SKIP, PASS or FAIL
+
+        Args:
+            test_parameters (dict): data struct representing a test case
+
+        Returns:
+            str: Test result
+        """
+
+        if test_parameters["skip"]:
+            return "SKIP"
+        if test_parameters["test_result"]:
+            return "PASS"
+        return "FAIL"
+
+    def add_json_report(self, report):
+        """Add the totals of a pytest json report
+
+        Args:
+            report (dict): report of the pytest json report
+        """
+
+        self.totals = report["summary"]
+
+        for testcase in report["tests"]:
+            match = DUT_NAME_PATTERN.search(testcase["name"])
+            if not match:
+                continue
+
+            dut_name = match.group(1)
+            dut_totals = self.duts.get(dut_name)
+            if dut_totals is None:
+                dut_totals = self.duts[dut_name] = {
+                    "PASS": 0,
+                    "FAIL": 0,
+                    "SKIP": 0,
+                    "ERROR": 0,
+                    "TOTAL": 0,
+                    "name": dut_name,
+                }
+
+            outcome = DUT_OUTCOMES.get(testcase["outcome"])
+            if outcome:
+                dut_totals[outcome] += 1
+            dut_totals["TOTAL"] += 1
+
+        logging.debug(f"DUT compiled results: {self.duts}")
+
+    def add_results(self, results_datamodel):
+        """Add the totals of a results data model
+
+        Args:
+            results_datamodel (dict): test suites, test cases and their dut results
+        """
+
+        for test_suite in results_datamodel["test_suites"]:
+            suite_name = test_suite["name"]
+            suite_totals = self.suites.setdefault(suite_name, self._new_totals(suite_name))
+
+            for test_case in test_suite["test_cases"]:
+                tc_name = test_case["name"]
+                tc_totals = self.test_cases.setdefault(
+                    (suite_name, tc_name), self._new_totals(tc_name)
+                )
+
+                for dut in test_case["duts"]:
+                    test_result = self.test_result(dut)
+                    result_total = RESULT_TOTALS[test_result]
+
+                    for totals in (self.outcomes, suite_totals, tc_totals):
+                        totals["total_tests"] += 1
+                        totals[result_total] += 1
+
+                    self.results.append((suite_name, tc_name, dut, test_result))
+
+        logging.debug(f"Compiled suite results: {self.suites}")
 
 
 # pylint: disable=too-few-public-methods
@@ -111,6 +280,7 @@ class ReportClient:
         logging.info("Reading YAML data-model and converting into a Python data structure")
         self.data_model = yaml_read(test_definition)
         logging.debug(f"Internal test data-model initialized with value: {self.data_model}")
+        self._results_summary = ResultsSummary()
         self._summary_results = self._compile_test_results()
         logging.debug(f"Test Results: {self._summary_results}")
 
@@ -120,13 +290,20 @@ class ReportClient:
             "generate_detailed_report", False  # If not specified, generate only summary
         )
         self._results_datamodel = None
+        # test suite name -> (test suite of _results_datamodel, test case
+        # name -> (test case of _results_datamodel, names of its duts))
+        self._results_index = {}
+        self._evidence_store = evidence_store.EvidenceStore(
+            evidence_store.evidence_dir(self.data_model["parameters"])
+        )
         self._compile_yaml_data(_results_dir)
         logging.debug(f"Results file data is {self._results_datamodel}")
+        if self._results_datamodel:
+            self._results_summary.add_results(self._results_datamodel)
 
-        self._document = docx.Document()
-        section = self._document.sections[0]
-        section.left_margin = Inches(0.5)
-        section.right_margin = Inches(0.5)
+        self._document = self._new_document()
+        # temporary file the body XML of the detailed report is written to
+        self._detail_file = None
         self._major_section = 1
         self._test_no = 1
 
@@ -148,17 +325,71 @@ class ReportClient:
 
         logging.debug(f"yaml input files are {yaml_files}")
 
-        for name in yaml_files:
-            if "result-" in name:
-                yaml_file = f"{yaml_dir}/{name}"
-                yaml_data = yaml_read(yaml_file)
+        result_files = [
+            f"{yaml_dir}/{name}"
+            for name in yaml_files
+            if "result-" in name and not result_writer.is_results_store(name)
+        ]
+        results_data = self._load_result_files(result_files)
 
-                self._reconcile_results(yaml_data)
-            else:
-                logging.error(f"Incorrect filename: {name}")
+        with tqdm(
+            total=len(yaml_files),
+            desc="Compiling test results",
+            unit="file",
+            bar_format=PROGRESS_FORMAT,
+        ) as pbar:
+            for name in yaml_files:
+                if result_writer.is_results_store(name):
+                    for test_parameters in result_writer.read_results_store(f"{yaml_dir}/{name}"):
+                        self._reconcile_results(self._evidence_store.resolve(test_parameters))
+                elif "result-" in name:
+                    yaml_data = next(results_data)
+
+                    self._reconcile_results(self._evidence_store.resolve(yaml_data))
+                else:
+                    logging.error(f"Incorrect filename: {name}")
+                pbar.update(1)
 
         logging.debug(f"Updated results_data to {self._results_datamodel}")
 
+    def _load_result_files(self, result_files):
+        """Parse the result files. From MIN_PARALLEL_RESULT_FILES files on,
+        they are parsed by a pool of report_workers spawned processes. By
+        default there is one worker per MIN_PARALLEL_RESULT_FILES files, up
+        to one per cpu.
+
+        Workers are spawned rather than forked, as this process runs threads.
+        They run yaml_io.load_file, which does not log, and a file which is
+        not valid YAML ends the report as yaml_read does.
+
+        Args:
+            result_files (list): paths of the result files
+
+        Returns:
+            results_data (iterator): data of each result file, in order
+        """
+        workers = self.data_model["parameters"].get("report_workers") or min(
+            os.cpu_count() or 1, len(result_files) // MIN_PARALLEL_RESULT_FILES
+        )
+
+        if workers <= 1 or len(result_files) < MIN_PARALLEL_RESULT_FILES:
+            yield from map(yaml_read, result_files)
+            return
+
+        logging.info(f"Parsing {len(result_files)} result files with {workers} processes")
+        chunksize = max(1, len(result_files) // (workers * 4))
+
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                yield from executor.map(yaml_io.load_file, result_files, chunksize=chunksize)
+        except yaml.YAMLError as err:
+            print(">>> ERROR IN YAML FILE")
+            logging.error(f"ERROR IN YAML FILE: {err}")
+            logging.error("EXITING TEST RUNNER")
+            sys.exit(1)
+
     def _reconcile_results(self, test_parameters):
         """Validate test case results data and reconciles any missing data
 
@@ -176,56 +407,33 @@ class ReportClient:
         )
 
         if not self._results_datamodel:
-            self._results_datamodel = {
-                "test_suites": [
-                    {
-                        "name": test_suite,
-                        "test_cases": [{"name": test_case, "duts": []}],
-                    }
-                ]
-            }
-
-        logging.debug(f"\n\n\rFound the Index for test suite: {test_suite} on dut {dut_name}\n\n\r")
-        logging.debug(self._results_datamodel["test_suites"])
-        test_suites = [param["name"] for param in self._results_datamodel["test_suites"]]
+            self._results_datamodel = {"test_suites": []}
+            self._results_index = {}
 
-        if test_suite in test_suites:
-            suite_index = test_suites.index(test_suite)
-            logging.debug(f"Test suite {test_suite} exists in results file at index {suite_index}")
+        suite_entry = self._results_index.get(test_suite)
+        if suite_entry:
+            logging.debug(f"Test suite {test_suite} exists in results file")
         else:
             logging.info(f"Creating test suite {test_suite} in results file")
             suite_stub = {"name": test_suite, "test_cases": []}
             self._results_datamodel["test_suites"].append(suite_stub)
-            suite_index = len(self._results_datamodel["test_suites"]) - 1
+            suite_entry = self._results_index[test_suite] = (suite_stub, {})
+        suite_stub, test_cases = suite_entry
 
-        test_cases = [
-            param["name"]
-            for param in self._results_datamodel["test_suites"][suite_index]["test_cases"]
-        ]
-
-        if test_case in test_cases:
-            test_index = test_cases.index(test_case)
-            logging.debug(f"Test case {test_case} exists in results file at index {test_index}")
+        test_entry = test_cases.get(test_case)
+        if test_entry:
+            logging.debug(f"Test case {test_case} exists in results file")
         else:
             logging.info(f"Creating test case {test_case} in results file")
             test_stub = {"name": test_case, "duts": []}
-            self._results_datamodel["test_suites"][suite_index]["test_cases"].append(test_stub)
-            test_index = len(self._results_datamodel["test_suites"][suite_index]["test_cases"]) - 1
-
-        logging.debug(f"Find Index for dut {dut_name}")
-        duts = [
-            param["dut"]
-            for param in self._results_datamodel["test_suites"][suite_index]["test_cases"][
-                test_index
-            ]["duts"]
-        ]
+            suite_stub["test_cases"].append(test_stub)
+            test_entry = test_cases[test_case] = (test_stub, set())
+        test_stub, duts = test_entry
 
         if dut_name not in duts:
-            logging.debug(
-                f"Add DUT {dut_name} to test case {test_case} with parameters {test_parameters}"
-            )
-            yaml_ptr = self._results_datamodel["test_suites"][suite_index]
-            yaml_ptr["test_cases"][test_index]["duts"].append(test_parameters)
+            logging.debug(f"Add DUT {dut_name} to test case {test_case}")
+            duts.add(dut_name)
+            test_stub["duts"].append(test_parameters)
 
     def write_result_doc(self):
         """Create MSFT docx with results"""
@@ -242,7 +450,54 @@ class ReportClient:
         reports_dir = self._reports_dir
         file_name = f"{reports_dir}/report_{file_date}.docx"
         logging.info(f"Writing docx report to file: {file_name}")
-        self._document.save(file_name)
+        self._save_document(file_name)
+
+    def _save_document(self, file_name):
+        """Save the report, streaming the detailed report written to disk
+        into the body of the report in place of its marker comment
+
+        Args:
+            file_name (str): File name of the report
+        """
+
+        if self._detail_file is None:
+            self._document.save(file_name)
+            return
+
+        marker = etree.tostring(etree.Comment(DETAIL_REPORT_MARKER))
+        report = io.BytesIO()
+        self._document.save(report)
+
+        try:
+            with zipfile.ZipFile(report) as report_zip, zipfile.ZipFile(
+                file_name, "w", zipfile.ZIP_DEFLATED
+            ) as docx_zip:
+                for info in report_zip.infolist():
+                    data = report_zip.read(info)
+                    if info.filename != "word/document.xml":
+                        docx_zip.writestr(info, data)
+                        continue
+
+                    head, tail = data.split(marker)
+                    with docx_zip.open(info.filename, "w", force_zip64=True) as document_xml:
+                        document_xml.write(head)
+                        self._detail_file.seek(0)
+                        shutil.copyfileobj(self._detail_file, document_xml)
+                        document_xml.write(tail)
+        finally:
+            self._detail_file.close()
+            self._detail_file = None
+
+    @staticmethod
+    def _new_document():
+        """Return a new Word doc with the page layout of the report"""
+
+        document = docx.Document()
+        section = document.sections[0]
+        section.left_margin = Inches(0.5)
+        section.right_margin = Inches(0.5)
+
+        return document
 
     def _write_title_page(self):
         """Write report title page"""
@@ -304,7 +559,7 @@ class ReportClient:
 
         logging.info("Creating total test case summary results table")
         self._document.add_heading(f"{self._major_section}.1 Summary Results", 2)
-        table = self._document.add_table(rows=1, cols=6, style="Table Grid")
+        table = TableBuilder(self._document, rows=1, cols=6)
         headers = [
             TOTAL_TESTS,
             TOTAL_PASSED,
@@ -317,7 +572,7 @@ class ReportClient:
         for column, header in enumerate(headers):
             self._write_cell(table, header.upper(), column, 0, "Arial", 9, True, "00FFFF")
 
-        _ = table.add_row().cells
+        table.add_row()
         data_row = []
         ptr = self._summary_results["summaryResults"]
         data_row.append(self._totals(ptr, "num_tests"))
@@ -339,7 +594,7 @@ class ReportClient:
             2,
         )
 
-        table = self._document.add_table(rows=1, cols=6, style="Table Grid")
+        table = TableBuilder(self._document, rows=1, cols=6)
         headers = ["DUT", TOTAL_TESTS, TOTAL_PASSED, TOTAL_FAILED, TOTAL_SKIPPED, "Total Errored"]
 
         for column, header in enumerate(headers):
@@ -349,7 +604,7 @@ class ReportClient:
 
         for row, dut in enumerate(duts):
             logging.debug(f"Creating dut summary row: {row+1}")
-            _ = table.add_row().cells
+            table.add_row()
             data_row = []
 
             data_row.append(self._totals(dut, "name"))
@@ -372,14 +627,14 @@ class ReportClient:
             logging.warning("Skipping the test suite results")
             return
 
-        table = self._document.add_table(rows=1, cols=5, style="Table Grid")
+        table = TableBuilder(self._document, rows=1, cols=5)
         headers = ["Test Suite", TOTAL_TESTS, TOTAL_PASSED, TOTAL_FAILED, TOTAL_SKIPPED]
 
         for column, header in enumerate(headers):
             self._write_cell(table, header.upper(), column, 0, "Arial", 9, True, "00FFFF")
 
         for row, suite_result in enumerate(suite_results):
-            _ = table.add_row().cells
+            table.add_row()
             data_row = []
             ts_name = self._format_ts_name(suite_result["name"])
             logging.debug(f"Writing row {row+1}")
@@ -404,60 +659,15 @@ class ReportClient:
         with open(json_report, "r", encoding="utf-8") as json_file:
             logging.debug(f"Raw json report is {json_file}")
             test_data = json.load(json_file)
-            tests = test_data["report"]["tests"]
             logging.debug(f"Structured json report is {test_data}")
 
-            summary = test_data["report"]["summary"]
-            test_results["summaryResults"] = summary
-            logging.debug(f"Summary for test cases are {summary}")
-            test_results["duts"] = self._parse_testcases(tests)
+            self._results_summary.add_json_report(test_data["report"])
+            test_results["summaryResults"] = self._results_summary.totals
+            logging.debug(f"Summary for test cases are {self._results_summary.totals}")
+            test_results["duts"] = list(self._results_summary.duts.values())
 
         return test_results
 
-    def _parse_testcases(self, testcases):
-        """Parse Test cases and return compilation per DUT
-
-        Args:
-            testcases (dict): data structure of test case results
-
-        Returns:
-            dict: data structure with compiled results
-        """
-        testcases_results = []
-        dut_list = []
-
-        for testcase in testcases:
-            if re.search(r"\[.*\]", testcase["name"]):
-                dut_name = re.findall(r"\[.*\]", testcase["name"])[0][1:-1]
-                test_result = testcase["outcome"]
-
-                if dut_name not in dut_list:
-                    dut_list.append(dut_name)
-                    testcases_results.append({})
-                    testcases_results[-1]["PASS"] = 0
-                    testcases_results[-1]["FAIL"] = 0
-                    testcases_results[-1]["SKIP"] = 0
-                    testcases_results[-1]["ERROR"] = 0
-                    testcases_results[-1]["TOTAL"] = 0
-
-                dut_index = dut_list.index(dut_name)
-                testcases_results[dut_index]["name"] = dut_name
-
-                if test_result == "passed":
-                    testcases_results[dut_index]["PASS"] += 1
-                elif test_result == "failed":
-                    testcases_results[dut_index]["FAIL"] += 1
-                elif test_result == "skipped":
-                    testcases_results[dut_index]["SKIP"] += 1
-                elif test_result == "error":
-                    testcases_results[dut_index]["ERROR"] += 1
-
-                testcases_results[dut_index]["TOTAL"] += 1
-
-        logging.debug(f"DUT compiled results: {testcases_results}")
-
-        return testcases_results
-
     def _totals(self, ptr, ptr_key):
         """Test for a key in dictionary.  If key exists return key and if key is
             missing return 0
@@ -530,10 +740,7 @@ class ReportClient:
             return
 
         columns = len(summary_headers)
-        rows = len(testcase_results) + 1
-        table = CachedTable.transform(
-            self._document.add_table(rows=rows, cols=columns, style="Table Grid")
-        )
+        table = TableBuilder(self._document, rows=0, cols=columns)
 
         self._create_header_row(table, summary_headers, report_template)
         self._create_data_row(table, testcase_results, report_template)
@@ -542,12 +749,13 @@ class ReportClient:
         """Writes header row within Word doc table
 
         Args:
-            table (obj): Word doc obj representing a tables
+            table (TableBuilder): Word doc table to add the header row to
             testcase_results (dict): Data structure with test case results
             report_template (dict): Data structure describing reports fields
         """
         headers = []
         row = 0
+        table.add_row()
 
         for summary_header in summary_headers:
             logging.debug(f"summary header info: {summary_header}")
@@ -567,12 +775,13 @@ class ReportClient:
         """Writes a data row within Word doc table
 
         Args:
-            table (obj): Word doc obj representing a tables
+            table (TableBuilder): Word doc table to add the data rows to
             testcase_results (dict): Data structure with test case results
             report_template (dict): Data structure describing reports fields
         """
 
         for row, testcase_result in enumerate(testcase_results):
+            table.add_row()
             for column, testcase_data in enumerate(testcase_result):
                 logging.debug(
                     f"Writing test field: {testcase_data}"
@@ -609,7 +818,7 @@ class ReportClient:
         """Writes a cell within Word doc table
 
         Args:
-            table (obj): Word doc obj representing a table
+            table (TableBuilder): Word doc table
             text (str): Text to output in table cell
             column (int): Column number in table cell
             row (int): Row number in table cell
@@ -620,7 +829,8 @@ class ReportClient:
             format (str, optional): Style of outputting text in table cell. Defaults to "string".
             text_color (obj, optional): Text output color. Defaults to None
         """
-        para = table.rows[row].cells[column].paragraphs[0]
+        cell = table.cell(row, column)
+        para = cell.paragraphs[0]
         logging.debug(f"Added cell ({row}, {column}) to report with value: {text}")
 
         if data_format == "numbered_list":
@@ -647,8 +857,6 @@ class ReportClient:
             )
 
         if color:
-            cell = table.cell(row, column)
-
             color = parse_xml(
                 # pylint: disable-next=consider-using-f-string
                 r'<w:shd {} w:fill="{}"/>'.format(nsdecls("w"), color)
@@ -736,26 +944,17 @@ class ReportClient:
             return None
 
         tbl_headers = summary_headers.keys()
-        test_suites = self._results_datamodel["test_suites"]
         testcase_results = []
 
-        for test_suite in test_suites:
-            test_cases = test_suite["test_cases"]
-
-            for test_case in test_cases:
-                tc_name = self._format_tc_name(test_case["name"])
-                logging.info(f"Compiling results for test case {tc_name}")
-                duts = test_case["duts"]
-
-                for dut in duts:
-                    testcase_result = {}
+        for _, _, dut, _ in self._results_summary.results:
+            testcase_result = {}
 
-                    for tbl_header in tbl_headers:
-                        tbl_value = self._return_tbl_value(dut, tbl_header)
-                        testcase_result[tbl_header] = tbl_value
+            for tbl_header in tbl_headers:
+                tbl_value = self._return_tbl_value(dut, tbl_header)
+                testcase_result[tbl_header] = tbl_value
 
-                    logging.debug(f"Compiled DUT results: {testcase_result}")
-                    testcase_results.append(testcase_result)
+            logging.debug(f"Compiled DUT results: {testcase_result}")
+            testcase_results.append(testcase_result)
 
         logging.info("Returning testcase result")
         logging.debug(f"Returning testcase result {testcase_results}")
@@ -792,11 +991,10 @@ class ReportClient:
             logging.warning("Skipping the summary testcase report")
             return
 
-        table = self._document.add_table(rows=1, cols=7)
-        table.style = TABLE_GRID
+        table = TableBuilder(self._document, rows=0, cols=7)
         test_num = 1
 
-        hdr_cells = table.rows[0].cells
+        hdr_cells = table.add_row()
         hdr_cells[0].text = "Serial No"
         hdr_cells[1].text = "Test Id"
         hdr_cells[2].text = "Test Suite"
@@ -806,7 +1004,7 @@ class ReportClient:
         hdr_cells[6].text = "Failure or Skip Reason"
 
         for testcase_result in testcase_results:
-            row_cells = table.add_row().cells
+            row_cells = table.add_row()
             row_cells[0].text = str(test_num)
             row_cells[1].text = str(testcase_result["test_id"])
             row_cells[2].text = str(testcase_result["test_suite"])
@@ -836,31 +1034,61 @@ class ReportClient:
                 for dut in test_case["duts"]:
                     total_dut_sections += 1
 
-        custom_format = (
-            f"{YELLOW}{{desc}}: {{percentage:.0f}}%| {GREEN}{{bar}}{YELLOW} |"
-            f"elapsed time: {{elapsed}} | remaining time: {{remaining}}{DEFAULT}"
-        )
+        # the detailed report is written in parts, each in a Word doc of its
+        # own whose body XML is written to a temporary file, then streamed
+        # into the body of the report when it is saved, so no more than one
+        # part of the detailed report is held in memory
+        report_document = self._document
+        report_document.element.body.sectPr.addprevious(etree.Comment(DETAIL_REPORT_MARKER))
+        self._detail_file = tempfile.TemporaryFile()
+        self._document = self._new_document()
 
         with tqdm(
             total=total_dut_sections,
             desc="Writing detailed report",
             unit="iteration",
-            bar_format=custom_format,
+            bar_format=PROGRESS_FORMAT,
         ) as pbar:
-            for test_suite in test_suites:
-                self._write_detail_major_section(test_suite)
-                minor_section = 1
+            try:
+                for test_suite in test_suites:
+                    self._write_detail_major_section(test_suite)
+                    minor_section = 1
+
+                    for test_case in test_suite["test_cases"]:
+                        self._write_detail_minor_section(test_case, minor_section)
+                        dut_section = 1
+
+                        for dut in test_case["duts"]:
+                            self._write_detail_dut_section(dut, minor_section, dut_section)
+                            dut_section += 1
+                            pbar.update(1)
+                            if pbar.n % DETAIL_PART_SECTIONS == 0:
+                                self._write_detail_part()
+                        minor_section += 1
+                    self._major_section += 1
+
+                self._write_detail_part()
+            finally:
+                self._document = report_document
+
+    def _write_detail_part(self):
+        """Write the body XML of the current part of the detailed report to
+        the temporary file of the detailed report, and start a new part.
+        Parts use the template of the report and add no images or links, so
+        their namespaces, styles and numbering are those of the report and
+        they hold no relationships.
+        """
 
-                for test_case in test_suite["test_cases"]:
-                    self._write_detail_minor_section(test_case, minor_section)
-                    dut_section = 1
+        body = self._document.element.body
+        body.remove(body.sectPr)
+        if len(body):
+            # namespaces are declared on the body, and by the document
+            # element of the report, so only the children of the body are
+            # written
+            body_xml = etree.tostring(body, encoding="UTF-8")
+            self._detail_file.write(body_xml[body_xml.index(b">") + 1 : body_xml.rindex(b"<")])
 
-                    for dut in test_case["duts"]:
-                        self._write_detail_dut_section(dut, minor_section, dut_section)
-                        dut_section += 1
-                        pbar.update(1)
-                    minor_section += 1
-                self._major_section += 1
+        self._document = self._new_document()
 
     def _write_detail_major_section(self, test_suite):
         """Write detailed major report section
@@ -1094,7 +1322,7 @@ class ReportClient:
 
         if report_field in dut:
             report_value = dut[report_field]
-            formatted_data = yaml.dump(report_value)
+            formatted_data = yaml_io.dump(report_value)
             logging.debug(f"Data formatted to YAML: {formatted_data}")
             para = self._document.add_paragraph()
             self._write_text(para, formatted_data.strip(), left_indent=Inches(0.25))
@@ -1147,7 +1375,7 @@ class ReportClient:
         """
 
         if report_field in dut and "show_cmds" in dut:
-            table = self._document.add_table(rows=1, cols=1, style="Table Grid")
+            table = TableBuilder(self._document, rows=1, cols=1)
 
             show_cmd_txts = dut["show_cmd_txts"]
             show_cmds = dut["show_cmds"]
@@ -1155,7 +1383,7 @@ class ReportClient:
             for dut_name in show_cmds.keys():
                 for command, text in zip(show_cmds.get(dut_name), show_cmd_txts.get(dut_name)):
                     if index != 0:
-                        _ = table.add_row().cells
+                        table.add_row()
                     config_output = f"\n{dut_name}# {command}\n\n{text}\n"
                     self._write_cell(
                         table,
@@ -1184,14 +1412,14 @@ class ReportClient:
 
         # If external command outputs are present then update docx report with the same.
         if external_cmd_txts:
-            table = self._document.add_table(rows=1, cols=1, style="Table Grid")
+            table = TableBuilder(self._document, rows=1, cols=1)
 
             index = 0
             # Iterating over each item(key-value pair) in external_cmd_txts
             for dut_name, details in external_cmd_txts.items():
                 for command, output in details.items():
                     if index != 0:
-                        _ = table.add_row().cells
+                        table.add_row()
                     config_output = f"\n{dut_name}# {command}\n\n{output}\n"
 
                     # Writing the formatted output into a cell in docx report
@@ -1223,36 +1451,7 @@ class ReportClient:
             logging.warning("Skipping the compiled test suite result")
             return ""
 
-        test_suites = self._results_datamodel["test_suites"]
-        suite_results = []
-
-        for test_suite in test_suites:
-            suite_result = {}
-            suite_result["total_tests"] = 0
-            suite_result["total_pass"] = 0
-            suite_result["total_fail"] = 0
-            suite_result["total_skip"] = 0
-            suite_result["name"] = test_suite["name"]
-
-            suite_name = suite_result["name"]
-            logging.warning(
-                "Zeroing test_suite results for test suite: "
-                f"{suite_name} and data: {suite_result}"
-            )
-
-            for test_case in test_suite["test_cases"]:
-                for dut in test_case["duts"]:
-                    suite_result["total_tests"] += 1
-
-                    if dut["skip"]:
-                        suite_result["total_skip"] += 1
-                    elif dut["test_result"]:
-                        suite_result["total_pass"] += 1
-                    else:
-                        suite_result["total_fail"] += 1
-
-            logging.debug(f"Compiled test suite data: {suite_result}")
-            suite_results.append(suite_result)
+        suite_results = list(self._results_summary.suites.values())
 
         logging.debug(f"Compiled suite results: {suite_results}")
         return suite_results
@@ -1264,46 +1463,29 @@ class ReportClient:
             logging.warning("Skipping test case results")
             return ""
 
-        test_suites = self._results_datamodel["test_suites"]
         testcase_results = []
-
-        for test_suite in test_suites:
-            test_cases = test_suite["test_cases"]
-            ts_name = self._format_ts_name(test_suite["name"])
-            logging.info(f"Compiling results for test suite {ts_name}")
-
-            for test_case in test_cases:
-                tc_name = self._format_tc_name(test_case["name"])
-                logging.info(f"Compiling results for test case {tc_name}")
-                duts = test_case["duts"]
-
-                for dut in duts:
-                    testcase_result = {}
-
-                    dut_name = dut["dut"]
-                    fail_reason = dut["fail_or_skip_reason"]
-                    logging.debug(f"Compiling results for DUT/s {dut_name}")
-                    testcase_id = dut["test_id"]
-
-                    if dut["skip"]:
-                        test_result = "SKIP"
-                    elif dut["test_result"]:
-                        test_result = "PASS"
-                    else:
-                        test_result = "FAIL"
-
-                    testcase_result["test_suite"] = ts_name
-                    testcase_result["test_case"] = tc_name
-                    testcase_result["test_id"] = testcase_id
-                    testcase_result["dut"] = dut_name
-                    testcase_result["results"] = test_result
-                    testcase_result["fail_or_skip_reason"] = fail_reason
-                    logging.debug(f"Compiled results: {testcase_result}")
-
-                    testcase_results.append(testcase_result)
-                    logging.debug(f"After testcase results struct appended: {testcase_results}")
-
-                logging.debug(f"Interim dut -- testcase results struct {testcase_results}")
+        # test suite and test case names, formatted once each
+        ts_names = {}
+        tc_names = {}
+
+        for suite_name, tc_name, dut, test_result in self._results_summary.results:
+            if suite_name not in ts_names:
+                ts_names[suite_name] = self._format_ts_name(suite_name)
+                logging.info(f"Compiling results for test suite {ts_names[suite_name]}")
+            if tc_name not in tc_names:
+                tc_names[tc_name] = self._format_tc_name(tc_name)
+                logging.info(f"Compiling results for test case {tc_names[tc_name]}")
+
+            testcase_result = {
+                "test_suite": ts_names[suite_name],
+                "test_case": tc_names[tc_name],
+                "test_id": dut["test_id"],
+                "dut": dut["dut"],
+                "results": test_result,
+                "fail_or_skip_reason": dut["fail_or_skip_reason"],
+            }
+            logging.debug(f"Compiled results: {testcase_result}")
+            testcase_results.append(testcase_result)
 
         logging.debug(f"Returning testcase result {testcase_results}")
         return testcase_results
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2024, Arista Networks EOS+
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the Arista nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Background writer of test case results and evidence files. Test cases
+queue their result files and evidence text on a bounded queue, and a single
+thread writes them in batches so tests do not wait on file creation.
+Results can also be appended to a JSON Lines results store instead of
+being written as one result file per test case and dut.
+"""
+
+import json
+import os
+import queue
+import threading
+from vane import yaml_io
+from vane.vane_logging import logging
+
+DEFAULT_RESULT_QUEUE_SIZE = 1000
+RESULTS_STORES = ("files", "jsonl")
+RESULTS_STORE_PREFIX = "results-"
+RESULTS_STORE_SUFFIX = ".jsonl"
+# queued writes are drained and written together up to this many at a time
+MAX_BATCH_SIZE = 256
+# seconds a write waits on a full queue before checking the writer thread
+QUEUE_PUT_TIMEOUT = 1
+EVIDENCE_DIVIDER = "================================================================"
+
+
+def format_evidence(text_data, dut_name):
+    """Returns the text of evidence written for a primary dut
+
+    Args:
+        text_data (dict): output of show command in python dictionary
+        dut_name (str): Primary dut name
+
+    Returns:
+        text (str): evidence text
+    """
+    heading = (
+        f"{EVIDENCE_DIVIDER}\nThese commands were run when PRIMARY DUT was {dut_name}\n"
+        f"{EVIDENCE_DIVIDER}\n\n"
+    )
+    return heading + "".join(f"{key}{value}\n" for key, value in text_data.items())
+
+
+class ResultEncoder(json.JSONEncoder):
+    """JSON encoder of test case results. Values which JSON cannot hold as
+    they are, such as datetimes, sets, tuples, keys which are not strings
+    or custom objects, raise TypeError instead of being converted, so a
+    result read back from a results store is the result which was written.
+    """
+
+    def default(self, o):
+        raise TypeError(f"{type(o).__name__} value {o!r} is not JSON serializable")
+
+    def encode(self, o):
+        self._check(o)
+        return super().encode(o)
+
+    def _check(self, value):
+        """Raise TypeError on the values the JSON encoder would convert"""
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"{type(key).__name__} key {key!r} is not JSON serializable")
+                self._check(item)
+        elif isinstance(value, list):
+            for item in value:
+                self._check(item)
+        elif value is not None and not isinstance(value, (str, int, float)):
+            self.default(value)
+
+
+def is_results_store(file_name):
+    """Returns True if the file is a JSON Lines results store"""
+    return file_name.startswith(RESULTS_STORE_PREFIX) and file_name.endswith(RESULTS_STORE_SUFFIX)
+
+
+def read_results_store(store_file):
+    """Returns the test case results of a JSON Lines results store. A
+    truncated last line, left by an interrupted run, is skipped.
+
+    Args:
+        store_file (str): path of the results store
+
+    Returns:
+        results (list): test parameters of each test case result
+    """
+    results = []
+    with open(store_file, "r", encoding="utf-8") as store:
+        for line in store:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                logging.error(f"Skipping incomplete result in {store_file}")
+
+    return results
+
+
+class ResultWriter:
+    """ResultWriter writes result and evidence files on a background thread"""
+
+    def __init__(self, results_dir, store="files", queue_size=DEFAULT_RESULT_QUEUE_SIZE):
+        """Initializes the writer and starts its thread
+
+        Args:
+            results_dir (str): directory of result files and results store
+            store (str): files to write one yaml file per test case result,
+                jsonl to append the results to a JSON Lines results store
+            queue_size (int): writes queued before tests wait on the writer
+
+        Raises:
+            ValueError: if the store is not supported
+        """
+        if store not in RESULTS_STORES:
+            raise ValueError(
+                f"Invalid results_store {store}, supported values are {', '.join(RESULTS_STORES)}"
+            )
+
+        self.results_dir = results_dir
+        self.store = store
+        worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+        self.store_file = os.path.join(
+            results_dir, f"{RESULTS_STORE_PREFIX}{worker}{RESULTS_STORE_SUFFIX}"
+        )
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._dirs = set()
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def write_result(self, yaml_file, test_parameters):
+        """Queues the result of a test case. A result which JSON cannot hold
+        as it is gets written to its yaml result file, even with the jsonl
+        store, so no value is changed.
+
+        Args:
+            yaml_file (str): result file, when results are stored as files
+            test_parameters (dict): test case result
+        """
+        # serializing here keeps later changes by the test out of the result
+        if self.store == "jsonl":
+            try:
+                line = json.dumps(test_parameters, cls=ResultEncoder) + "\n"
+                self._put((self.store_file, "a", line))
+                return
+            except TypeError as err:
+                logging.warning(
+                    f"Writing result to {yaml_file}, it cannot be stored as JSON: {err}"
+                )
+
+        yaml_data = yaml_io.dump(test_parameters, default_flow_style=False)
+        self._put((yaml_file, "w", yaml_data))
+
+    def write_text(self, text_file, text_data, dut_name):
+        """Queues evidence text to append to a text file
+
+        Args:
+            text_file (str): evidence file
+            text_data (dict): output of show command in python dictionary
+            dut_name (str): Primary dut name
+        """
+        self._put((text_file, "a", format_evidence(text_data, dut_name)))
+
+    def flush(self):
+        """Waits until every queued write is written"""
+        if self._thread.is_alive():
+            self._queue.join()
+        else:
+            self._drain()
+
+    def close(self):
+        """Writes the queued writes and stops the thread"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._drain()
+
+        if self.errors:
+            logging.error(f"{self.errors} result writes failed, see errors above")
+
+    def _put(self, write):
+        """Queues a write. The write is written in the calling thread once the
+        writer thread is stopped, so a full queue never blocks the tests.
+
+        Args:
+            write (tuple): (file, mode, text) of the write
+        """
+        while self._thread.is_alive():
+            try:
+                self._queue.put(write, timeout=QUEUE_PUT_TIMEOUT)
+                return
+            except queue.Full:
+                continue
+
+        self._drain()
+        self._write_batch([write])
+
+    def _drain(self):
+        """Writes the writes left in the queue by a stopped writer thread"""
+        writes = []
+        while True:
+            try:
+                write = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if write is not None:
+                writes.append(write)
+            self._queue.task_done()
+
+        if writes:
+            self._write_batch(writes)
+
+    def _run(self):
+        """Writes queued writes in batches until close"""
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < MAX_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = batch[-1] is None
+            writes = batch[:-1] if stop else batch
+            try:
+                self._write_batch(writes)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _write_batch(self, writes):
+        """Writes a batch of writes opening each file once
+
+        Args:
+            writes (list): (file, mode, text) of each write in queue order
+        """
+        files = {}
+        for file_name, mode, text in writes:
+            if mode == "w" or file_name not in files:
+                files[file_name] = (mode, [text])
+            else:
+                files[file_name][1].append(text)
+
+        for file_name, (mode, texts) in files.items():
+            try:
+                directory = os.path.dirname(file_name)
+                if directory and directory not in self._dirs:
+                    os.makedirs(directory, exist_ok=True)
+                    self._dirs.add(directory)
+                with open(file_name, mode, encoding="utf-8") as out_file:
+                    out_file.write("".join(texts))
+            # any error, such as text which cannot be encoded, fails only
+            # this file and must not stop the writer thread
+            except Exception as err:  # pylint: disable=broad-exception-caught
+                self.errors += 1
+                logging.error(f"ERROR WRITING RESULT FILE: {file_name}. {err}")
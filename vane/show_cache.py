@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2024, Arista Networks EOS+
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the Arista nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+On-disk cache of the show command outputs collected for Vane cache, so
+re-runs can skip collecting outputs which are still fresh. Outputs are
+keyed by dut, show command, encoding and EOS version, and expire after a
+configurable time to live.
+"""
+
+import json
+import os
+import time
+from vane.vane_logging import logging
+
+DEFAULT_CACHE_DIR = ".vane_cache"
+DEFAULT_CACHE_TTL = 3600
+
+
+class ShowCache:
+    """ShowCache stores the show command outputs of each dut in a json
+    file of the cache directory"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_CACHE_TTL, refresh=False):
+        """Initializes the cache
+
+        Args:
+            cache_dir (str): directory of the cache files
+            ttl (int): seconds a cached output stays fresh
+            refresh (bool): ignore cached outputs, only store new ones
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.refresh = refresh
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(show_cmd, encoding, eos_version):
+        """Returns the key of a cached output"""
+        return f"{eos_version}|{encoding}|{show_cmd}"
+
+    def _cache_file(self, dut_name):
+        """Returns the cache file of a dut"""
+        return os.path.join(self.cache_dir, f"{dut_name}.json")
+
+    def _read(self, dut_name):
+        """Returns the cached outputs of a dut"""
+        try:
+            with open(self._cache_file(dut_name), "r", encoding="utf-8") as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, dut_name, eos_version, show_cmds):
+        """Returns the fresh cached outputs of the show commands
+
+        Args:
+            dut_name (str): name of the dut
+            eos_version (str): EOS version running on the dut
+            show_cmds (dict): show commands to look up keyed by encoding
+
+        Returns:
+            cached (dict): (outputs, show commands) which were found in the
+                cache, keyed by encoding
+        """
+        cached = {encoding: ([], []) for encoding in show_cmds}
+        if self.refresh or not eos_version:
+            return cached
+
+        entries = self._read(dut_name)
+        now = time.time()
+
+        for encoding, cmds in show_cmds.items():
+            outputs, found_cmds = cached[encoding]
+            for show_cmd in cmds:
+                entry = entries.get(self._key(show_cmd, encoding, eos_version))
+                if entry and now - entry["timestamp"] < self.ttl:
+                    outputs.append(entry["output"])
+                    found_cmds.append(show_cmd)
+
+        logging.info(
+            f"Found {sum(len(cmds) for _, cmds in cached.values())} fresh show command "
+            f"outputs of {dut_name} in {self.cache_dir}"
+        )
+
+        return cached
+
+    def store(self, dut_name, eos_version, results):
+        """Stores show command outputs of a dut, expired outputs are dropped
+
+        Args:
+            dut_name (str): name of the dut
+            eos_version (str): EOS version running on the dut
+            results (dict): (outputs, show commands) keyed by encoding
+        """
+        if not eos_version:
+            return
+
+        now = time.time()
+        entries = {
+            key: entry
+            for key, entry in self._read(dut_name).items()
+            if now - entry["timestamp"] < self.ttl
+        }
+
+        for encoding, (outputs, cmds) in results.items():
+            for show_cmd, output in zip(cmds, outputs):
+                entries[self._key(show_cmd, encoding, eos_version)] = {
+                    "output": output,
+                    "timestamp": now,
+                }
+
+        cache_file = self._cache_file(dut_name)
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "w", encoding="utf-8") as output_file:
+            json.dump(entries, output_file)
+        os.replace(tmp_file, cache_file)
+
+        logging.debug(f"Stored show command outputs of {dut_name} in {cache_file}")
@@ -34,7 +34,7 @@
 import os
 import re
 import sys
-import yaml
+from vane import yaml_io
 from vane.vane_logging import logging
 from vane.utils import get_timestamp_in_seconds, write_to_csv
 
@@ -139,7 +139,7 @@ class TestCatalogClient:
                         self.parse_python_file(content, test_file)
 
                     elif ".yaml" in test_file:
-                        yaml_data = yaml.safe_load(infile)
+                        yaml_data = yaml_io.load(infile)
                         if not yaml_data:
                             raise ValueError(
                                 "\033[91mTest case details are not found in the"
@@ -48,12 +48,11 @@ import shutil
 
 import configparser
 import pytest
-import yaml
 
 from jinja2 import Template, Undefined
 from pytest import ExitCode
 from vane.vane_logging import logging
-from vane import tests_tools
+from vane import result_writer, tests_tools, yaml_io
 from vane.utils import return_date
 
 
@@ -110,14 +109,14 @@ class TestsClient:
                         # file and replace the given templates
                         test_template = Template(str(template), undefined=NullUndefined)
                         master_template = Template(str(master_definitions), undefined=NullUndefined)
-                        replace_data = yaml.safe_load(master_template.render())
+                        replace_data = yaml_io.load(master_template.render())
 
                         new = test_template.render(replace_data)
-                        yaml_new = yaml.safe_load(new)
+                        yaml_new = yaml_io.load(new)
 
                         new_file = os.path.join(root, test_definitions)
                         with open(new_file, "w", encoding="utf-8") as outfile:
-                            yaml.safe_dump(yaml_new, outfile, sort_keys=False)
+                            yaml_io.dump(yaml_new, outfile, sort_keys=False)
                         logging.info("Regenerated test definition files")
 
     def generate_test_definitions(self):
@@ -394,7 +393,7 @@ class TestsClient:
         logging.debug(f"Result files are {results_files}")
 
         for name in results_files:
-            if "result-" in name:
+            if "result-" in name or result_writer.is_results_store(name):
                 result_file = f"{results_dir}/{name}"
                 logging.debug(f"Remove result file: {result_file}")
                 os.remove(result_file)
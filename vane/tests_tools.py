@@ -34,14 +34,20 @@
 operations that a test case can perform. It also consists of standalone
 functions which provide utility operations while executing test cases. """
 
+import asyncio
+import atexit
+import calendar
 import copy
 import concurrent.futures
+import contextlib
 import sys
 import os
 import time
 import inspect
+import json
 import re
 import pprint
+import threading
 import yaml
 
 
@@ -51,12 +57,71 @@ from icmplib.exceptions import SocketPermissionError
 from pyeapi.eapilib import EapiError, ConnectionError, CommandError  # pylint: disable=W0622
 from netmiko.exceptions import NetmikoAuthenticationException
 from ixnetwork_restpy.assistants.statistics.statviewassistant import StatViewAssistant
-from vane import config, device_interface, ixia_interface
+from vane import (
+    config,
+    connection_pool,
+    device_interface,
+    evidence_store,
+    ixia_interface,
+    result_writer,
+    yaml_io,
+)
 from vane.vane_logging import logging
 from vane.utils import render_cmds
 
 
+DISCOVERY_INDEX_VERSION = 2
+
 DEFAULT_EOS_CONN = "eapi"
+DEFAULT_PING_WORKERS = 100
+DEFAULT_LOGIN_WORKERS = 32
+DEFAULT_CACHE_WORKERS = 32
+DEFAULT_CACHE_TIMEOUT = 600
+DEFAULT_CACHE_TRANSPORT = "threads"
+DEFAULT_SHOW_CMD_ENCODING = "both"
+DEFAULT_RESULT_WRITER = "sync"
+DEFAULT_EVIDENCE_OUTPUT = "stdout"
+DEFAULT_SSH_CACHED_PROMPT = False
+DEFAULT_EVIDENCE_POLICY = "text"
+DEFAULT_DERIVE_SHOW_CLOCK = False
+# evidence shorter than this is still printed when evidence is stored by reference
+EVIDENCE_INLINE_LIMIT = 512
+MAX_SEND_CMDS_ROUND_TRIPS = 64
+# eAPI error codes of invalid and unconverted commands
+UNSUPPORTED_CMD_ERROR_CODES = (1002, 1003)
+UNSUPPORTED_CMD_ERRORS = ("Invalid input", "This is an unconverted command")
+# encodings fetched for Vane cache by each show_cmd_encoding policy,
+# lazy fetches the text output on first read
+SHOW_CMD_ENCODINGS = {
+    "both": ("json", "text"),
+    "json": ("json",),
+    "text": ("text",),
+    "lazy": ("json", "lazy"),
+}
+# evidence of the show commands TestOps runs with json encoding: text runs
+# them in text encoding too, json-as-evidence records the json output, and
+# lazy also fetches the text output once the test has failed
+EVIDENCE_POLICIES = ("text", "json-as-evidence", "lazy")
+# first line of the show clock text output, e.g. Thu Jun  1 14:03:59 2023
+SHOW_CLOCK_PATTERN = re.compile(r"\w{3} \w{3} [ \d]\d \d{2}:\d{2}:\d{2} \d{4}")
+SHOW_CLOCK_FORMAT = "%a %b %d %H:%M:%S %Y"
+
+# show commands found to be unsupported, keyed by platform, EOS version and encoding
+unsupported_cmds = {}
+unsupported_cmds_lock = threading.Lock()
+
+# guards starting and stopping the background result writer
+result_writer_lock = threading.Lock()
+
+# guards creating and closing the connection pool
+connection_pool_lock = threading.Lock()
+
+# (name, file) of the evidence stored by reference since the last test report
+evidence_links = []
+
+# test steps of test functions, keyed by code object of the function
+test_steps_cache = {}
+TEST_STEPS_PATTERN = re.compile('(TS:.*?)(?:"""|Args:)', re.DOTALL)
 
 
 def filter_duts(duts, criteria="", dut_filter=""):
@@ -173,7 +238,7 @@ def yaml_read(yaml_file):
     """
     with open(yaml_file, "r", encoding="utf-8") as input_yaml:
         try:
-            yaml_data = yaml.safe_load(input_yaml)
+            yaml_data = yaml_io.load(input_yaml)
             logging.debug(f"Inputted the following yaml: {yaml_data}")
             return yaml_data
         except yaml.YAMLError as err:
@@ -183,7 +248,7 @@ def yaml_read(yaml_file):
             sys.exit(1)
 
 
-def init_duts(show_cmds, test_parameters, test_duts):
+def init_duts(show_cmds, test_parameters, test_duts, show_cmd_encodings=None):
     """Use PS LLD spreadsheet to find interesting duts and then execute
     inputted show commands on each dut.  Return structured data of
     dut's output data, hostname, and connection.  Using threading to
@@ -193,6 +258,8 @@ def init_duts(show_cmds, test_parameters, test_duts):
       show_cmds (str): list of interesting show commands
       test_parameters (dict): Abstraction of testing parameters
       test_duts (dict): Dictionary of duts
+      show_cmd_encodings (dict): show_cmd_encoding policy of each show command,
+                   commands which are not listed fetch both encodings
 
     Returns:
       duts (dict): structured data of duts output data, hostname, and
@@ -204,7 +271,15 @@ def init_duts(show_cmds, test_parameters, test_duts):
         "data, hostname, and connection."
     )
 
-    reachability, reachable_duts, unreachable_duts = check_duts_reachability(test_duts)
+    if config.replay_dir:
+        # duts are served from the capture, there is nothing to ping
+        logging.info(f"Replaying DUTs from {config.replay_dir}")
+        reachability, reachable_duts, unreachable_duts = True, list(test_duts["duts"]), []
+    else:
+        ping_workers = test_parameters["parameters"].get("ping_workers", DEFAULT_PING_WORKERS)
+        reachability, reachable_duts, unreachable_duts = check_duts_reachability(
+            test_duts, ping_workers
+        )
 
     try:
         continue_when_unreachable = test_parameters["parameters"]["continue_when_unreachable"]
@@ -226,7 +301,11 @@ def init_duts(show_cmds, test_parameters, test_duts):
 
     reachable_duts, additional_unreachable_duts = login_duts(test_parameters, reachable_duts)
     unreachable_duts.extend(additional_unreachable_duts)
-    workers = len(reachable_duts)
+    workers = min(
+        test_parameters["parameters"].get("cache_workers", DEFAULT_CACHE_WORKERS),
+        len(reachable_duts),
+    )
+    cache_timeout = test_parameters["parameters"].get("cache_timeout", DEFAULT_CACHE_TIMEOUT)
 
     if not workers:
         print(
@@ -242,14 +321,26 @@ def init_duts(show_cmds, test_parameters, test_duts):
 
     logging.info("Starting the execution of show commands for Vane cache")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
-        future_object = {
-            executor.submit(dut_worker, dut, show_cmds, reachable_duts): dut
-            for dut in reachable_duts
-        }
+    if get_cache_transport(test_parameters) == "async_eapi":
+        failed_duts = run_dut_workers_async(
+            reachable_duts, show_cmds, workers, cache_timeout, show_cmd_encodings
+        )
+    else:
+        failed_duts = run_dut_workers(
+            reachable_duts, show_cmds, workers, cache_timeout, show_cmd_encodings
+        )
 
-    if future_object:
-        logging.debug("Future object generated successfully")
+    if failed_duts:
+        failed_names = [failed_dut["name"] for failed_dut in failed_duts]
+        print(
+            "\x1b[31mVane could not collect show command output from DUT/s:\n"
+            f"{failed_names}\n"
+            "These DUTs will not be tested. For detailed information, please refer"
+            " to the logs.\x1b[0m"
+        )
+        failed_names = set(failed_names)
+        reachable_duts = [dut for dut in reachable_duts if dut["name"] not in failed_names]
+        unreachable_duts.extend(failed_duts)
 
     logging.info("Returning duts data structure")
     logging.debug(f"Return duts data structure: {reachable_duts}")
@@ -258,11 +349,431 @@ def init_duts(show_cmds, test_parameters, test_duts):
     return reachable_duts, unreachable_duts
 
 
-def check_duts_reachability(test_duts):
-    """Check if duts are reachable
+def run_dut_workers(duts, show_cmds, workers, timeout=None, show_cmd_encodings=None):
+    """Run dut_worker for every dut using a bounded pool of workers.
+    Only as many duts as there are workers are submitted at a time, and a
+    dut which takes longer than timeout is given up on so it does not
+    hold back the other duts.
+
+    A worker runs on a copy of its dut, which is merged back into the dut
+    only when the worker completes, so a worker which was given up on does
+    not change the dut. Reads from the dut connection time out after
+    timeout seconds for the time of the worker, so a worker blocked on a
+    hung dut ends.
+
+    Args:
+      duts (list): duts to execute show commands on
+      show_cmds (list): List of show commands
+      workers (int): Maximum number of duts executing show commands at a time
+      timeout (int): Seconds a dut is allowed to take, None for no limit
+      show_cmd_encodings (dict): show_cmd_encoding policy of each show command
+
+    Returns:
+      failed_duts (list): duts whose worker raised an exception or timed out
+    """
+    failed_duts = []
+    pending = list(duts)
+    in_flight = {}
+    abandoned = set()
+    started = {}
+
+    def timed_worker(worker_dut):
+        started[worker_dut["name"]] = time.monotonic()
+        conn = worker_dut.get("connection")
+        previous_timeout = conn.set_timeout(timeout) if timeout and conn else None
+        try:
+            dut_worker(worker_dut, show_cmds, duts, show_cmd_encodings)
+        finally:
+            if timeout and conn:
+                conn.set_timeout(previous_timeout)
+
+        return worker_dut
+
+    poll_interval = min(1, timeout) if timeout else None
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
+    try:
+        while pending or in_flight:
+            # workers held by timed out duts are not free until their thread returns
+            abandoned = {future for future in abandoned if not future.done()}
+            while pending and len(in_flight) + len(abandoned) < workers:
+                dut = pending.pop(0)
+                in_flight[executor.submit(timed_worker, dict(dut))] = dut
+
+            if not in_flight:
+                logging.warning("All cache workers are busy with timed out duts, waiting")
+                concurrent.futures.wait(abandoned, return_when=concurrent.futures.FIRST_COMPLETED)
+                continue
+
+            done, _ = concurrent.futures.wait(
+                in_flight, timeout=poll_interval, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                dut = in_flight.pop(future)
+                err = future.exception()
+                if err:
+                    logging.error(f"Error executing show commands on {dut['name']}: {err}")
+                    failed_duts.append(dut)
+                else:
+                    merge_worker_dut(dut, future.result())
+
+            now = time.monotonic()
+            for future, dut in list(in_flight.items()):
+                start = started.get(dut["name"])
+                if timeout and start is not None and now - start > timeout:
+                    logging.error(
+                        f"Timed out after {timeout} seconds executing show commands "
+                        f"on {dut['name']}"
+                    )
+                    in_flight.pop(future)
+                    abandoned.add(future)
+                    failed_duts.append(dut)
+    finally:
+        # do not wait for timed out duts
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logging.debug(f"Duts which failed to execute show commands: {failed_duts}")
+
+    return failed_duts
+
+
+def merge_worker_dut(dut, worker_dut):
+    """Merge the copy of a dut a cache worker completed on into the dut
+
+    Args:
+      dut (dict): structured data of a dut
+      worker_dut (dict): copy of the dut the worker updated
+    """
+    dut.update(worker_dut)
+
+    # text outputs fetched later use the connection of the dut, not of the copy
+    for output in dut.get("output", {}).values():
+        if isinstance(output, LazyShowOutput):
+            output.dut = dut
+
+
+def run_dut_workers_async(duts, show_cmds, workers, timeout=None, show_cmd_encodings=None):
+    """Run async_dut_worker for every dut from a single event loop. The duts
+    share a pool of keep-alive eAPI connections and at most workers duts
+    execute show commands at a time.
+
+    Args:
+      duts (list): duts to execute show commands on
+      show_cmds (list): List of show commands
+      workers (int): Maximum number of duts executing show commands at a time
+      timeout (int): Seconds a dut is allowed to take, None for no limit
+      show_cmd_encodings (dict): show_cmd_encoding policy of each show command
+
+    Returns:
+      failed_duts (list): duts whose worker raised an exception or timed out
+    """
+
+    async def run_workers():
+        pool = device_interface.AsyncEapiPool(max_connections=workers)
+        semaphore = asyncio.Semaphore(workers)
+
+        async def timed_worker(dut):
+            async with semaphore:
+                await asyncio.wait_for(
+                    async_dut_worker(dut, show_cmds, duts, pool, show_cmd_encodings), timeout
+                )
+
+        try:
+            return await asyncio.gather(
+                *(timed_worker(dut) for dut in duts), return_exceptions=True
+            )
+        finally:
+            await pool.close()
+
+    failed_duts = []
+
+    for dut, result in zip(duts, asyncio.run(run_workers())):
+        if isinstance(result, asyncio.TimeoutError):
+            logging.error(
+                f"Timed out after {timeout} seconds executing show commands on {dut['name']}"
+            )
+            failed_duts.append(dut)
+        elif isinstance(result, Exception):
+            logging.error(f"Error executing show commands on {dut['name']}: {result}")
+            failed_duts.append(dut)
+
+    logging.debug(f"Duts which failed to execute show commands: {failed_duts}")
+
+    return failed_duts
+
+
+def get_cache_transport(test_parameters):
+    """Return the transport used to execute the show commands for Vane cache.
+    The async_eapi transport needs eapi connections, so ssh connections
+    always use threads.
+
+    Args:
+      test_parameters (dict): Abstraction of testing parameters
+
+    Returns:
+      cache_transport (str): either threads or async_eapi
+    """
+    cache_transport = test_parameters["parameters"].get("cache_transport", DEFAULT_CACHE_TRANSPORT)
+
+    if cache_transport not in ("threads", "async_eapi"):
+        raise ValueError(f"Invalid cache transport {cache_transport} specified")
+
+    eos_conn = test_parameters["parameters"].get("eos_conn", DEFAULT_EOS_CONN)
+    if cache_transport == "async_eapi" and config.replay_dir:
+        logging.warning("async_eapi cache transport is not supported for replay, using threads")
+        cache_transport = "threads"
+    elif cache_transport == "async_eapi" and eos_conn != "eapi":
+        logging.warning(
+            f"async_eapi cache transport is not supported for {eos_conn}, using threads"
+        )
+        cache_transport = "threads"
+
+    return cache_transport
+
+
+def get_result_writer():
+    """Return the background writer of result and evidence files. It is
+    started on first use when the result_writer parameter is background or
+    results are stored in a jsonl results store, otherwise files are written
+    by the test case itself.
+
+    Returns:
+        writer (ResultWriter): writer, or None to write files directly
+
+    Raises:
+        ValueError: if result_writer is not supported
+    """
+    with result_writer_lock:
+        if config.result_writer:
+            return config.result_writer
+
+        parameters = config.test_parameters.get("parameters", {})
+        writer_mode = parameters.get("result_writer", DEFAULT_RESULT_WRITER)
+        results_store = parameters.get("results_store", "files")
+
+        if writer_mode not in ("sync", "background"):
+            raise ValueError(f"Invalid result writer {writer_mode} specified")
+        if writer_mode == "sync" and results_store == "files":
+            return None
+
+        logging.info(f"Starting background result writer storing results as {results_store}")
+        config.result_writer = result_writer.ResultWriter(
+            parameters["results_dir"],
+            results_store,
+            parameters.get("result_queue_size", result_writer.DEFAULT_RESULT_QUEUE_SIZE),
+        )
+        atexit.register(close_result_writer)
+
+        return config.result_writer
+
+
+def close_result_writer():
+    """Write the results queued on the background writer and stop it"""
+    with result_writer_lock:
+        if config.result_writer:
+            logging.info("Waiting for the background result writer to finish")
+            config.result_writer.close()
+            config.result_writer = None
+
+
+def format_show_clock(clock_time):
+    """Return a time as show clock prints it, with the day padded by a space
+
+    Args:
+      clock_time (time.struct_time): time to format
+
+    Returns:
+      output (str): first line of the show clock output
+    """
+    return (
+        f"{time.strftime('%a %b', clock_time)} {clock_time.tm_mday:2d} "
+        f"{time.strftime('%H:%M:%S %Y', clock_time)}"
+    )
+
+
+def show_clock_output(conn, dut, derive=DEFAULT_DERIVE_SHOW_CLOCK):
+    """Return the text output of show clock on the dut.
+
+    show clock runs on the dut on every call, unless derive is set. Then it
+    only runs on the dut the first time. The offset between the clock of the
+    dut and the local monotonic clock is kept in the dut object, and later
+    outputs are derived from it, with the lines after the time as in the
+    first output. A derived output starts with a comment saying so, as it was
+    not collected from the dut. If the time in the output cannot be parsed,
+    show clock runs on every call.
+
+    Args:
+      conn (DeviceConn): connection to the dut
+      dut (dict): the device whose clock is returned
+      derive (bool): derive the output from the first show clock on the dut
+
+    Returns:
+      output (str): text output of show clock
+    """
+    clock_sample = dut.get("clock_sample")
+    if derive and clock_sample:
+        dut_time, sampled_at, details = clock_sample
+        sample = format_show_clock(time.gmtime(dut_time))
+        now = format_show_clock(time.gmtime(dut_time + time.monotonic() - sampled_at))
+        return f"! Derived locally from show clock run on {dut['name']} at {sample}\n{now}{details}"
+
+    sent_at = time.monotonic()
+    output = conn.enable(["show clock"], "text")[0]["result"]["output"]
+    # the dut read its clock about half way through the round trip
+    sampled_at = (sent_at + time.monotonic()) / 2
+
+    first_line, newline, details = output.partition("\n")
+    if derive and SHOW_CLOCK_PATTERN.fullmatch(first_line):
+        dut_time = calendar.timegm(time.strptime(first_line, SHOW_CLOCK_FORMAT))
+        dut["clock_sample"] = (dut_time, sampled_at, newline + details)
+
+    return output
+
+
+def new_dut_conn(dut, conn_type, timeout):
+    """Returns a new connection to the dut of type 'conn_type'
+    with read timeout set to timeout
+
+    Args:
+        dut (dict): the device to get the connection to
+        conn_type (pyeapi/netmiko conn): eapi or ssh
+        timeout (int): Read time out for the connection
+
+    Returns:
+        conn (pyeapi/netmiko): a new eapi or ssh connection to dut
+    """
+    device_data = {}
+    device_data["transport"] = dut["transport"]
+    device_data["mgmt_ip"] = dut["mgmt_ip"]
+    device_data["username"] = dut["username"]
+    device_data["password"] = dut["password"]
+    device_data["enable_pwd"] = dut.get("enable_pwd", "")
+    device_data["timeout"] = timeout
+    device_data["name"] = dut["name"]
+    if dut.get("session_log"):
+        device_data["session_log"] = dut["session_log"]
+    if conn_type == "eapi":
+        logging.info(f"Creating new eapi connection to {dut['name']}")
+        pyeapi_conn = new_device_conn("eapi")
+        pyeapi_conn.set_up_conn(device_data)
+        return pyeapi_conn
+
+    if conn_type == "ssh":
+        logging.info(f"Creating new ssh connection to {dut['name']}")
+        netmiko_conn = new_device_conn("ssh")
+        netmiko_conn.set_up_conn(device_data)
+        return netmiko_conn
+
+    raise ValueError(f"conn_type [{conn_type}] not supported")
+
+
+def get_connection_pool():
+    """Return the pool of connections which test cases open with a timeout.
+    Pooled connections are reused by later test cases of the session.
+
+    Returns:
+        pool (ConnectionPool): connection pool of this process
+    """
+    with connection_pool_lock:
+        if not config.connection_pool:
+            parameters = config.test_parameters.get("parameters", {})
+            config.connection_pool = connection_pool.ConnectionPool(
+                new_dut_conn,
+                idle_timeout=parameters.get(
+                    "conn_idle_timeout", connection_pool.DEFAULT_IDLE_TIMEOUT
+                ),
+                health_check_interval=parameters.get(
+                    "conn_health_check_interval", connection_pool.DEFAULT_HEALTH_CHECK_INTERVAL
+                ),
+            )
+            atexit.register(close_connection_pool)
+
+        return config.connection_pool
+
+
+def close_connection_pool():
+    """Close the idle connections of the connection pool"""
+    with connection_pool_lock:
+        if config.connection_pool:
+            config.connection_pool.close()
+            config.connection_pool = None
+
+
+def get_evidence_store():
+    """Return the evidence store when the evidence_output parameter is
+    reference. Evidence is then stored once per unique text, and standard
+    output, result files and evidence files refer to it instead of holding
+    a copy.
+
+    Returns:
+        store (EvidenceStore): evidence store, or None to print evidence
+
+    Raises:
+        ValueError: if evidence_output is not supported
+    """
+    if config.evidence_store:
+        return config.evidence_store
+
+    parameters = config.test_parameters.get("parameters", {})
+    evidence_output = parameters.get("evidence_output", DEFAULT_EVIDENCE_OUTPUT)
+
+    if evidence_output not in ("stdout", "reference"):
+        raise ValueError(f"Invalid evidence output {evidence_output} specified")
+    if evidence_output == "stdout":
+        return None
+
+    evidence_dir = evidence_store.evidence_dir(parameters)
+    logging.info(f"Storing test evidence by reference in {evidence_dir}")
+    config.evidence_store = evidence_store.EvidenceStore(evidence_dir)
+
+    return config.evidence_store
+
+
+def get_evidence_policy(test_parameters):
+    """Return the evidence policy of the show commands run with json
+    encoding. Unless it is text, a show command is run in json encoding only
+    and its json output is pretty-printed as evidence. The commands are run
+    in text encoding too when they fail, to collect the evidence of the
+    failure.
+
+    Args:
+      test_parameters (dict): Abstraction of testing parameters
+
+    Returns:
+      evidence_policy (str): text, json-as-evidence or lazy
+
+    Raises:
+      ValueError: if evidence_policy is not supported
+    """
+    parameters = test_parameters.get("parameters", {})
+    evidence_policy = parameters.get("evidence_policy", DEFAULT_EVIDENCE_POLICY)
+
+    if evidence_policy not in EVIDENCE_POLICIES:
+        raise ValueError(f"Invalid evidence policy {evidence_policy} specified")
+
+    return evidence_policy
+
+
+def pop_evidence_links():
+    """Return the evidence stored by reference since the previous call
+
+    Returns:
+        links (list): (name, file) of each evidence
+    """
+    links = evidence_links[:]
+    del evidence_links[: len(links)]
+
+    return links
+
+
+def check_duts_reachability(test_duts, workers=DEFAULT_PING_WORKERS):
+    """Check if duts are reachable. Duts are pinged concurrently by a bounded
+    pool of workers, so the time taken does not grow with the number of duts.
 
     Args:
         test_duts (dict): Dictionary of duts
+        workers (int): Maximum number of duts pinged at the same time
 
     Returns:
         reachability (boolean): result of if duts are reachable
@@ -273,21 +784,19 @@ def check_duts_reachability(test_duts):
     logging.info("Checking connectivity of duts")
     reachable_duts = []
     unreachable_duts = []
-    ret = False
-    for dut in test_duts["duts"]:
-        # check for reachability
-        ip_address = dut["mgmt_ip"]
-        try:
-            host = ping(ip_address, count=3, interval=1, timeout=3, privileged=False)
-            ret = host.is_alive
-        except SocketPermissionError as e:
-            logging.error(
-                f"Entered the exception due to permission issues: {e}\n"
-                "Trying the ping utility via os.system instead"
-            )
-            host = os.system(f"ping -c 1 -W 3 {ip_address} > {os.devnull}")
-            ret = host == 0
+    duts = test_duts["duts"]
+
+    if duts:
+        workers = max(1, min(workers, len(duts)))
+        logging.debug(f"Pinging {len(duts)} duts using {workers} workers")
+
+        # map returns the results in the same order as the duts
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(ping_dut, duts))
+    else:
+        results = []
 
+    for dut, ret in zip(duts, results):
         if ret:
             reachable_duts.append(dut)
         else:
@@ -295,178 +804,887 @@ def check_duts_reachability(test_duts):
             logging.info(f"Failed to connect to {name}")
             unreachable_duts.append(dut)
 
-    if len(test_duts["duts"]) == len(reachable_duts):
-        return True, reachable_duts, unreachable_duts
+    if len(duts) == len(reachable_duts):
+        return True, reachable_duts, unreachable_duts
+
+    return False, reachable_duts, unreachable_duts
+
+
+def ping_dut(dut):
+    """Ping a dut and record its round trip time and packet loss in the
+    dut's "ping_stats" entry
+
+    Args:
+        dut (dict): data structure of dut parameters
+
+    Returns:
+        ret (boolean): result of if dut is reachable
+    """
+    ip_address = dut["mgmt_ip"]
+    try:
+        host = ping(ip_address, count=3, interval=1, timeout=3, privileged=False)
+        ret = host.is_alive
+        dut["ping_stats"] = {"avg_rtt": host.avg_rtt, "packet_loss": host.packet_loss}
+    except SocketPermissionError as e:
+        logging.error(
+            f"Entered the exception due to permission issues: {e}\n"
+            "Trying the ping utility via os.system instead"
+        )
+        host = os.system(f"ping -c 1 -W 3 {ip_address} > {os.devnull}")
+        ret = host == 0
+        # os.system only reports success or failure, rtt is not known
+        dut["ping_stats"] = {"avg_rtt": None, "packet_loss": 0.0 if ret else 1.0}
+
+    logging.debug(f"Ping stats for {dut['name']}: {dut['ping_stats']}")
+
+    return ret
+
+
+def login_duts(test_parameters, duts):
+    """Use eapi to connect to Arista switches for testing. Logins run in
+    parallel using a bounded pool of workers
+
+    Args:
+      test_parameters (dict): Abstraction of testing parameters
+      duts (dict): Dictionary of duts
+
+    Returns:
+      reachable_duts (list): List of dictionaries representing dut objects
+                    which are reachable
+      unreachable_duts (list): List of dictionaries representing dut objects
+                    which are unreachable (due to bad authentication)
+    """
+    logging.info("Using eapi/ssh to connect to Arista switches for testing")
+
+    reachable_duts = []
+    unreachable_duts = []
+
+    network_configs = {}
+    if "network_configs" in test_parameters["parameters"]:
+        if test_parameters["parameters"]["network_configs"]:
+            network_configs = import_yaml(test_parameters["parameters"]["network_configs"])
+
+    eos_conn = test_parameters["parameters"].get("eos_conn", DEFAULT_EOS_CONN)
+
+    if eos_conn not in ("eapi", "ssh"):
+        raise ValueError(f"Invalid EOS conn type {eos_conn} specified")
+
+    login_ptrs = []
+    if duts:
+        workers = test_parameters["parameters"].get("login_workers", DEFAULT_LOGIN_WORKERS)
+        workers = max(1, min(workers, len(duts)))
+        logging.debug(f"Logging in to {len(duts)} duts using {workers} workers")
+
+        # map returns the logins in the same order as the duts
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            login_ptrs = list(
+                executor.map(
+                    lambda dut: login_dut(dut, eos_conn, test_parameters, network_configs),
+                    duts,
+                )
+            )
+
+    for dut, login_ptr in zip(duts, login_ptrs):
+        if login_ptr is None:
+            unreachable_duts.append(dut)
+        else:
+            reachable_duts.append(login_ptr)
+
+    logging.info(f"Returning reachable_duts: {reachable_duts}")
+
+    return reachable_duts, unreachable_duts
+
+
+def new_device_conn(conn_type):
+    """Return a new connection of type conn_type which is not set up yet.
+    When replaying, the connection is served from the capture in
+    config.replay_dir, and when recording, the calls made on it are recorded
+    to config.record_dir. ssh connections send commands with the prompt of
+    the session when the ssh_cached_prompt parameter is set.
+
+    Args:
+      conn_type (str): type of connection to dut - either eapi or ssh
+
+    Returns:
+      conn (DeviceConn): connection to the dut
+    """
+    if conn_type not in ("eapi", "ssh"):
+        raise ValueError(f"conn_type [{conn_type}] not supported")
+
+    if config.replay_dir:
+        return device_interface.ReplayConn(config.replay_dir)
+
+    if conn_type == "eapi":
+        conn = device_interface.PyeapiConn()
+    else:
+        parameters = config.test_parameters.get("parameters", {})
+        cached_prompt = parameters.get("ssh_cached_prompt", DEFAULT_SSH_CACHED_PROMPT)
+        conn = device_interface.NetmikoConn(cached_prompt=cached_prompt)
+
+    if config.record_dir:
+        conn = device_interface.RecordingConn(conn, config.record_dir)
+
+    return conn
+
+
+def login_dut(dut, eos_conn, test_parameters, network_configs):
+    """Connect to a single dut and build its dut object
+
+    Args:
+      dut (dict): dut parameters from the duts file
+      eos_conn (str): type of connection to dut - either eapi or ssh
+      test_parameters (dict): Abstraction of testing parameters
+      network_configs (dict): network configs of the duts keyed by dut name
+
+    Returns:
+      login_ptr (dict): dut object, or None if the authentication failed
+    """
+    name = dut["name"]
+    logging.info(f"Connecting to switch: {name}")
+    logging.debug(f"Connecting to switch: {name} using parameters: {dut}")
+    login_ptr = {}
+
+    if eos_conn == "eapi":
+        pyeapi_conn = new_device_conn("eapi")
+        login_ptr["eapi_conn"] = pyeapi_conn
+        login_ptr["connection"] = pyeapi_conn
+    else:
+        netmiko_conn = new_device_conn("ssh")
+        login_ptr["ssh_conn"] = netmiko_conn
+        login_ptr["connection"] = netmiko_conn
+
+    success = authenticate_and_setup_conn(dut, login_ptr["connection"])
+    if not success:
+        return None
+
+    if get_cache_transport(test_parameters) == "async_eapi":
+        async_eapi_conn = device_interface.AsyncEapiConn()
+        async_eapi_conn.set_up_conn(dut)
+        login_ptr["async_eapi_conn"] = async_eapi_conn
+
+    login_ptr["name"] = name
+    login_ptr["mgmt_ip"] = dut["mgmt_ip"]
+    login_ptr["username"] = dut["username"]
+    login_ptr["password"] = dut["password"]
+    login_ptr["neighbors"] = dut.get("neighbors", "")
+    login_ptr["role"] = dut.get("role", "")
+    login_ptr["transport"] = dut["transport"]
+    login_ptr["ping_stats"] = dut.get("ping_stats", {})
+    login_ptr["results_dir"] = test_parameters["parameters"]["results_dir"]
+    login_ptr["report_dir"] = test_parameters["parameters"]["report_dir"]
+
+    if name in network_configs:
+        login_ptr["network_configs"] = network_configs[name]
+
+    return login_ptr
+
+
+def send_cmds(show_cmds, conn, encoding, platform=None, eos_version=None):
+    """Send show commands to duts and isolate the commands which fail
+
+    Args:
+        show_cmds (list): List of pre-processed commands
+        conn (obj): connection
+        encoding (str): encoding type of show commands: either json or text
+        platform (str): model of the dut, used with eos_version to skip
+            commands known to be unsupported on it
+        eos_version (str): EOS version of the dut
+
+    Returns:
+        show_cmd_list (list): list of show command outputs
+        show_cmds (list): list of show commands
+    """
+    logging.debug(f"List of show commands in show_cmds with encoding {encoding}: {show_cmds}")
+
+    batches = isolate_cmd_failures(show_cmds, encoding, platform, eos_version)
+    try:
+        batch = next(batches)
+        while True:
+            try:
+                if encoding == "json":
+                    result = conn.run_commands(batch)
+                elif encoding == "text":
+                    result = conn.run_commands(batch, encoding="text")
+            # pylint: disable-next=broad-exception-caught
+            except Exception as err:
+                result = err
+            batch = batches.send(result)
+    except StopIteration as stop:
+        show_cmd_list, show_cmds = stop.value
+
+    logging.info(f"Ran all show commands on dut to gather {encoding} data")
+    logging.debug(f"Ran all show cmds with encoding {encoding}: {show_cmds}")
+    logging.debug(f"Return all show cmds: {show_cmd_list}")
+
+    return show_cmd_list, show_cmds
+
+
+# pylint: disable-next=too-many-arguments
+async def async_send_cmds(show_cmds, conn, encoding, pool, platform=None, eos_version=None):
+    """Send show commands to a dut over an async eAPI connection and
+    isolate the commands which fail
+
+    Args:
+        show_cmds (list): List of pre-processed commands
+        conn (AsyncEapiConn): connection
+        encoding (str): encoding type of show commands: either json or text
+        pool (AsyncEapiPool): pool of eAPI connections
+        platform (str): model of the dut, used with eos_version to skip
+            commands known to be unsupported on it
+        eos_version (str): EOS version of the dut
+
+    Returns:
+        show_cmd_list (list): list of show command outputs
+        show_cmds (list): list of show commands
+    """
+    logging.debug(f"List of show commands in show_cmds with encoding {encoding}: {show_cmds}")
+
+    batches = isolate_cmd_failures(show_cmds, encoding, platform, eos_version)
+    try:
+        batch = next(batches)
+        while True:
+            try:
+                result = await conn.async_run_commands(batch, encoding=encoding, pool=pool)
+            except CommandError as err:
+                result = err
+            batch = batches.send(result)
+    except StopIteration as stop:
+        show_cmd_list, show_cmds = stop.value
+
+    logging.info(f"Ran all show commands on dut to gather {encoding} data")
+    logging.debug(f"Ran all show cmds with encoding {encoding}: {show_cmds}")
+    logging.debug(f"Return all show cmds: {show_cmd_list}")
+
+    return show_cmd_list, show_cmds
+
+
+# pylint: disable-next=too-many-locals,too-many-branches
+def isolate_cmd_failures(show_cmds, encoding, platform=None, eos_version=None):
+    """Generator which runs show commands in batches, isolating the commands
+    which fail so the output of every other command is collected.
+
+    The generator yields the batches of commands to run and is sent back the
+    outputs of each batch, or the exception it raised. A failed command is
+    found, in order of preference, from the number of outputs in the eAPI
+    error, from the error text, or by splitting the batch in halves. At most
+    MAX_SEND_CMDS_ROUND_TRIPS batches are run. Commands which are
+    unsupported on the platform and EOS version are remembered and skipped
+    on duts of the same platform and EOS version for the rest of the run.
+
+    Args:
+        show_cmds (list): List of pre-processed commands
+        encoding (str): encoding type of show commands: either json or text
+        platform (str): model of the dut, the json output of show version
+            is used if not given
+        eos_version (str): EOS version of the dut, the json output of show
+            version is used if not given
+
+    Returns:
+        show_cmd_list (list): list of show command outputs
+        show_cmds (list): list of show commands which succeeded
+    """
+    skipped_cmds = set()
+    if platform and eos_version:
+        with unsupported_cmds_lock:
+            skipped_cmds = unsupported_cmds.get((platform, eos_version, encoding), set())
+
+    outputs = {}
+    failed_unsupported = []
+    pending = [[index for index, cmd in enumerate(show_cmds) if cmd not in skipped_cmds]]
+    for cmd in show_cmds:
+        if cmd in skipped_cmds:
+            logging.debug(
+                f"Skipping {cmd}, it failed as unsupported on another {platform} dut "
+                f"running EOS {eos_version} with {encoding} encoding, so its output "
+                "is not collected"
+            )
+    round_trips = 0
+
+    while pending:
+        batch = pending.pop(0)
+        if not batch:
+            continue
+        if round_trips == MAX_SEND_CMDS_ROUND_TRIPS:
+            remaining_cmds = [show_cmds[index] for index in batch + sum(pending, [])]
+            logging.error(
+                f"Giving up on show commands {remaining_cmds} after {round_trips} round trips"
+            )
+            break
+
+        round_trips += 1
+        batch_cmds = [show_cmds[index] for index in batch]
+        result = yield batch_cmds
+
+        if not isinstance(result, Exception):
+            if round_trips == 1:
+                # all commands ran in one round trip
+                return result, batch_cmds
+            outputs.update(zip(batch, result))
+            continue
+
+        err = result
+        logging.error(f"Error running all cmds: {err}")
+
+        failed = return_failed_cmd_index(err, batch_cmds)
+        if failed is not None:
+            # the commands before the failed one ran, only the rest is sent again
+            outputs.update(zip(batch[:failed], err.output[1 : failed + 1]))
+            next_batch = batch[failed + 1 :]
+        else:
+            remaining_cmds = remove_cmd(err, batch_cmds.copy())
+            if len(remaining_cmds) < len(batch_cmds):
+                failed = next(
+                    (
+                        position
+                        for position, cmd in enumerate(remaining_cmds)
+                        if cmd != batch_cmds[position]
+                    ),
+                    len(remaining_cmds),
+                )
+            elif not isinstance(err, (CommandError, device_interface.CommandError)):
+                # not a command failure, so the commands cannot be isolated
+                raise err
+            elif len(batch) > 1:
+                middle = len(batch) // 2
+                logging.debug(f"Bisecting show commands {batch_cmds} to find the failed command")
+                pending[:0] = [batch[:middle], batch[middle:]]
+                continue
+            else:
+                failed = 0
+            next_batch = batch[:failed] + batch[failed + 1 :]
+
+        failed_cmd = batch_cmds[failed]
+        logging.info(f"Removed {failed_cmd} due to an error")
+        logging.debug(f"New show_cmds: {[show_cmds[index] for index in next_batch]}")
+
+        if is_unsupported_cmd_error(err):
+            failed_unsupported.append(failed_cmd)
+        pending.insert(0, next_batch)
+
+    succeeded = sorted(outputs)
+    show_cmd_list = [outputs[index] for index in succeeded]
+    succeeded_cmds = [show_cmds[index] for index in succeeded]
+
+    show_version = return_show_version(show_cmd_list, succeeded_cmds, encoding)
+    platform = platform or show_version.get("modelName")
+    eos_version = eos_version or show_version.get("version")
+    if platform and eos_version and failed_unsupported:
+        logging.info(
+            f"Show commands unsupported on {platform} with EOS {eos_version}: "
+            f"{failed_unsupported}"
+        )
+        with unsupported_cmds_lock:
+            unsupported_cmds.setdefault((platform, eos_version, encoding), set()).update(
+                failed_unsupported
+            )
+
+    return show_cmd_list, succeeded_cmds
+
+
+def return_failed_cmd_index(err, show_cmds):
+    """Return the index of the failed command from the outputs in an eAPI
+    error. eAPI stops at the failed command, so the outputs are those of
+    enable, the commands which ran and the failed command.
+
+    Args:
+        err (Exception): error raised by running the commands
+        show_cmds (list): commands which were run
+
+    Returns:
+        index (int): index of the failed command, None if it is not known
+    """
+    output = getattr(err, "output", None)
+    if not isinstance(output, list) or not output:
+        return None
+    if not isinstance(output[-1], dict) or "errors" not in output[-1]:
+        return None
+
+    index = len(output) - 2
+    if 0 <= index < len(show_cmds):
+        return index
+
+    return None
+
+
+def is_unsupported_cmd_error(err):
+    """Return if the error is from a command which is not supported
+
+    Args:
+        err (Exception): error raised by running a command
+
+    Returns:
+        unsupported (boolean): the command is invalid or unconverted
+    """
+    if getattr(err, "error_code", None) in UNSUPPORTED_CMD_ERROR_CODES:
+        return True
+
+    return any(error in str(err) for error in UNSUPPORTED_CMD_ERRORS)
+
+
+def return_show_version(show_cmd_list, show_cmds, encoding="json"):
+    """Return the json output of show version, which tells the model and
+    EOS version of a dut
+
+    Args:
+        show_cmd_list (list): list of show command outputs
+        show_cmds (list): list of show commands
+        encoding (str): encoding of the outputs
+
+    Returns:
+        show_version (dict): json output of show version, empty if it is missing
+    """
+    if encoding != "json" or "show version" not in show_cmds:
+        return {}
+
+    show_version = show_cmd_list[show_cmds.index("show version")]
+    if not isinstance(show_version, dict):
+        return {}
+
+    return show_version
+
+
+def remove_cmd(err, show_cmds):
+    """Remove command that is not supported by pyeapi
+
+    Args:
+        err (str): Error string
+        show_cmds (list): List of pre-processed commands
+
+    Returns:
+        show_cmds (list): List of post-processed commands
+    """
+    logging.debug(f"remove_cmd: {err}")
+    logging.debug(f"remove_cmd show_cmds list: {show_cmds}")
+
+    longest_matching_cmd = ""
+
+    for show_cmd in show_cmds:
+        if show_cmd in str(err) and longest_matching_cmd in show_cmd:
+            longest_matching_cmd = show_cmd
+
+    # longest_matching_cmd is the one in error string, lets bump it out
+    if longest_matching_cmd:
+        cmd_index = show_cmds.index(longest_matching_cmd)
+        show_cmds.pop(cmd_index)
+
+        logging.info(f"Removed {longest_matching_cmd} due to an error")
+        logging.debug(f"Removed {longest_matching_cmd} because of {err}")
+
+    return show_cmds
+
+
+def dut_worker(dut, show_cmds, reachable_duts, show_cmd_encodings=None):
+    """Execute inputted show commands on dut.  Update dut structured data
+    with show output.
+
+    Args:
+      dut (dict): structured data of a dut output data, hostname, and
+      show_cmds (list): List of show commands
+      reachable_duts (dict): Abstraction of duts
+      show_cmd_encodings (dict): show_cmd_encoding policy of each show command
+    """
+    name = dut["name"]
+    conn = dut["connection"]
+    dut["output"] = {}
+    dut["output"]["interface_list"] = return_interfaces(name, reachable_duts)
+
+    logging.info(f"Executing show commands on {name}")
+    logging.debug(f"List of show commands {show_cmds}")
+
+    all_cmds_json, all_cmds_txt, lazy_cmds = split_show_cmds(show_cmds, show_cmd_encodings)
+    all_cmds_json, all_cmds_txt, cached = load_cached_show_output(dut, all_cmds_json, all_cmds_txt)
+
+    # platform and EOS version are known if the connection was authenticated
+    # with show version
+    platform = getattr(conn, "platform", None)
+    eos_version = getattr(conn, "eos_version", None)
+
+    show_cmd_json_list, show_cmds_json = [], []
+    if all_cmds_json:
+        show_cmd_json_list, show_cmds_json = send_cmds(
+            all_cmds_json, conn, "json", platform, eos_version
+        )
+        show_version = return_show_version(show_cmd_json_list, show_cmds_json)
+        platform = platform or show_version.get("modelName")
+        eos_version = eos_version or show_version.get("version")
+
+    logging.debug(f"Returned from send_cmds_json {show_cmds_json}")
+
+    show_cmd_txt_list, show_cmds_txt = [], []
+    if all_cmds_txt:
+        show_cmd_txt_list, show_cmds_txt = send_cmds(
+            all_cmds_txt, conn, "text", platform, eos_version
+        )
+
+    logging.debug(f"Returned from send_cmds_txt {show_cmds_txt}")
+
+    show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt = store_show_output(
+        dut, cached, show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+    )
+    record_show_output(
+        dut, show_cmds, show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+    )
+    defer_show_text(dut, lazy_cmds)
+
+
+async def async_dut_worker(dut, show_cmds, reachable_duts, pool, show_cmd_encodings=None):
+    """Execute inputted show commands on dut over its async eAPI connection.
+    Update dut structured data with show output.
+
+    Args:
+      dut (dict): structured data of a dut output data, hostname, and
+      show_cmds (list): List of show commands
+      reachable_duts (dict): Abstraction of duts
+      pool (AsyncEapiPool): pool of eAPI connections shared by the duts
+      show_cmd_encodings (dict): show_cmd_encoding policy of each show command
+    """
+    name = dut["name"]
+    conn = dut["async_eapi_conn"]
+    dut["output"] = {}
+    dut["output"]["interface_list"] = return_interfaces(name, reachable_duts)
+
+    logging.info(f"Executing show commands on {name}")
+    logging.debug(f"List of show commands {show_cmds}")
+
+    all_cmds_json, all_cmds_txt, lazy_cmds = split_show_cmds(show_cmds, show_cmd_encodings)
+    all_cmds_json, all_cmds_txt, cached = load_cached_show_output(dut, all_cmds_json, all_cmds_txt)
+
+    # platform and EOS version are known if the login connection was
+    # authenticated with show version
+    platform = getattr(dut.get("connection"), "platform", None)
+    eos_version = getattr(dut.get("connection"), "eos_version", None)
+
+    show_cmd_json_list, show_cmds_json = [], []
+    if all_cmds_json:
+        show_cmd_json_list, show_cmds_json = await async_send_cmds(
+            all_cmds_json, conn, "json", pool, platform, eos_version
+        )
+        show_version = return_show_version(show_cmd_json_list, show_cmds_json)
+        platform = platform or show_version.get("modelName")
+        eos_version = eos_version or show_version.get("version")
+
+    logging.debug(f"Returned from send_cmds_json {show_cmds_json}")
+
+    show_cmd_txt_list, show_cmds_txt = [], []
+    if all_cmds_txt:
+        show_cmd_txt_list, show_cmds_txt = await async_send_cmds(
+            all_cmds_txt, conn, "text", pool, platform, eos_version
+        )
+
+    logging.debug(f"Returned from send_cmds_txt {show_cmds_txt}")
+
+    show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt = store_show_output(
+        dut, cached, show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+    )
+    record_show_output(
+        dut, show_cmds, show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+    )
+    defer_show_text(dut, lazy_cmds)
+
+
+def load_cached_show_output(dut, json_cmds, text_cmds):
+    """Look up the show commands in the on-disk show output cache, if it is
+    enabled. The EOS version of the dut is part of the cache key, it is
+    taken from the connection or read from the dut.
+
+    Args:
+      dut (dict): structured data of a dut output data, hostname, and
+      json_cmds (list): show commands to run with json encoding
+      text_cmds (list): show commands to run with text encoding
+
+    Returns:
+      json_cmds (list): show commands to run with json encoding which are not cached
+      text_cmds (list): show commands to run with text encoding which are not cached
+      cached (dict): outputs found in the cache and the EOS version of the dut
+    """
+    cached = {"json": ([], []), "text": ([], []), "eos_version": None}
+    if not config.show_cache or not (json_cmds or text_cmds):
+        return json_cmds, text_cmds, cached
+
+    conn = dut["connection"]
+    eos_version = getattr(conn, "eos_version", None)
+    if not eos_version:
+        try:
+            eos_version = conn.run_commands(["show version"])[0].get("version")
+        # pylint: disable-next=broad-exception-caught
+        except Exception as err:
+            logging.error(f"Could not read EOS version of {dut['name']}: {err}")
+
+    cached.update(
+        config.show_cache.load(dut["name"], eos_version, {"json": json_cmds, "text": text_cmds})
+    )
+    cached["eos_version"] = eos_version
+
+    json_cmds = [show_cmd for show_cmd in json_cmds if show_cmd not in cached["json"][1]]
+    text_cmds = [show_cmd for show_cmd in text_cmds if show_cmd not in cached["text"][1]]
+
+    return json_cmds, text_cmds, cached
+
+
+# pylint: disable-next=too-many-arguments
+def store_show_output(
+    dut, cached, show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+):
+    """Store the collected show command outputs in the on-disk show output
+    cache, if it is enabled, and add the outputs found in the cache to them
+
+    Args:
+      dut (dict): structured data of a dut output data, hostname, and
+      cached (dict): outputs found in the cache by load_cached_show_output
+      show_cmd_json_list (list): json outputs of show_cmds_json
+      show_cmds_json (list): show commands which returned json output
+      show_cmd_txt_list (list): text outputs of show_cmds_txt
+      show_cmds_txt (list): show commands which returned text output
+
+    Returns:
+      show_cmd_json_list (list): collected and cached json outputs
+      show_cmds_json (list): show commands of show_cmd_json_list
+      show_cmd_txt_list (list): collected and cached text outputs
+      show_cmds_txt (list): show commands of show_cmd_txt_list
+    """
+    if not config.show_cache:
+        return show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+
+    if show_cmds_json or show_cmds_txt:
+        config.show_cache.store(
+            dut["name"],
+            cached["eos_version"],
+            {
+                "json": (show_cmd_json_list, show_cmds_json),
+                "text": (show_cmd_txt_list, show_cmds_txt),
+            },
+        )
+
+    return (
+        list(show_cmd_json_list) + cached["json"][0],
+        list(show_cmds_json) + cached["json"][1],
+        list(show_cmd_txt_list) + cached["text"][0],
+        list(show_cmds_txt) + cached["text"][1],
+    )
+
+
+def split_show_cmds(show_cmds, show_cmd_encodings=None):
+    """Split the show commands by the encodings to fetch for Vane cache
+
+    Args:
+      show_cmds (list): List of show commands
+      show_cmd_encodings (dict): show_cmd_encoding policy of each show command,
+                   commands which are not listed fetch both encodings
+
+    Returns:
+      json_cmds (list): show commands to run with json encoding
+      text_cmds (list): show commands to run with text encoding
+      lazy_cmds (list): show commands whose text output is fetched on first read
+    """
+    show_cmd_encodings = show_cmd_encodings or {}
+    json_cmds, text_cmds, lazy_cmds = [], [], []
+
+    for show_cmd in show_cmds:
+        encodings = SHOW_CMD_ENCODINGS[
+            show_cmd_encodings.get(show_cmd, DEFAULT_SHOW_CMD_ENCODING)
+        ]
+        if "json" in encodings:
+            json_cmds.append(show_cmd)
+        if "text" in encodings:
+            text_cmds.append(show_cmd)
+        if "lazy" in encodings:
+            lazy_cmds.append(show_cmd)
+
+    return json_cmds, text_cmds, lazy_cmds
+
 
-    return False, reachable_duts, unreachable_duts
+def defer_show_text(dut, lazy_cmds):
+    """Replace the output of the lazy show commands with LazyShowOutput so
+    their text output is fetched from the dut on first read
+
+    Args:
+      dut (dict): structured data of a dut output data, hostname, and
+      lazy_cmds (list): show commands whose text output is fetched on first read
+    """
+    for show_cmd in lazy_cmds:
+        output = dut["output"][show_cmd]
+        output.pop("text", None)
+        dut["output"][show_cmd] = LazyShowOutput(output, dut, show_cmd)
 
+        logging.debug(f"Deferred text output of {show_cmd} on {dut['name']}")
 
-def login_duts(test_parameters, duts):
-    """Use eapi to connect to Arista switches for testing
+
+def fetch_show_text(dut, show_cmd):
+    """Run a show command with text encoding on the dut. The text output of
+    every other show command of the dut which is not fetched yet is fetched
+    in the same request, so a dut takes one round trip however many of its
+    deferred outputs are read.
 
     Args:
-      test_parameters (dict): Abstraction of testing parameters
-      duts (dict): Dictionary of duts
+      dut (dict): structured data of a dut output data, hostname, and
+      show_cmd (str): show command
 
     Returns:
-      reachable_duts (list): List of dictionaries representing dut objects
-                    which are reachable
-      unreachable_duts (list): List of dictionaries representing dut objects
-                    which are unreachable (due to bad authentication)
+      show_output_txt (str): text output, empty if the command failed
     """
-    logging.info("Using eapi/ssh to connect to Arista switches for testing")
+    conn = dut["connection"]
+    # test cases of several threads may read deferred outputs of the same dut,
+    # the thread which waited finds its output fetched by the other one
+    with getattr(conn, "lock", None) or contextlib.nullcontext():
+        output = dut["output"].get(show_cmd)
+        if isinstance(output, LazyShowOutput) and output.fetched:
+            return output["text"]
+
+        pending = [show_cmd] + [
+            cmd
+            for cmd, output in dut["output"].items()
+            if cmd != show_cmd and isinstance(output, LazyShowOutput) and not output.fetched
+        ]
+        logging.info(f"Fetching text output of {', '.join(pending)} on {dut['name']}")
 
-    reachable_duts = []
-    unreachable_duts = []
+        show_cmd_txt_list, show_cmds_txt = send_cmds(pending, conn, "text")
+        texts = {
+            cmd: show_cmd_txt_list[index]["output"] for index, cmd in enumerate(show_cmds_txt)
+        }
+        for cmd in pending[1:]:
+            dut["output"][cmd].set_text(texts.get(cmd, ""))
 
-    network_configs = {}
-    if "network_configs" in test_parameters["parameters"]:
-        if test_parameters["parameters"]["network_configs"]:
-            network_configs = import_yaml(test_parameters["parameters"]["network_configs"])
+    return texts.get(show_cmd, "")
 
-    for dut in duts:
-        name = dut["name"]
-        login_index = len(reachable_duts)
-        reachable_duts.append({})
-        login_ptr = reachable_duts[login_index]
 
-        logging.info(f"Connecting to switch: {name}")
+class LazyShowOutput(dict):
+    """Output of a show command in Vane cache whose text output is fetched
+    from the dut the first time it is read. The fetch happens once, even when
+    several threads read the output at the same time. Copies of the output
+    are plain dicts holding the fetched text.
 
-        logging.debug(f"Connecting to switch: {name} using parameters: {dut}")
+    The text key is always reported, before it is fetched too, so code which
+    tests for the key before reading it behaves as with a plain dict.
+    """
 
-        eos_conn = test_parameters["parameters"].get("eos_conn", DEFAULT_EOS_CONN)
+    def __init__(self, output, dut, show_cmd):
+        super().__init__(output)
+        self.dut = dut
+        self._show_cmd = show_cmd
+        self._lock = threading.Lock()
 
-        if eos_conn == "eapi":
-            pyeapi_conn = device_interface.PyeapiConn()
-            login_ptr["eapi_conn"] = pyeapi_conn
-            login_ptr["connection"] = pyeapi_conn
-        elif eos_conn == "ssh":
-            netmiko_conn = device_interface.NetmikoConn()
-            login_ptr["ssh_conn"] = netmiko_conn
-            login_ptr["connection"] = netmiko_conn
-        else:
-            raise ValueError(f"Invalid EOS conn type {eos_conn} specified")
+    def __missing__(self, key):
+        if key != "text":
+            raise KeyError(key)
 
-        success = authenticate_and_setup_conn(dut, login_ptr["connection"])
-        if not success:
-            reachable_duts.pop(login_index)
-            unreachable_duts.append(dut)
-            continue
+        with self._lock:
+            if not self.fetched:
+                self["text"] = fetch_show_text(self.dut, self._show_cmd)
 
-        login_ptr["name"] = name
-        login_ptr["mgmt_ip"] = dut["mgmt_ip"]
-        login_ptr["username"] = dut["username"]
-        login_ptr["password"] = dut["password"]
-        login_ptr["neighbors"] = dut.get("neighbors", "")
-        login_ptr["role"] = dut.get("role", "")
-        login_ptr["transport"] = dut["transport"]
-        login_ptr["results_dir"] = test_parameters["parameters"]["results_dir"]
-        login_ptr["report_dir"] = test_parameters["parameters"]["report_dir"]
+        return dict.__getitem__(self, "text")
 
-        if name in network_configs:
-            login_ptr["network_configs"] = network_configs[name]
+    @property
+    def fetched(self):
+        """True once the text output is fetched"""
+        return dict.__contains__(self, "text")
 
-    logging.info(f"Returning reachable_duts: {reachable_duts}")
+    def set_text(self, text):
+        """Set the text output, unless it is already fetched. The lock of the
+        output is not taken, as the thread fetching the output of another
+        command of the dut sets it while a thread reading this output may
+        hold the lock, waiting on the connection of the dut.
 
-    return reachable_duts, unreachable_duts
+        Args:
+          text (str): text output of the show command
+        """
+        if not self.fetched:
+            self["text"] = text
 
+    def get(self, key, default=None):
+        if key == "text":
+            return self["text"]
+        return super().get(key, default)
 
-def send_cmds(show_cmds, conn, encoding):
-    """Send show commands to duts and recurse on failure
+    def __contains__(self, key):
+        return key == "text" or super().__contains__(key)
 
-    Args:
-        show_cmds (list): List of pre-processed commands
-        conn (obj): connection
-        encoding (str): encoding type of show commands: either json or text
+    def __iter__(self):
+        return iter(self.keys())
 
-    Returns:
-        show_cmd_list (list): list of show command outputs
-        show_cmds (list): list of show commands
-    """
+    def __len__(self):
+        return len(self.keys())
 
-    try:
-        logging.debug(f"List of show commands in show_cmds with encoding {encoding}: {show_cmds}")
+    def keys(self):
+        return dict.fromkeys([*super().keys(), "text"]).keys()
 
-        if encoding == "json":
-            show_cmd_list = conn.run_commands(show_cmds)
-        elif encoding == "text":
-            show_cmd_list = conn.run_commands(show_cmds, encoding="text")
+    def values(self):
+        return self.materialize().values()
 
-        logging.info(f"Ran all show commands on dut to gather {encoding} data")
-        logging.debug(f"Ran all show cmds with encoding {encoding}: {show_cmds}")
+    def items(self):
+        return self.materialize().items()
 
-    # pylint: disable-next=broad-exception-caught
-    except Exception as err:
-        logging.error(f"Error running all cmds: {err}")
+    def materialize(self):
+        """Fetch the text output if needed and return the output as a dict"""
+        self.get("text")
+        return dict(self)
 
-        show_cmds = remove_cmd(err, show_cmds)
+    def __copy__(self):
+        return self.materialize()
 
-        logging.debug(f"New show_cmds: {show_cmds}")
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.materialize(), memo)
 
-        show_cmd_list = send_cmds(show_cmds, conn, encoding)
-        show_cmd_list = show_cmd_list[0]
+    def __reduce__(self):
+        return (dict, (self.materialize(),))
 
-    logging.debug(f"Return all show cmds: {show_cmd_list}")
 
-    return show_cmd_list, show_cmds
+class DeferredShowText:
+    """Text output of a show command in Vane cache which is not fetched yet,
+    held as evidence by TestOps until the evidence is written"""
 
+    def __init__(self, output):
+        self.output = output
 
-def remove_cmd(err, show_cmds):
-    """Remove command that is not supported by pyeapi
+    def resolve(self):
+        """Fetch the text output if needed and return it"""
+        return self.output["text"]
+
+
+def show_text(output):
+    """Return the text output of a show command in Vane cache, without
+    fetching a deferred text output
 
     Args:
-        err (str): Error string
-        show_cmds (list): List of pre-processed commands
+      output (dict): output of the show command in Vane cache
 
     Returns:
-        show_cmds (list): List of post-processed commands
+      text (str|DeferredShowText): text output, deferred if not fetched yet
     """
-    logging.debug(f"remove_cmd: {err}")
-    logging.debug(f"remove_cmd show_cmds list: {show_cmds}")
-
-    longest_matching_cmd = ""
+    if isinstance(output, LazyShowOutput) and not output.fetched:
+        return DeferredShowText(output)
+    return output["text"]
 
-    for show_cmd in show_cmds:
-        if show_cmd in str(err) and longest_matching_cmd in show_cmd:
-            longest_matching_cmd = show_cmd
 
-    # longest_matching_cmd is the one in error string, lets bump it out
-    if longest_matching_cmd:
-        cmd_index = show_cmds.index(longest_matching_cmd)
-        show_cmds.pop(cmd_index)
+def resolve_show_text(text):
+    """Return a text output held as evidence, fetching it if it is deferred
 
-        logging.info(f"Removed {longest_matching_cmd} due to an error")
-        logging.debug(f"Removed {longest_matching_cmd} because of {err}")
+    Args:
+      text (str|DeferredShowText): text output
 
-    return show_cmds
+    Returns:
+      text (str): text output
+    """
+    if isinstance(text, DeferredShowText):
+        return text.resolve()
+    return text
 
 
-def dut_worker(dut, show_cmds, reachable_duts):
-    """Execute inputted show commands on dut.  Update dut structured data
-    with show output.
+# pylint: disable-next=too-many-arguments
+def record_show_output(
+    dut, show_cmds, show_cmd_json_list, show_cmds_json, show_cmd_txt_list, show_cmds_txt
+):
+    """Add the json and text output of the show commands to the dut
+    structured data. Commands which failed get an empty output.
 
     Args:
       dut (dict): structured data of a dut output data, hostname, and
       show_cmds (list): List of show commands
-      reachable_duts (dict): Abstraction of duts
+      show_cmd_json_list (list): json outputs of show_cmds_json
+      show_cmds_json (list): show commands which returned json output
+      show_cmd_txt_list (list): text outputs of show_cmds_txt
+      show_cmds_txt (list): show commands which returned text output
     """
     name = dut["name"]
-    conn = dut["connection"]
-    dut["output"] = {}
-    dut["output"]["interface_list"] = return_interfaces(name, reachable_duts)
-
-    logging.info(f"Executing show commands on {name}")
-    logging.debug(f"List of show commands {show_cmds}")
-
-    all_cmds_json = show_cmds.copy()
-    show_cmd_json_list, show_cmds_json = send_cmds(all_cmds_json, conn, "json")
-
-    logging.debug(f"Returned from send_cmds_json {show_cmds_json}")
-
-    all_cmds_txt = show_cmds.copy()
-    show_cmd_txt_list, show_cmds_txt = send_cmds(all_cmds_txt, conn, "text")
-
-    logging.debug(f"Returned from send_cmds_txt {show_cmds_txt}")
 
     for show_cmd in show_cmds:
         function_def = f'test_{("_").join(show_cmd.split())}'
@@ -559,6 +1777,57 @@ def return_interfaces(hostname, reachable_duts):
     return interface_list
 
 
+def return_caller_name(depth=1):
+    """Return the name of the function calling the caller. Unlike
+    inspect.stack() it does not read the source code of every frame.
+
+    Args:
+        depth (int): number of frames above the caller
+
+    Returns:
+        caller_name (str): name of the function
+    """
+    frame = inspect.currentframe().f_back
+    for _ in range(depth):
+        frame = frame.f_back
+
+    return frame.f_code.co_name
+
+
+class TestDefinitions(dict):
+    """Test definitions of a session, as returned by return_test_defs. The
+    test case index of the definitions is kept on them, so it lives as long
+    as the definitions do."""
+
+    test_case_index = None
+
+
+def return_test_case_index(test_defs):
+    """Return the test cases of test definitions keyed by test suite and
+    test case name. The index of TestDefinitions is built once and reused
+    by every TestOps object of the session.
+
+    Args:
+        test_defs (dict): test definitions
+
+    Returns:
+        index (dict): test case definitions keyed by (test suite, test case)
+    """
+    if isinstance(test_defs, TestDefinitions) and test_defs.test_case_index is not None:
+        return test_defs.test_case_index
+
+    index = {}
+    for test_suite in test_defs["test_suites"]:
+        for test_case in test_suite.get("testcases") or []:
+            index.setdefault((test_suite["name"], test_case["name"]), test_case)
+
+    if isinstance(test_defs, TestDefinitions):
+        logging.debug(f"Indexed {len(index)} test cases of test definitions")
+        test_defs.test_case_index = index
+
+    return index
+
+
 def get_parameters(tests_parameters, test_suite, test_case=""):
     """Return test parameters for a test case
 
@@ -570,7 +1839,7 @@ def get_parameters(tests_parameters, test_suite, test_case=""):
         case_parameters (list): test parameters for a test case
     """
     if not test_case:
-        test_case = inspect.stack()[1][3]
+        test_case = return_caller_name()
 
         logging.info(f"Setting testcase name to {test_case}")
 
@@ -727,19 +1996,75 @@ def return_show_cmds(test_parameters):
     return show_cmds
 
 
+def return_show_cmd_encodings(test_parameters, default_encoding=DEFAULT_SHOW_CMD_ENCODING):
+    """Return the show_cmd_encoding policy of the show commands from the
+    test_definitions. A test case sets the policy of its show commands with
+    show_cmd_encoding: json, text, both or lazy (json, with the text fetched
+    on first read). A command used by several test cases fetches every
+    encoding any of them needs.
+
+    Args:
+        test_parameters (dict): Abstraction of testing parameters
+        default_encoding (str): policy of test cases which do not set one
+
+    Returns:
+        show_cmd_encodings (dict): show_cmd_encoding policy of each show command
+    """
+    needed = {}
+
+    def add_encoding(show_cmd, encoding):
+        if encoding not in SHOW_CMD_ENCODINGS:
+            raise ValueError(f"Invalid show command encoding {encoding} specified")
+        needed.setdefault(show_cmd, set()).update(SHOW_CMD_ENCODINGS[encoding])
+
+    # show version and show clock json output is used by Vane itself
+    for show_cmd in ("show version", "show clock"):
+        add_encoding(show_cmd, default_encoding)
+        add_encoding(show_cmd, "lazy")
+
+    for test_suite in test_parameters["test_suites"]:
+        for test_case in test_suite["testcases"]:
+            encoding = test_case.get("show_cmd_encoding", default_encoding)
+            show_cmd = test_case.get("show_cmd", "")
+            for show_cmd in [show_cmd] if show_cmd else test_case.get("show_cmds", []):
+                add_encoding(show_cmd, encoding)
+
+    show_cmd_encodings = {}
+    for show_cmd, encodings in needed.items():
+        if "text" in encodings:
+            encodings.discard("lazy")
+        show_cmd_encodings[show_cmd] = next(
+            encoding
+            for encoding, fetched in SHOW_CMD_ENCODINGS.items()
+            if set(fetched) == encodings
+        )
+
+    logging.debug(f"show_cmd_encoding of show commands: {show_cmd_encodings}")
+
+    return show_cmd_encodings
+
+
 def return_test_defs(test_parameters):
-    """Return test_definitions from the test_parameters
+    """Return test_definitions from the test_parameters. Parsed test
+    definition files are kept in a discovery index, so files which did not
+    change since the previous run are not parsed again.
 
     Args:
         test_parameters (dict): Abstraction of testing parameters
 
     Returns:
-        test_defs (dict): test definitions
+        test_defs (TestDefinitions): test definitions
     """
     test_defs = {"test_suites": []}
     test_dirs = test_parameters["parameters"]["test_dirs"]
     report_dir = test_parameters["parameters"]["report_dir"]
     test_definitions_file = test_parameters["parameters"]["test_definitions"]
+    index_file = test_parameters["parameters"].get(
+        "discovery_index", f"{report_dir}/.test_definitions_index.yaml"
+    )
+
+    index = load_discovery_index(index_file)
+    new_index = {}
 
     for test_directory in test_dirs:
         tests_info = os.walk(test_directory)
@@ -747,7 +2072,7 @@ def return_test_defs(test_parameters):
             for file_name in file_names:
                 if file_name == test_definitions_file:
                     file_path = f"{dir_path}/{file_name}"
-                    test_def = import_yaml(file_path)
+                    test_def = import_test_definition(file_path, index, new_index)
                     for test_suite in test_def:
                         test_suite["dir_path"] = f"{dir_path}"
                         import_config(dir_path, test_suite)
@@ -756,10 +2081,86 @@ def return_test_defs(test_parameters):
     logging.info(f"Creating {report_dir} reports directory")
     os.makedirs(report_dir, exist_ok=True)
     export_yaml(report_dir + "/" + test_definitions_file, test_defs)
+    save_discovery_index(index_file, new_index)
 
     logging.debug(f"Return the following test definitions data structure {test_defs}")
 
-    return test_defs
+    return TestDefinitions(test_defs)
+
+
+def import_test_definition(file_path, index, new_index):
+    """Return the test suites of a test definition file, from the discovery
+    index if the file did not change, otherwise by parsing it
+
+    Args:
+        file_path (str): path of the test definition file
+        index (dict): discovery index of the previous run
+        new_index (dict): discovery index of this run, updated with the file
+
+    Returns:
+        test_def (list): test suites of the test definition file
+    """
+    stat = os.stat(file_path)
+    entry = index.get(file_path)
+
+    if (
+        isinstance(entry, dict)
+        and entry.get("mtime_ns") == stat.st_mtime_ns
+        and entry.get("size") == stat.st_size
+        and "test_def" in entry
+    ):
+        logging.debug(f"Using discovery index for {file_path}")
+    else:
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "test_def": import_yaml(file_path),
+        }
+
+    new_index[file_path] = entry
+
+    # copied so the test suites handed out are never the indexed ones
+    return copy.deepcopy(entry["test_def"])
+
+
+def load_discovery_index(index_file):
+    """Return the discovery index of test definition files
+
+    Args:
+        index_file (str): path of the discovery index
+
+    Returns:
+        index (dict): entries of test definition files keyed by path
+    """
+    try:
+        with open(index_file, "r", encoding="utf-8") as input_file:
+            index = yaml_io.load(input_file)
+    except (OSError, yaml.YAMLError):
+        return {}
+
+    if (
+        not isinstance(index, dict)
+        or index.get("version") != DISCOVERY_INDEX_VERSION
+        or not isinstance(index.get("files"), dict)
+    ):
+        return {}
+
+    return index["files"]
+
+
+def save_discovery_index(index_file, index):
+    """Write the discovery index of test definition files
+
+    Args:
+        index_file (str): path of the discovery index
+        index (dict): entries of test definition files keyed by path
+    """
+    try:
+        os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+        with open(index_file, "w", encoding="utf-8") as output_file:
+            yaml_io.dump({"version": DISCOVERY_INDEX_VERSION, "files": index}, output_file)
+    except OSError as err:
+        logging.warning(f"Could not write discovery index {index_file}: {err}")
 
 
 def import_config(dir_path, test_suite):
@@ -879,7 +2280,7 @@ def export_yaml(yaml_file, yaml_data):
             try:
                 logging.debug(f"Output the following yaml: {yaml_data}")
 
-                yaml.dump(yaml_data, yaml_out, default_flow_style=False)
+                yaml_io.dump(yaml_data, yaml_out, default_flow_style=False)
             except yaml.YAMLError as err:
                 print(">>> ERROR IN YAML FILE")
                 logging.error(f"ERROR IN YAML FILE: {err}")
@@ -908,13 +2309,7 @@ def export_text(text_file, text_data, dut_name):
     try:
         with open(text_file, "a", encoding="utf-8") as text_out:
             logging.debug(f"Output the following text file: {text_data}")
-            divider = "================================================================"
-            heading = (
-                f"{divider}\nThese commands were run when PRIMARY DUT was {dut_name}\n{divider}\n\n"
-            )
-            text_out.write(heading)
-            for key, value in text_data.items():
-                text_out.write(f"{key}{value}\n")
+            text_out.write(result_writer.format_evidence(text_data, dut_name))
     except OSError as err:
         print(f">>> {text_file} TEXT FILE MISSING")
         logging.error(f"ERROR TEXT FILE: {text_file} NOT FOUND. {err}")
@@ -963,7 +2358,7 @@ def create_duts_file(topology_file, inventory_file, duts_file_name):
         if dut_properties:
             dut_file.update({"duts": dut_properties})
             with open(duts_file_name, "w", encoding="utf-8") as yamlfile:
-                yaml.dump(dut_file, yamlfile, sort_keys=False)
+                yaml_io.dump(dut_file, yamlfile, sort_keys=False)
 
     # pylint: disable-next=broad-exception-caught
     except Exception as excep:
@@ -973,6 +2368,40 @@ def create_duts_file(topology_file, inventory_file, duts_file_name):
         sys.exit(1)
 
 
+def return_test_steps(func):
+    """Returns the test steps of a function, the statements with TS: in its
+    source. Steps are parsed once per function and cached, since they are
+    the same for every dut the test case runs on.
+
+    Args:
+        func (obj): function or method with body to inspect for test steps
+
+    Returns:
+        test_steps (list): test steps of the function
+    """
+    code = getattr(func, "__func__", func).__code__
+    test_steps = test_steps_cache.get(code)
+    if test_steps is not None:
+        return test_steps
+
+    # Extracting lines from the function
+    lines, _ = inspect.getsourcelines(func)
+
+    # converting list of strings into a single string
+    content = " ".join([str(elem) for elem in lines])
+
+    # Find all matches to pattern and format each item in list
+    comments = [re.sub(r"\n\s+", " ", x) for x in TEST_STEPS_PATTERN.findall(content)]
+
+    if not comments:
+        comments.append("N/a no Test Steps found")
+
+    test_steps = [step.lstrip("TS:") for step in comments]
+    test_steps_cache[code] = test_steps
+
+    return test_steps
+
+
 def post_process_skip(tops, steps, output=""):
     """Post processing for test case that encounters a PyTest Skip
     Args:
@@ -1037,7 +2466,7 @@ class TestOps:
             test_suite (str): name of test suite
             dut (dict): device under test
         """
-        test_case = inspect.stack()[1][3]
+        test_case = return_caller_name()
         # Test cases that skip will change skip to True
         self.skip = False
         self.test_case = test_case
@@ -1056,6 +2485,14 @@ class TestOps:
         except KeyError:
             self.show_clock_flag = False
 
+        self.derive_show_clock = parameters.get("parameters", {}).get(
+            "derive_show_clock", DEFAULT_DERIVE_SHOW_CLOCK
+        )
+        self.evidence_policy = get_evidence_policy(parameters)
+        # (dut, conn_type, cmds, index of the first evidence) of the
+        # commands whose text evidence is fetched if the test fails
+        self._lazy_evidence = []
+
         self.show_cmds = {self.dut_name: []}
         self._show_cmds = {self.dut_name: []}
 
@@ -1084,12 +2521,16 @@ class TestOps:
 
         if len(self._show_cmds[self.dut_name]) > 0 and self.dut:
             self._verify_show_cmd(self._show_cmds[self.dut_name], self.dut)
+            # deferred text outputs are only fetched once read or written as
+            # evidence
             if self.show_cmd:
-                self.show_cmd_txt = self.dut["output"][self.show_cmd]["text"]
+                self.show_cmd_txt = show_text(self.dut["output"][self.show_cmd])
             for show_cmd in self.show_cmds[self.dut_name]:
-                self.show_cmd_txts[self.dut_name].append(self.dut["output"][show_cmd]["text"])
+                self.show_cmd_txts[self.dut_name].append(show_text(self.dut["output"][show_cmd]))
             for show_cmd in self._show_cmds[self.dut_name]:
-                self._show_cmd_txts[self.dut_name].append(self.dut["output"][show_cmd]["text"])
+                self._show_cmd_txts[self.dut_name].append(
+                    show_text(self.dut["output"][show_cmd])
+                )
 
         self.comment = ""
         self.output_msg = ""
@@ -1134,7 +2575,11 @@ class TestOps:
         logging.debug(f"Creating results file named {yaml_file}")
 
         yaml_data = self.test_parameters
-        export_yaml(yaml_file, yaml_data)
+        writer = get_result_writer()
+        if writer:
+            writer.write_result(yaml_file, yaml_data)
+        else:
+            export_yaml(yaml_file, yaml_data)
 
     def _write_text_results(self):
         """Write the text output of show command to a text file"""
@@ -1153,6 +2598,7 @@ class TestOps:
         report_dir = self.report_dir
         test_id = self.test_parameters["test_id"]
         test_case = self.test_parameters["name"]
+        store = get_evidence_store()
 
         # write evidence for cmds if any
         for dut_name, dut_cmds in cmds.items():
@@ -1164,11 +2610,18 @@ class TestOps:
             index = 1
 
             for command, text in zip(dut_cmds, cmds_outputs[dut_name]):
-                text_data[str(index) + ". " + dut_name + "# " + command] = "\n\n" + text
+                evidence = self._store_evidence(store, text)
+                if evidence_store.is_reference(evidence):
+                    evidence = f"{evidence} in {store.path(evidence)}"
+                text_data[str(index) + ". " + dut_name + "# " + command] = "\n\n" + evidence
                 index += 1
 
             if text_data:
-                export_text(text_file, text_data, self.dut_name)
+                writer = get_result_writer()
+                if writer:
+                    writer.write_text(text_file, text_data, self.dut_name)
+                else:
+                    export_text(text_file, text_data, self.dut_name)
             else:
                 logging.debug(
                     f"No cfg command output to display for test id {test_id} test case {test_case}"
@@ -1186,7 +2639,7 @@ class TestOps:
             case_parameters (list): test parameters for a test case
         """
         if not test_case:
-            test_case = inspect.stack()[1][3]
+            test_case = return_caller_name()
 
             logging.info(f"Setting testcase name to {test_case}")
 
@@ -1196,27 +2649,17 @@ class TestOps:
 
         logging.debug(f"Return testcases for Test Suite: {test_suite}")
 
-        suite_parameters = [
-            copy.deepcopy(param)
-            for param in tests_parameters["test_suites"]
-            if param["name"] == test_suite
-        ]
-
-        logging.debug(f"Suite_parameters: {suite_parameters}")
-
         logging.info(f"Returning parameters for Test Case: {test_case}")
 
-        case_parameters = [
-            copy.deepcopy(param)
-            for param in suite_parameters[0]["testcases"]
-            if param["name"] == test_case
-        ]
+        # only the test case is copied, the test definitions stay shared
+        test_case_index = return_test_case_index(tests_parameters)
+        case_parameters = copy.deepcopy(test_case_index[(test_suite, test_case)])
 
-        logging.debug(f"Case_parameters: {case_parameters[0]}")
+        logging.debug(f"Case_parameters: {case_parameters}")
 
-        case_parameters[0]["test_suite"] = test_suite
+        case_parameters["test_suite"] = test_suite
 
-        return case_parameters[0]
+        return case_parameters
 
     def generate_report(self, dut_name, output=""):
         """Utility to generate report
@@ -1228,6 +2671,10 @@ class TestOps:
         """
         logging.debug(f"Output on device {dut_name} after SSH connection is: {output}")
 
+        self._resolve_show_texts()
+        if not self.test_result:
+            self._fetch_lazy_evidence()
+
         self.test_parameters["comment"] = self.comment
         self.test_parameters["test_result"] = self.test_result
         self.test_parameters["output_msg"] = self.output_msg
@@ -1237,13 +2684,29 @@ class TestOps:
         self.test_parameters["show_cmd"] = self.show_cmd
         self.test_parameters["test_id"] = self.test_id
         self.test_parameters["show_cmd_txts"] = self._show_cmd_txts
+        self.test_parameters["external_command_outputs"] = self.external_cmd_txts
+        show_cmd_txt = self.show_cmd_txt
+
+        store = get_evidence_store()
+        if store:
+            self.test_parameters["show_cmd_txts"] = {
+                dut_name: [self._store_evidence(store, text) for text in texts]
+                for dut_name, texts in self._show_cmd_txts.items()
+            }
+            self.test_parameters["external_command_outputs"] = {
+                dut_name: {
+                    cmd: self._store_evidence(store, output) for cmd, output in outputs.items()
+                }
+                for dut_name, outputs in self.external_cmd_txts.items()
+            }
+            show_cmd_txt = self._store_evidence(store, str(show_cmd_txt))
+
         self.test_parameters["test_steps"] = self.test_steps
         self.test_parameters["show_cmds"] = self._show_cmds
         self.test_parameters["skip"] = self.skip
-        self.test_parameters["external_command_outputs"] = self.external_cmd_txts
 
-        if str(self.show_cmd_txt):
-            self.test_parameters["show_cmd"] += ":\n\n" + self.show_cmd_txt
+        if str(show_cmd_txt):
+            self.test_parameters["show_cmd"] += ":\n\n" + show_cmd_txt
 
         self.test_parameters["test_id"] = self.test_id
         self.test_parameters["fail_or_skip_reason"] = ""
@@ -1255,20 +2718,62 @@ class TestOps:
         self._write_results()
         self._write_text_results()
 
+    @property
+    def show_cmd_txt(self):
+        """Text output of show_cmd, fetched on first read if it is deferred"""
+        self._show_cmd_txt = resolve_show_text(self._show_cmd_txt)
+        return self._show_cmd_txt
+
+    @show_cmd_txt.setter
+    def show_cmd_txt(self, text):
+        self._show_cmd_txt = text
+
+    def _resolve_show_texts(self):
+        """Fetch the deferred text outputs held as evidence, as the evidence
+        is about to be written"""
+
+        for show_cmd_txts in (self.show_cmd_txts, self._show_cmd_txts):
+            for dut_name, texts in show_cmd_txts.items():
+                show_cmd_txts[dut_name] = [resolve_show_text(text) for text in texts]
+
+    def _fetch_lazy_evidence(self):
+        """Replace the json evidence of the commands run with the lazy
+        evidence policy by their text output"""
+
+        lazy_evidence, self._lazy_evidence = self._lazy_evidence, []
+
+        for dut, conn_type, cmds, start in lazy_evidence:
+            if conn_type == "eapi":
+                conn = self.get_eapi_connection(dut)
+            else:
+                conn = self.get_ssh_connection(dut)
+
+            try:
+                txt_results = conn.enable(cmds, strict=True, encoding="text")
+            except Exception as e:  # pylint: disable=broad-except
+                logging.error(f"Could not fetch the text evidence of cmds {cmds}: {str(e)}")
+                continue
+
+            show_cmd_txts = self._show_cmd_txts[dut["name"]]
+            for index, result_dict in enumerate(txt_results, start=start):
+                show_cmd_txts[index] = result_dict.get("result", {"output": ""})["output"]
+
     def _html_report(self):
         """Print to standard output for HTML reporting"""
 
+        store = get_evidence_store()
+
         print("\nOUTPUT MESSAGES:")
         print("================")
         print(f"{self.output_msg}\n{self.comment}")
 
         print("\nEXPECTED OUTPUT:")
         print("================")
-        pprint.pprint(self.expected_output)
+        self._print_evidence(store, "", pprint.pformat(self.expected_output), "expected output")
 
         print("\n\nACTUAL OUTPUT:")
         print("==============")
-        pprint.pprint(self.actual_output)
+        self._print_evidence(store, "", pprint.pformat(self.actual_output), "actual output")
 
         print("\n\nSHOW OUTPUT COLLECTED IN TEST CASE:")
         print("===================================")
@@ -1277,7 +2782,9 @@ class TestOps:
             for cmd_index, (command, text) in enumerate(
                 zip(_show_cmds, self._show_cmd_txts[dut_name]), start=1
             ):
-                print(f"{dut_index}.{cmd_index}. {dut_name}# {command}\n\n{text}")
+                self._print_evidence(
+                    store, f"{dut_index}.{cmd_index}. {dut_name}# {command}\n\n", text
+                )
 
         if self.external_cmd_txts:
             print("\n\nCOMMAND OUTPUT COLLECTED FROM EXTERNAL DEVICES IN TEST CASE:")
@@ -1287,39 +2794,58 @@ class TestOps:
                 self.external_cmd_txts.items(), start=1
             ):
                 for cmd_index, (cmd, output) in enumerate(output_details.items(), start=1):
-                    print(f"{dut_index}.{cmd_index}. {dut_name}# {cmd}\n\n{output}")
+                    self._print_evidence(
+                        store, f"{dut_index}.{cmd_index}. {dut_name}# {cmd}\n\n", str(output)
+                    )
 
-    def parse_test_steps(self, func):
-        """Returns a list of all the test steps in the given function.
-        Inspects functions and finds statements with TS: and organizes
-        them into a list.
+    def _print_evidence(self, store, heading, text, name=""):
+        """Print evidence to standard output, or a reference to it when the
+        evidence store is used and the evidence is not short
 
         Args:
-          func (obj): function reference with body to inspect for test steps
+            store (EvidenceStore): evidence store, None to print the evidence
+            heading (str): printed before the evidence
+            text (str): evidence text
+            name (str): name of the evidence link in the HTML report
         """
+        reference = self._store_evidence(store, text)
+        if not evidence_store.is_reference(reference):
+            print(f"{heading}{text}")
+            return
+
+        evidence_file = store.path(reference)
+        print(f"{heading}{reference} in {evidence_file} ({len(text)} characters)")
 
-        # Extracting lines from the function
-        comments = []
-        lines, _ = inspect.getsourcelines(func)
+        name = name or heading.strip()
+        evidence_links.append((f"{self.dut_name} {name}", evidence_file))
 
-        # converting list of strings into a single string
-        content = " ".join([str(elem) for elem in lines])
+    def _store_evidence(self, store, text):
+        """Return a reference to evidence stored in the evidence store, or
+        the evidence itself when it is short or there is no store
+
+        Args:
+            store (EvidenceStore): evidence store, None to keep the evidence
+            text (str): evidence text
 
-        # Pattern to match to extract TS
-        pattern = re.compile('(TS:.*?)(?:"""|Args:)', re.DOTALL)
+        Returns:
+            evidence (str): evidence reference or text
+        """
+        if store is None or not isinstance(text, str) or len(text) <= EVIDENCE_INLINE_LIMIT:
+            return text
 
-        # Find all matches to pattern
-        comments = pattern.findall(content)
+        return store.put(text)
 
-        # Format each item in list
-        comments = [re.sub(r"\n\s+", " ", x) for x in comments]
+    def parse_test_steps(self, func):
+        """Returns a list of all the test steps in the given function.
+        Inspects functions and finds statements with TS: and organizes
+        them into a list.
 
-        if not comments:
-            comments.append("N/a no Test Steps found")
+        Args:
+          func (obj): function reference with body to inspect for test steps
+        """
 
-        for step in comments:
-            # Add Test steps to list to be added to file
-            self.test_steps.append(step.lstrip("TS:"))
+        # Add Test steps to list to be added to file
+        self.test_steps.extend(return_test_steps(func))
 
         logging.info(f"These are test steps {self.test_steps}")
 
@@ -1346,7 +2872,7 @@ class TestOps:
             conn (netmiko connection): ssh connection for the device"""
 
         if "ssh_conn" not in dut:
-            netmiko_conn = device_interface.NetmikoConn()
+            netmiko_conn = new_device_conn("ssh")
             netmiko_conn.set_up_conn(dut)
             dut["ssh_conn"] = netmiko_conn
             dut["connection"] = netmiko_conn
@@ -1364,7 +2890,7 @@ class TestOps:
             conn (paramiko connection): eapi connection for the device"""
 
         if "eapi_conn" not in dut:
-            pyeapi_conn = device_interface.PyeapiConn()
+            pyeapi_conn = new_device_conn("eapi")
             pyeapi_conn.set_up_conn(dut)
             dut["eapi_conn"] = pyeapi_conn
             dut["connection"] = pyeapi_conn
@@ -1383,29 +2909,7 @@ class TestOps:
         Returns:
             conn (pyeapi/netmiko): a new eapi or ssh connection to dut
         """
-        device_data = {}
-        device_data["transport"] = dut["transport"]
-        device_data["mgmt_ip"] = dut["mgmt_ip"]
-        device_data["username"] = dut["username"]
-        device_data["password"] = dut["password"]
-        device_data["enable_pwd"] = dut.get("enable_pwd", "")
-        device_data["timeout"] = timeout
-        device_data["name"] = dut["name"]
-        if dut.get("session_log"):
-            device_data["session_log"] = dut["session_log"]
-        if conn_type == "eapi":
-            logging.info(f"Creating new eapi connection to {dut['name']}")
-            pyeapi_conn = device_interface.PyeapiConn()
-            pyeapi_conn.set_up_conn(device_data)
-            return pyeapi_conn
-
-        if conn_type == "ssh":
-            logging.info(f"Creating new ssh connection to {dut['name']}")
-            netmiko_conn = device_interface.NetmikoConn()
-            netmiko_conn.set_up_conn(device_data)
-            return netmiko_conn
-
-        raise ValueError(f"conn_type [{conn_type}] not supported")
+        return new_dut_conn(dut, conn_type, timeout)
 
     def run_cfg_cmds(self, cfg_cmds, dut=None, conn_type="eapi", timeout=0, new_conn=False):
         """A wrapper which runs the configuration cmds
@@ -1500,9 +3004,10 @@ class TestOps:
         Args:
             cmds (list): list of cfg/show cmds to run
             conn_type (pyeapi/netmiko conn): eapi or ssh
-            timeout (int): timeout to be used for connection to DUT, if non-zero timeout is
-                            specified then a new connection is created
-            new_conn (boolean): whether or not to create a new connection to DUT
+            timeout (int): timeout to be used for connection to DUT, if a positive timeout is
+                            specified then a pooled connection with that timeout is used
+            new_conn (boolean): whether or not to create a new connection to DUT, which
+                                is closed once the cmds are run
             encoding (str): json or text, with json being default
             cmd_type (str): type of cmd to run - "show" or "cfg" with "show" being default
             dut (dict): the device to run the cmds on
@@ -1511,7 +3016,6 @@ class TestOps:
             obj (dict): A dict object that includes the response for each command
         """
 
-        # pylint: disable=no-member
         # if dut is not passed, use this object's dut
         if dut is None:
             dut = self.dut
@@ -1524,11 +3028,68 @@ class TestOps:
                 conn = self.get_ssh_connection(dut)
             else:
                 raise ValueError(f"conn_type [{conn_type}] not supported")
-        elif timeout > 0 or new_conn:
-            # if timeout is non-zero or user wants a new connection
-            # get the new connection
+
+            return self._run_and_record_conn_cmds(
+                conn, dut, cmds, conn_type, encoding, cmd_type, hidden_cmd
+            )
+
+        if new_conn:
+            # if user wants a new connection, get the new connection and
+            # close it once the cmds are run
             conn = self.get_new_conn(dut, conn_type, timeout)
+            try:
+                return self._run_and_record_conn_cmds(
+                    conn, dut, cmds, conn_type, encoding, cmd_type, hidden_cmd
+                )
+            finally:
+                connection_pool.ConnectionPool.discard(conn)
+
+        if timeout < 0:
+            raise ValueError(f"timeout [{timeout}] not supported")
+
+        # if timeout is non-zero, use a pooled connection with that timeout
+        with get_connection_pool().connection(dut, conn_type, timeout) as conn:
+            return self._run_and_record_conn_cmds(
+                conn, dut, cmds, conn_type, encoding, cmd_type, hidden_cmd
+            )
+
+    def _record_show_clock(self, conn, dut):
+        """Record show clock and its output as evidence
+
+        Args:
+            conn (DeviceConn): connection to the dut
+            dut (dict): the device whose clock is recorded
+        """
+        dut_name = dut["name"]
+        self._show_cmds[dut_name].append("show clock")
+
+        try:
+            output = show_clock_output(conn, dut, self.derive_show_clock)
+        except BaseException as e:
+            # add the exception result to _show_cmd_txts evidence output list
+            self._show_cmd_txts[dut_name].append(str(e))
+            raise e
+
+        self._show_cmd_txts[dut_name].append(output)
+
+    def _run_and_record_conn_cmds(self, conn, dut, cmds, conn_type, encoding, cmd_type, hidden_cmd):
+        """Runs cfg/show cmds on a connection and records the output of these
+        commands
+
+        Args:
+            conn (DeviceConn): connection to the dut
+            dut (dict): the device to run the cmds on
+            cmds (list): list of cfg/show cmds to run
+            conn_type (pyeapi/netmiko conn): eapi or ssh
+            encoding (str): json or text
+            cmd_type (str): type of cmd to run - "show" or "cfg"
+            hidden_cmd (boolean): whether cmds are hidden jinja2 templates
+
+        Returns:
+            obj (dict): A dict object that includes the response for each command
+        """
 
+        # pylint: disable=no-member
         dut_name = dut["name"]
 
         # initializing evidence values for other duts since
@@ -1536,25 +3097,9 @@ class TestOps:
 
         self.set_evidence_default(dut_name)
 
-        # first run show clock if flag is set
+        # first record show clock if flag is set
         if self.show_clock_flag:
-            show_clock_cmds = ["show clock"]
-            # run the show_clock_cmds
-            try:
-                show_clock_op = conn.enable(show_clock_cmds, "text")
-            except BaseException as e:
-                # add the show clock cmd to _show_cmds evidence list
-                for cmd in show_clock_cmds:
-                    self._show_cmds[dut_name].append(cmd)
-                # add the exception result to _show_cmd_txts evidence output list
-                self._show_cmd_txts[dut_name].append(str(e))
-                raise e
-
-            # add the show_clock_cmds to _show_cmds list
-            # also add the o/p of show_clock_cmds to _show_cmd_txts list
-            for result_dict in show_clock_op:
-                self._show_cmds[dut_name].append(result_dict["command"])
-                self._show_cmd_txts[dut_name].append(result_dict["result"]["output"])
+            self._record_show_clock(conn, dut)
 
         # then run commands
         try:
@@ -1565,13 +3110,28 @@ class TestOps:
                 if hidden_cmd:
                     run_cmds = render_cmds(dut, cmds)
 
-                # run the commands in text mode first, to catch the evidence in case of
-                # command error.
-                txt_results = conn.enable(run_cmds, strict=True, encoding="text")
+                if encoding == "json" and self.evidence_policy != "text":
+                    try:
+                        json_results = conn.enable(run_cmds, strict=True)
+                    except BaseException:
+                        # run the commands in text mode, to catch the evidence
+                        # of the command error.
+                        conn.enable(run_cmds, strict=True, encoding="text")
+                        raise
+
+                    # record the json output as evidence
+                    txt_results = [
+                        {"result": {"output": json.dumps(result_dict["result"], indent=2)}}
+                        for result_dict in json_results
+                    ]
+                else:
+                    # run the commands in text mode first, to catch the evidence in case of
+                    # command error.
+                    txt_results = conn.enable(run_cmds, strict=True, encoding="text")
 
-                # if encoding is json run the commands, store the results
-                if encoding == "json":
-                    json_results = conn.enable(run_cmds, strict=True)
+                    # if encoding is json run the commands, store the results
+                    if encoding == "json":
+                        json_results = conn.enable(run_cmds, strict=True)
             else:
                 # run the config cmd
                 txt_results = conn.config(cmds)
@@ -1616,6 +3176,10 @@ class TestOps:
         for cmd in cmds:
             self._show_cmds[dut_name].append(cmd)
 
+        if cmd_type == "show" and encoding == "json" and self.evidence_policy == "lazy":
+            start = len(self._show_cmd_txts[dut_name])
+            self._lazy_evidence.append((dut, conn_type, run_cmds, start))
+
         # also add the text o/p of cmds to _show_cmd_txts cmd output list
         if cmd_type == "cfg" and conn_type == "ssh":
             for cmd in cmds:
@@ -1648,8 +3212,6 @@ class TestOps:
         if dut is None:
             dut = self.dut
 
-        dut_name = dut["name"]
-
         if operation not in ("get", "put"):
             raise ValueError(f"operation [{operation}] not supported")
 
@@ -1660,25 +3222,13 @@ class TestOps:
         new_dut["session_log"] = session_log
         conn = self.get_new_conn(new_dut, conn_type="ssh", timeout=60)
 
-        # first run show clock if flag is set
+        # first record show clock if flag is set
         if self.show_clock_flag:
-            show_clock_cmds = ["show clock"]
-            # run the show_clock_cmds
             try:
-                show_clock_op = conn.enable(show_clock_cmds, "text")
-            except BaseException as e:
-                # add the show clock cmd to _show_cmds
-                for cmd in show_clock_cmds:
-                    self._show_cmds[dut_name].append(cmd)
-                    # add the exception result to _show_cmds_txts
-                    self._show_cmd_txts[dut_name].append(str(e))
-                raise e
-
-            # add the show_clock_cmds to internal cmds list
-            # also add the o/p of show_clock_cmds to external cmd output list
-            for result_dict in show_clock_op:
-                self._show_cmds[dut_name].append(result_dict["command"])
-                self._show_cmd_txts[dut_name].append(result_dict["result"]["output"])
+                self._record_show_clock(conn, dut)
+            except BaseException:
+                connection_pool.ConnectionPool.discard(conn)
+                raise
 
         if sftp:
             cmd_str = "sftp"
@@ -1695,6 +3245,10 @@ class TestOps:
             self._show_cmds[new_dut["name"]].append(transfer_request)
             self._show_cmd_txts[new_dut["name"]].append(str(e))
             raise e
+        finally:
+            # the session log of a transfer is its evidence and sftp changes the
+            # channel of the session, so transfer connections are not pooled
+            connection_pool.ConnectionPool.discard(conn)
 
         self._show_cmds[new_dut["name"]].append(transfer_request)
         # open session log and copy over the evidence
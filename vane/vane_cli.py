@@ -43,10 +43,12 @@ import json
 import os
 import sys
 import pytest
+from vane import device_interface
 from vane import tests_client
 from vane import report_client
 from vane import test_catalog_client
 from vane import tests_tools
+from vane import show_cache
 import vane.config
 from vane.vane_logging import logging
 from vane import nrfu_client
@@ -140,6 +142,43 @@ def parse_cli():
         nargs=1,
         metavar="test_definitions_file",
     )
+
+    cache_parser = parser.add_mutually_exclusive_group()
+
+    cache_parser.add_argument(
+        "--use-cache",
+        help=(
+            "Reuse show command outputs cached on disk by a previous run if they are"
+            " younger than cache_ttl seconds, and cache the outputs collected in this run"
+        ),
+        action="store_true",
+    )
+
+    cache_parser.add_argument(
+        "--refresh-cache",
+        help="Collect all show command outputs and replace the outputs cached on disk",
+        action="store_true",
+    )
+
+    capture_parser = parser.add_mutually_exclusive_group()
+
+    capture_parser.add_argument(
+        "--record",
+        help=(
+            "Record the commands run on the DUTs and their outputs to a capture in"
+            " CAPTURE_DIR, which can be replayed with --replay"
+        ),
+        metavar="CAPTURE_DIR",
+    )
+
+    capture_parser.add_argument(
+        "--replay",
+        help=(
+            "Run the tests offline, serving the DUTs from the capture in CAPTURE_DIR"
+            " instead of connecting to them"
+        ),
+        metavar="CAPTURE_DIR",
+    )
     args = main_parser.parse_args()
 
     return args
@@ -152,15 +191,30 @@ def setup_vane():
     vane.config.test_duts = tests_tools.import_yaml(vane.config.DUTS_FILE)
     vane.config.test_parameters = tests_tools.import_yaml(vane.config.DEFINITIONS_FILE)
 
+    if vane.config.show_cache_mode:
+        parameters = vane.config.test_parameters["parameters"]
+        vane.config.show_cache = show_cache.ShowCache(
+            parameters.get("cache_dir", show_cache.DEFAULT_CACHE_DIR),
+            parameters.get("cache_ttl", show_cache.DEFAULT_CACHE_TTL),
+            refresh=vane.config.show_cache_mode == "refresh",
+        )
+
     logging.info("Discovering show commands from definitions")
 
     vane.config.test_defs = tests_tools.return_test_defs(vane.config.test_parameters)
+    tests_tools.return_test_case_index(vane.config.test_defs)
 
     show_cmds = tests_tools.return_show_cmds(vane.config.test_defs)
+    show_cmd_encodings = tests_tools.return_show_cmd_encodings(
+        vane.config.test_defs,
+        vane.config.test_parameters["parameters"].get(
+            "show_cmd_encoding", tests_tools.DEFAULT_SHOW_CMD_ENCODING
+        ),
+    )
 
     print(f"{YELLOW}\nRunning Show Commands on Initialized Duts\n{DEFAULT}")
     vane.config.dut_objs, vane.config.unreachable_duts = tests_tools.init_duts(
-        show_cmds, vane.config.test_parameters, vane.config.test_duts
+        show_cmds, vane.config.test_parameters, vane.config.test_duts, show_cmd_encodings
     )
 
     logging.debug(f"Return to test suites: \nduts: {vane.config.dut_objs}")
@@ -180,6 +234,9 @@ def run_tests(definitions_file, duts_file):
     vane_tests_client.setup_test_runner()
     setup_vane()
     vane_tests_client.test_runner()
+    if vane.config.record_dir:
+        device_interface.Capture.save_all()
+        print(f"{YELLOW}\nRecorded DUT connections to {vane.config.record_dir}\n{DEFAULT}")
     if vane.config.unreachable_duts:
         unreachable_names = [
             unreachable_dut["name"] for unreachable_dut in vane.config.unreachable_duts
@@ -353,6 +410,18 @@ def main():
         print(f"Vane Framework Version: {metadata.version(__package__)}")
 
     else:
+        if args.use_cache:
+            vane.config.show_cache_mode = "use"
+        elif args.refresh_cache:
+            vane.config.show_cache_mode = "refresh"
+
+        if args.record:
+            logging.info(f"Recording DUT connections to {args.record}")
+            vane.config.record_dir = args.record
+        elif args.replay:
+            logging.info(f"Replaying DUT connections from {args.replay}")
+            vane.config.replay_dir = args.replay
+
         if args.nrfu:
             logging.info("Invoking the Nrfu client to run Nrfu tests")
             nrfu = nrfu_client.NrfuClient(
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+#
+# Copyright (c) 2024, Arista Networks EOS+
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the Arista nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+YAML input and output used across Vane. Loading and dumping go through the
+libyaml C bindings when PyYAML was built with them, and fall back to the
+pure python safe loader and dumper otherwise.
+
+Data which the safe dumper cannot represent, such as objects returned by a
+test case, is still dumped with the full dumper like yaml.dump does.
+"""
+
+import yaml
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+YAML_FULL_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+
+
+def load(stream):
+    """Parse the first YAML document of a stream
+
+    Args:
+        stream (str|file): YAML string or open file
+
+    Returns:
+        data (any): Python data of the document
+
+    Raises:
+        yaml.YAMLError: if the stream is not valid YAML
+    """
+    return yaml.load(stream, Loader=YAML_LOADER)
+
+
+def load_file(file_name):
+    """Parse the first YAML document of a file. This is the function report
+    worker processes run, so it does not log and parse errors are raised to
+    the caller.
+
+    Args:
+        file_name (str): path of the YAML file
+
+    Returns:
+        data (any): Python data of the document
+
+    Raises:
+        yaml.YAMLError: if the file is not valid YAML
+    """
+    with open(file_name, "r", encoding="utf-8") as stream:
+        return load(stream)
+
+
+def dump(data, stream=None, **kwargs):
+    """Serialize python data as a YAML document
+
+    Args:
+        data (any): Python data made of dicts, lists and scalars
+        stream (file): Open file to write to, None to return a string
+        kwargs (dict): Options of yaml.dump such as sort_keys
+
+    Returns:
+        yaml_data (str): YAML document if stream is None
+    """
+    try:
+        yaml_data = yaml.dump(data, Dumper=YAML_DUMPER, **kwargs)
+    except yaml.representer.RepresenterError:
+        yaml_data = yaml.dump(data, Dumper=YAML_FULL_DUMPER, **kwargs)
+
+    if stream is None:
+        return yaml_data
+    stream.write(yaml_data)
+    return None